@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import time
+
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, ExecutionBackend
+from behavior_tree_learning.core.sbt import behavior_tree
+from duplo.execution_nodes import get_behaviors, get_vectorized_behaviors
+from duplo.world import Pos, ApplicationWorldFactory
+from duplo.environment import ApplicationEnvironment
+
+_START = [Pos(-0.05, -0.1, 0), Pos(0.05, -0.1, 0), Pos(0.05, 0.1, 0), Pos(-0.05, 0.1, 0)]
+_TARGET = [Pos(0.0, 0.0, 0.0), Pos(0.0, 0.0, 0.0192), Pos(0.016, -0.032, 0.0), Pos(0.016, 0.032, 0.0)]
+
+
+def _random_genome(num_subtrees):
+    # Fallback of sequences, each with a condition and one or two actions
+
+    genome = ['f(']
+    for _ in range(num_subtrees):
+        genome += ['s(', random.choice(behavior_tree.CONDITION_NODES)]
+        genome += random.sample(behavior_tree.ACTION_NODES, random.randint(1, 2)) + [')']
+    genome += [')']
+    return genome
+
+
+def run():
+
+    world_factory = ApplicationWorldFactory(_START, scenario='croissant')
+    node_factory = BehaviorNodeFactory(get_behaviors('croissant'))
+    batch_node_factory = BehaviorNodeFactory(get_vectorized_behaviors('croissant'))
+
+    environments = [('py_trees', ApplicationEnvironment(node_factory, world_factory, _TARGET)),
+                    ('native', ApplicationEnvironment(node_factory, world_factory, _TARGET,
+                                                      execution_backend=ExecutionBackend.NATIVE)),
+                    ('batch', ApplicationEnvironment(node_factory, world_factory, _TARGET,
+                                                     batch_node_factory=batch_node_factory))]
+
+    for population_size in [16, 100, 1000, 5000]:
+        random.seed(population_size)
+        genomes = [_random_genome(random.randint(1, 6)) for _ in range(population_size)]
+
+        times = []
+        fitness = []
+        for _, environment in environments:
+            start = time.perf_counter()
+            fitness.append(environment.run_and_compute_batch(genomes, False))
+            times.append(time.perf_counter() - start)
+        assert all(values == fitness[0] for values in fitness)
+
+        print("Population of %d - " % population_size +
+              ", ".join("%s: %.4f s" % (name, duration) for (name, _), duration in zip(environments, times)))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import time
+
+from behavior_tree_learning.core.sbt import behavior_tree
+from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation
+
+_TABLES = {'_FALLBACK_SET': 'FALLBACK_NODES', '_SEQUENCE_SET': 'SEQUENCE_NODES',
+           '_CONTROL_SET': 'CONTROL_NODES', '_CONDITION_SET': 'CONDITION_NODES',
+           '_ACTION_SET': 'ACTION_NODES', '_ATOMIC_FALLBACK_SET': 'ATOMIC_FALLBACK_NODES',
+           '_ATOMIC_SEQUENCE_SET': 'ATOMIC_SEQUENCE_NODES', '_UP_SET': 'UP_NODE',
+           '_LEAF_SET': 'LEAF_NODES', '_BEHAVIOR_SET': 'BEHAVIOR_NODES', '_ALL_SET': 'ALL_NODES'}
+
+
+def _register_nodes(num_conditions, num_actions):
+
+    behavior_tree.initialize_settings()
+    behavior_tree.add_node('fallback', 'f(')
+    behavior_tree.add_node('sequence', 's(')
+    behavior_tree.add_node('up_node', ')')
+    for i in range(num_conditions):
+        behavior_tree.add_node('condition', '%d at pos (%.1f, 0.05, 0.0)?' % (i % 10, i * 0.1))
+    for i in range(num_actions):
+        behavior_tree.add_node('action', 'place %d at (%.1f, 0.05, 0.0)!' % (i % 10, i * 0.1))
+
+
+def _random_genome(num_subtrees):
+    # Fallback of sequences, each with a condition and an action. Random generation of
+    # valid trees of this size takes too long
+
+    genome = ['f(']
+    for _ in range(num_subtrees):
+        genome += ['s(', random.choice(behavior_tree.CONDITION_NODES), random.choice(behavior_tree.ACTION_NODES), ')']
+    genome += [')']
+    return genome
+
+
+def _use_lists():
+    # Emulates the previous implementation, which looked up nodes in the lists
+
+    for table, nodes in _TABLES.items():
+        setattr(behavior_tree, table, getattr(behavior_tree, nodes))
+
+
+def _time_queries(genomes, repetitions):
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for genome in genomes:
+            btsr = BehaviorTreeStringRepresentation(genome)
+            btsr.is_valid()
+            btsr.depth()
+            btsr.length()
+            btsr.find_children(0)
+            btsr.find_up_node(0)
+            btsr.find_parent(len(genome) - 2)
+            btsr.close()
+            btsr.trim()
+    return time.perf_counter() - start
+
+
+def _genome_to_trim(num_subtrees):
+    # Fallback of sequences, where one of every five sequences has a single child
+
+    genome = ['f(']
+    for i in range(num_subtrees):
+        genome += ['s(']
+        if i % 5 != 0:
+            genome += [random.choice(behavior_tree.CONDITION_NODES)]
+        genome += [random.choice(behavior_tree.ACTION_NODES), ')']
+    genome += [')']
+    return genome
+
+
+def run_structure():
+
+    random.seed(0)
+    _register_nodes(100, 50)
+    for num_subtrees in [25, 250, 2500]:
+        btsr = BehaviorTreeStringRepresentation(_genome_to_trim(num_subtrees))
+        num_nodes = len(btsr.bt)
+
+        start = time.perf_counter()
+        for index in range(len(btsr.bt)):
+            btsr.find_parent(index)
+            btsr.find_children(index)
+            if btsr.bt[index] in behavior_tree.CONTROL_NODES:
+                btsr.find_up_node(index)
+        queries_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        btsr.trim()
+        trim_time = time.perf_counter() - start
+
+        print("Tree of %d nodes - queries on every node: %.4f s, trim: %.4f s"
+              % (num_nodes, queries_time, trim_time))
+
+
+def run_validation(repetitions=20):
+
+    random.seed(0)
+    _register_nodes(100, 50)
+    for num_subtrees in [25, 250, 2500]:
+        btsr = BehaviorTreeStringRepresentation(_genome_to_trim(num_subtrees))
+
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            btsr.is_valid()
+        print("Tree of %d nodes - is_valid: %.6f s" % (len(btsr.bt), (time.perf_counter() - start) / repetitions))
+
+
+def run(num_genomes=200, num_subtrees=15, repetitions=5):
+
+    for num_conditions, num_actions in [(10, 10), (100, 50), (500, 200)]:
+        random.seed(0)
+        _register_nodes(num_conditions, num_actions)
+        genomes = [_random_genome(num_subtrees) for _ in range(num_genomes)]
+        assert all(BehaviorTreeStringRepresentation(genome).is_valid() for genome in genomes)
+
+        compiled_time = _time_queries(genomes, repetitions)
+        _use_lists()
+        list_time = _time_queries(genomes, repetitions)
+
+        print("Register of %d nodes - lists: %.4f s, compiled tables: %.4f s (x%.1f)"
+              % (len(behavior_tree.ALL_NODES), list_time, compiled_time, list_time / compiled_time))
+
+
+if __name__ == "__main__":
+    run()
+    run_structure()
+    run_validation()
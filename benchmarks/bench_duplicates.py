@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import time
+from interface import implements
+
+from behavior_tree_learning.core.gp.operators import GeneticOperators
+from behavior_tree_learning.core.gp.parameters import GeneticParameters
+from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
+
+_NODES = ['s(', 'f(', ')', 'picked 0?', 'pick 0!', 'place at (0.0, 0.05, 0.0)!', '0 at pos (0.0, 0.05, 0.0)?',
+          'picked 1?', 'pick 1!', 'place at (0.0, -0.05, 0.0)!', '1 at pos (0.0, -0.05, 0.0)?']
+
+
+class _Operators(implements(GeneticOperators)):
+
+    def random_genome(self, length):
+        return [random.choice(_NODES) for _ in range(length)]
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        mutated = list(genome)
+        mutated[random.randint(0, len(mutated) - 1)] = random.choice(_NODES)
+        return mutated
+
+    def crossover_genome(self, genome1, genome2, replace):
+        point = random.randint(1, min(len(genome1), len(genome2)) - 1)
+        return genome1[:point] + genome2[point:], genome2[:point] + genome1[point:]
+
+
+class _ListScanGeneticProgramming(GeneticProgramming):
+    # Previous duplicate detection, scanning the concatenated lists
+
+    def _mutation(self, population, parents, parameters):
+
+        mutated_population = []
+        for parent in parents:
+            for _ in range(parameters.n_offspring_mutation):
+                attempts = 0
+                while attempts < 100:
+                    mutated_individual = self._operators.mutate_gene(population[parent],
+                                                                     parameters.mutation_p_add,
+                                                                     parameters.mutation_p_delete)
+                    if (len(mutated_individual) >= parameters.min_length
+                            and mutated_individual not in population + mutated_population):
+                        mutated_population.append(mutated_individual)
+                        break
+                    attempts += 1
+        return mutated_population
+
+    def _crossover(self, population, parents, parameters):
+
+        crossover_offspring = []
+        for _ in range(parameters.n_offspring_crossover):
+            unused_parents = list(parents)
+            attempts = 0
+            while len(unused_parents) >= 2 and attempts < 100:
+                crossover_parents = random.sample(range(len(unused_parents)), 2)
+                offspring1, offspring2 = self._operators.crossover_genome(
+                    population[unused_parents[crossover_parents[0]]],
+                    population[unused_parents[crossover_parents[1]]], True)
+                if (offspring1 not in population + crossover_offspring and
+                        offspring2 not in population + crossover_offspring):
+                    crossover_offspring += [offspring1, offspring2]
+                    unused_parents.pop(crossover_parents[0])
+                    if crossover_parents[0] < crossover_parents[1]:
+                        crossover_parents[1] -= 1
+                    unused_parents.pop(crossover_parents[1])
+                    attempts = 0
+                else:
+                    attempts += 1
+        return crossover_offspring
+
+
+def _time_offspring(gp, population, parameters):
+
+    random.seed(0)
+    parents = list(range(len(population)))
+    start = time.perf_counter()
+    gp._mutation(population, parents, parameters)
+    gp._crossover(population, parents, parameters)
+    return time.perf_counter() - start
+
+
+def run(genome_length=20):
+
+    parameters = GeneticParameters()
+    parameters.min_length = 1
+
+    for population_size in [250, 1000, 2000, 4000]:
+        random.seed(population_size)
+        population = list({tuple(_Operators().random_genome(genome_length)) for _ in range(population_size)})
+        population = [list(individual) for individual in population]
+
+        list_time = _time_offspring(_ListScanGeneticProgramming(_Operators(), ''), population, parameters)
+        set_time = _time_offspring(GeneticProgramming(_Operators(), ''), population, parameters)
+
+        print("Population of %d - list scan: %.4f s, hashed keys: %.4f s (x%.1f)"
+              % (population_size, list_time, set_time, list_time / set_time))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from behavior_tree_learning.core.gp.hash_table import HashTable
+
+
+def _random_genome(length):
+
+    nodes = ['s(', 'f(', 'picked 0?', 'pick 0!', 'place at (0.0, 0.05, 0.0)!', '0 at pos (0.0, 0.05, 0.0)?']
+    return [random.choice(nodes) for _ in range(length)] + [')']
+
+
+def _write_legacy_log(directory_path, entries):
+
+    with open(os.path.join(directory_path, 'hash_log.txt'), 'w') as f:
+        for key, statistics in entries.items():
+            f.write('key: ' + str(list(key)) + ', value: ' + str(statistics.samples)
+                    + ', count: ' + str(statistics.count) + '\n')
+
+
+def _time_load(directory_path):
+
+    hash_table = HashTable(path=directory_path)
+    start = time.perf_counter()
+    hash_table.load()
+    return time.perf_counter() - start, hash_table
+
+
+def run(num_entries=50000, genome_length=20):
+
+    random.seed(0)
+    directory_path = tempfile.mkdtemp()
+
+    hash_table = HashTable(path=directory_path)
+    for _ in range(num_entries):
+        hash_table.insert(_random_genome(genome_length), -random.random())
+
+    start = time.perf_counter()
+    for _ in range(10):
+        hash_table.write()
+    print("Write of 10 checkpoints: %.4f s" % (time.perf_counter() - start))
+
+    entries = dict(hash_table._table)
+    genomes = [list(key) for key in entries]
+    start = time.perf_counter()
+    for genome in genomes:
+        hash_table.find(genome)
+    print("Lookup of %d genomes: %.4f s" % (len(genomes), time.perf_counter() - start))
+
+    binary_time, loaded = _time_load(directory_path)
+    assert loaded == hash_table
+
+    os.remove(os.path.join(directory_path, 'hash_log.pickle'))
+    _write_legacy_log(directory_path, entries)
+    legacy_time, loaded = _time_load(directory_path)
+    assert loaded == hash_table
+
+    print("Load of %d entries - text log: %.4f s, append-only log: %.4f s (x%.1f)"
+          % (len(entries), legacy_time, binary_time, legacy_time / binary_time))
+
+    shutil.rmtree(directory_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import time
+
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, ExecutionBackend, make_behavior_tree
+from tests.fwk.behavior_nodes import get_behaviors
+
+
+def _random_sbt(num_nodes):
+    # Sequence of fallbacks with a condition and an action each, so every tick runs the whole tree
+
+    sbt = ['s(']
+    while len(sbt) < num_nodes - 1:
+        sbt += ['f(', random.choice(['c0', 'c1']), random.choice(['a0', 'a1', 'a2']), ')']
+    sbt += [')']
+    return sbt
+
+
+def _time_backend(sbt, node_factory, backend, repetitions, ticks):
+
+    build_time = 0.0
+    tick_time = 0.0
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        tree = make_behavior_tree(sbt, behaviors=node_factory, backend=backend)
+        build_time += time.perf_counter() - start
+
+        tick_once = tree.root.tick_once if backend == ExecutionBackend.PY_TREES else tree.tick_once
+        start = time.perf_counter()
+        for _ in range(ticks):
+            tick_once()
+        tick_time += time.perf_counter() - start
+
+    return build_time / repetitions, tick_time / (repetitions * ticks)
+
+
+def run(repetitions=50, ticks=30):
+
+    random.seed(0)
+    node_factory = BehaviorNodeFactory(get_behaviors())
+
+    for num_nodes in [10, 100, 1000]:
+        sbt = _random_sbt(num_nodes)
+        py_trees_build, py_trees_tick = _time_backend(sbt, node_factory, ExecutionBackend.PY_TREES,
+                                                      repetitions, ticks)
+        native_build, native_tick = _time_backend(sbt, node_factory, ExecutionBackend.NATIVE, repetitions, ticks)
+
+        print("SBT of %d nodes - build: py_trees %.6f s, native %.6f s (x%.1f) - "
+              "tick: py_trees %.6f s, native %.6f s (x%.1f)"
+              % (len(sbt), py_trees_build, native_build, py_trees_build / native_build,
+                 py_trees_tick, native_tick, py_trees_tick / native_tick))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import time
+
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, StringBehaviorTree
+from tests.fwk.behavior_nodes import get_behaviors
+
+
+def _random_sbt(num_nodes):
+    # Fallback of sequences with a condition and an action each, nested in fallbacks of
+    # ten sequences to get deeper trees
+
+    sbt = ['f(']
+    while len(sbt) < num_nodes - 1:
+        sbt += ['f(']
+        for _ in range(min(10, max(1, (num_nodes - len(sbt)) // 4))):
+            sbt += ['s(', random.choice(['c0', 'c1']), random.choice(['a0', 'a1', 'a2']), ')']
+        sbt += [')']
+    sbt += [')']
+    return sbt
+
+
+def run(repetitions=200):
+
+    random.seed(0)
+    node_factory = BehaviorNodeFactory(get_behaviors())
+
+    for num_nodes in [10, 100, 1000]:
+        sbt = _random_sbt(num_nodes)
+
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            StringBehaviorTree(sbt, behaviors=node_factory)
+        print("SBT of %d nodes - build: %.6f s" % (len(sbt), (time.perf_counter() - start) / repetitions))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import paths
+paths.add_modules_to_path()
+
+import time
+
+from behavior_tree_learning.core.gp_sbt import PrototypeWorldFactory
+from duplo.world import Pos, ApplicationWorldFactory as DuploWorldFactory
+from tiago_pnp.world import ApplicationWorldFactory as TiagoWorldFactory
+
+
+def _time_per_episode(world_factory, repetitions):
+
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        world_factory.make()
+    return (time.perf_counter() - start) / repetitions
+
+
+def run(repetitions=20000):
+
+    start_positions = [Pos(-0.05, -0.1, 0), Pos(0.05, -0.1, 0), Pos(0.05, 0.1, 0), Pos(-0.05, 0.1, 0)]
+    factories = [('duplo', DuploWorldFactory(start_positions, scenario='tower')),
+                 ('tiago', TiagoWorldFactory('scenario_3', deterministic=True))]
+
+    for name, world_factory in factories:
+        make_time = _time_per_episode(world_factory, repetitions)
+        restore_time = _time_per_episode(PrototypeWorldFactory(world_factory), repetitions)
+        print("%s - make: %.2f us, restore: %.2f us" % (name, make_time * 1e6, restore_time * 1e6))
+
+
+if __name__ == "__main__":
+    run()
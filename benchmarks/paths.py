@@ -0,0 +1,18 @@
+import os
+import sys
+
+
+_this_file_path = os.path.abspath(__file__)
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(_this_file_path))
+_BENCHMARKS_DIRECTORY = os.path.dirname(_this_file_path)
+
+
+def add_modules_to_path():
+    sys.path.append(os.path.normpath(os.path.join(_PACKAGE_DIRECTORY, 'src')))
+    sys.path.append(os.path.normpath(os.path.join(_PACKAGE_DIRECTORY, 'src', 'behavior_tree_learning')))
+    sys.path.append(os.path.normpath(os.path.join(_PACKAGE_DIRECTORY, 'examples')))
+
+
+def get_benchmarks_directory():
+    return _BENCHMARKS_DIRECTORY
+
@@ -1,6 +1,9 @@
+import numpy as np
 from interface import implements
-from behavior_tree_learning.sbt import BehaviorTreeExecutor, ExecutionParameters
-from behavior_tree_learning.sbt import StringBehaviorTree, BehaviorNodeFactory
+from behavior_tree_learning.sbt import BehaviorTreeExecutor, ExecutionParameters, ExecutionBackend
+from behavior_tree_learning.sbt import StringBehaviorTree, BehaviorNodeFactory, BehaviorTreeCache, BatchBehaviorTrees
+from behavior_tree_learning.sbt import SubtreeTraceCache
+from behavior_tree_learning.sbt import StaticAnalysis, Outcome
 from behavior_tree_learning.learning import Environment
 from duplo.world import ApplicationWorldFactory
 from duplo.fitness_function import FitnessFunction
@@ -10,11 +13,16 @@ class ApplicationEnvironment(implements(Environment)):
 
     def __init__(self, node_factory: BehaviorNodeFactory, world_factory: ApplicationWorldFactory,
                  target_positions,
-                 static_tree=None, fitness_coefficients=None, verbose=False):
+                 static_tree=None, fitness_coefficients=None, verbose=False, tree_cache_size=0, trace_cache_size=0,
+                 execution_backend=ExecutionBackend.PY_TREES, batch_node_factory: BehaviorNodeFactory = None):
 
         self._node_factory = node_factory
         self._world_factory = world_factory
         self._verbose = verbose
+        self._tree_cache = BehaviorTreeCache(node_factory, tree_cache_size)
+        self._trace_cache = SubtreeTraceCache(trace_cache_size) if trace_cache_size > 0 else None
+        self._execution_parameters = ExecutionParameters(successes_required=1, backend=execution_backend)
+        self._batch_node_factory = batch_node_factory
 
         self._targets = target_positions
         self._static_tree = static_tree
@@ -31,8 +39,9 @@ class ApplicationEnvironment(implements(Environment)):
 
         world = self._world_factory.make()
 
-        tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=world, verbose=verbose)
-        success, ticks = tree.run_bt(parameters=ExecutionParameters(successes_required=1))
+        tree = self._tree_cache.get(sbt, world, verbose, self._execution_parameters.backend,
+                                    trace_cache=self._trace_cache)
+        success, ticks = tree.run_bt(parameters=self._execution_parameters)
 
         fitness = FitnessFunction().compute_cost(world, tree, ticks, self._targets,
                                                  self._fitness_coefficients, verbose=verbose)
@@ -42,6 +51,84 @@ class ApplicationEnvironment(implements(Environment)):
 
         return fitness
 
+    def run_and_compute_bounded(self, individual, cutoff, verbose):
+        """
+        The episode is aborted once the costs of the tree and the ticks already exceed the cutoff
+        """
+
+        sbt = list(individual)
+        world = self._world_factory.make()
+
+        tree = self._tree_cache.get(sbt, world, verbose, self._execution_parameters.backend,
+                                    trace_cache=self._trace_cache)
+        fitness_function = FitnessFunction()
+        _, ticks = tree.run_bt(parameters=self._execution_parameters,
+                               abort=lambda ticks_: fitness_function.compute_bound(tree, ticks_,
+                                                                                   self._fitness_coefficients) < cutoff)
+
+        if tree.aborted:
+            return float(fitness_function.compute_bound(tree, ticks, self._fitness_coefficients)), False
+
+        fitness = fitness_function.compute_cost(world, tree, ticks, self._targets,
+                                                self._fitness_coefficients, verbose=verbose)
+        return fitness, True
+
+    def run_and_compute_batch(self, individuals, verbose):
+        """
+        With a factory of vectorized behaviors, the individuals are run together, each one
+        in its own lane of a vectorized world
+        """
+
+        if self._batch_node_factory is None or self._verbose or verbose:
+            return [self.run_and_compute(individual, verbose) for individual in individuals]
+
+        sbts = [list(individual) for individual in individuals]
+        world = self._world_factory.make_batch(len(sbts))
+
+        trees = BatchBehaviorTrees(sbts, behaviors=self._batch_node_factory, world=world)
+        success, ticks = trees.run_bt(parameters=self._execution_parameters)
+
+        fitness = FitnessFunction().compute_batch_cost(world, trees, ticks, self._targets,
+                                                       self._fitness_coefficients)
+        return fitness.tolist()
+
+    def run_and_compute_batch_bounded(self, individuals, cutoff, verbose):
+
+        if self._batch_node_factory is None or self._verbose or verbose:
+            return [self.run_and_compute_bounded(individual, cutoff, verbose) for individual in individuals]
+
+        sbts = [list(individual) for individual in individuals]
+        world = self._world_factory.make_batch(len(sbts))
+
+        trees = BatchBehaviorTrees(sbts, behaviors=self._batch_node_factory, world=world)
+        fitness_function = FitnessFunction()
+        success, ticks = trees.run_bt(parameters=self._execution_parameters,
+                                      abort=lambda ticks_: fitness_function.compute_bound(
+                                          trees, ticks_, self._fitness_coefficients) < cutoff)
+
+        fitness = fitness_function.compute_batch_cost(world, trees, ticks, self._targets, self._fitness_coefficients)
+        bound = fitness_function.compute_bound(trees, ticks, self._fitness_coefficients)
+        fitness = np.where(trees.aborted, bound, fitness)
+        return list(zip(fitness.tolist(), (~trees.aborted).tolist()))
+
+    def estimate_fitness(self, individual):
+        """
+        Estimate from the structure of the tree, trees that cannot act never return RUNNING
+        so their episodes last until they succeed or fail enough times in a row
+        """
+
+        analysis = StaticAnalysis(list(individual))
+
+        ticks = 0
+        if not analysis.acts():
+            parameters = self._execution_parameters
+            ticks = parameters.successes_required
+            if analysis.outcomes != Outcome.SUCCESS:
+                ticks = min(ticks, parameters.max_straight_fails)
+
+        return FitnessFunction().compute_static_estimate(self._world_factory.make(), analysis, ticks, self._targets,
+                                                         self._fitness_coefficients)
+
     def plot_individual(self, path, plot_name, individual):
         """ Saves a graphical representation of the individual """
 
@@ -50,6 +137,6 @@ class ApplicationEnvironment(implements(Environment)):
         if self._static_tree is not None:
             tree = StringBehaviorTree(self._add_to_static_tree(sbt), behaviors=self._node_factory)
         else:
-            tree = StringBehaviorTree(sbt[:], behaviors=self._node_factory)
+            tree = StringBehaviorTree(sbt, behaviors=self._node_factory)
 
         tree.save_figure(path, name=plot_name)
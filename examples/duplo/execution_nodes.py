@@ -1,6 +1,8 @@
 import re
+import numpy as np
 import py_trees as pt
-from behavior_tree_learning.sbt import BehaviorRegister, BehaviorNode
+from interface import implements
+from behavior_tree_learning.sbt import BehaviorRegister, BehaviorNode, VectorizedBehaviorNode, BatchStatus
 from duplo import world as sm
 
 
@@ -107,6 +109,10 @@ class StateMachineBehavior(BehaviorNode):
         self._verbose = verbose
         super(StateMachineBehavior, self).__init__(name)
 
+    def rebind(self, world):
+        super(StateMachineBehavior, self).rebind(world)
+        self._state = None
+
     def update(self):
         if self._verbose and self._state == pt.common.Status.RUNNING:
             print(self.name, ":", self._state)
@@ -291,6 +297,184 @@ class ApplyForce(StateMachineBehavior):
         return self._state
 
 
+def _success_or_failure(success):
+    return np.where(success, BatchStatus.SUCCESS, BatchStatus.FAILURE)
+
+
+class VectorizedHandEmpty(implements(VectorizedBehaviorNode)):
+    """
+    HandEmpty for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedHandEmpty(world)
+
+    def __init__(self, world):
+        self._world = world
+
+    def update(self, lanes, nodes, memory):
+        return _success_or_failure(self._world.hand_empty(lanes))
+
+
+class VectorizedPicked(implements(VectorizedBehaviorNode)):
+    """
+    Picked for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedPicked(world, re.findall(r'\d+', text))
+
+    def __init__(self, world, brick):
+        self._world = world
+        self._brick = int(brick[0])
+
+    def update(self, lanes, nodes, memory):
+        return _success_or_failure(self._world.get_picked(lanes) == self._brick)
+
+
+class VectorizedAtPos(implements(VectorizedBehaviorNode)):
+    """
+    AtPos for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedAtPos(world, re.findall(r'-?\d+\.\d+|-?\d+', text))
+
+    def __init__(self, world, brick_and_pos):
+        self._world = world
+        self._brick = int(brick_and_pos[0])
+        self._pos = sm.Pos(float(brick_and_pos[1]), float(brick_and_pos[2]), float(brick_and_pos[3]))
+
+    def update(self, lanes, nodes, memory):
+        return _success_or_failure(self._world.distance(lanes, self._brick, self._pos) < self._world.sm_par.pos_margin)
+
+
+class VectorizedOn(implements(VectorizedBehaviorNode)):
+    """
+    On for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedOn(world, re.findall(r'\d+', text))
+
+    def __init__(self, world, bricks):
+        self._world = world
+        self._upper = int(bricks[0])
+        self._lower = int(bricks[1])
+
+    def update(self, lanes, nodes, memory):
+        return _success_or_failure(self._world.on_top(lanes, self._upper, self._lower))
+
+
+class VectorizedStateMachineBehavior:
+    """
+    Class template for state machine behaviors of a VectorizedApplicationWorld, the state of
+    each node is kept in the memory of the batch, 0 being no state
+    """
+
+    def __init__(self, world):
+        self._world = world
+
+    def update(self, lanes, nodes, memory):
+        state = memory[nodes]
+        memory[nodes[state == 0]] = BatchStatus.RUNNING
+
+        acting = state == BatchStatus.RUNNING
+        if acting.any():
+            memory[nodes[acting]] = _success_or_failure(self.act(lanes[acting]))
+            self._world.random_event(lanes[acting])
+        return memory[nodes]
+
+    def act(self, lanes):
+        """
+        Does the action in the lanes, returns where it succeeded
+        """
+        raise NotImplementedError
+
+
+class VectorizedPick(VectorizedStateMachineBehavior, implements(VectorizedBehaviorNode)):
+    """
+    Pick for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedPick(world, re.findall(r'\d+', text))
+
+    def __init__(self, world, brick):
+        self._brick = int(brick[0])
+        super(VectorizedPick, self).__init__(world)
+
+    def initialise(self, lanes, nodes, memory):
+        picked = self._world.get_picked(lanes)
+        memory[nodes] = np.where(picked == self._brick, BatchStatus.SUCCESS,
+                                 np.where(picked >= 0, BatchStatus.FAILURE, 0))
+
+    def act(self, lanes):
+        return self._world.pick(lanes, self._brick)
+
+
+class VectorizedPlace(VectorizedStateMachineBehavior, implements(VectorizedBehaviorNode)):
+    """
+    Place for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        if 'place at' in text:
+            return VectorizedPlace(world, position=re.findall(r'-?\d+\.\d+|-?\d+', text))
+        elif 'place on' in text:
+            return VectorizedPlace(world, brick=re.findall(r'\d+', text))
+        else:
+            raise ValueError('Unknown [%s] node' % text)
+
+    def __init__(self, world, brick=None, position=None):
+        if brick is not None:
+            self._brick = int(brick[0])
+            self._position = None
+        elif position is not None:
+            self._position = sm.Pos(float(position[0]), float(position[1]), float(position[2]))
+            self._brick = None
+        super(VectorizedPlace, self).__init__(world)
+
+    def initialise(self, lanes, nodes, memory):
+        memory[nodes] = np.where(self._world.get_picked(lanes) < 0, BatchStatus.FAILURE, 0)
+
+    def act(self, lanes):
+        if self._brick is not None:
+            return self._world.place(lanes, brick=self._brick)
+        return self._world.place(lanes, position=self._position)
+
+
+class VectorizedApplyForce(VectorizedStateMachineBehavior, implements(VectorizedBehaviorNode)):
+    """
+    ApplyForce for a VectorizedApplicationWorld
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedApplyForce(world, re.findall(r'\d+', text))
+
+    def __init__(self, world, brick):
+        self._brick = int(brick[0])
+        super(VectorizedApplyForce, self).__init__(world)
+
+    def initialise(self, lanes, nodes, memory):
+        memory[nodes] = np.where(self._world.get_picked(lanes) >= 0, BatchStatus.FAILURE, 0)
+
+    def act(self, lanes):
+        return self._world.apply_force(lanes, self._brick)
+
+
+_VECTORIZED_BEHAVIORS = {HandEmpty: VectorizedHandEmpty, Picked: VectorizedPicked, AtPos: VectorizedAtPos,
+                         On: VectorizedOn, Pick: VectorizedPick, Place: VectorizedPlace,
+                         ApplyForce: VectorizedApplyForce}
+
+
 def _make_tower_nodes():
 
     behavior_register = BehaviorRegister()
@@ -370,3 +554,18 @@ def get_behaviors(name):
         return _make_croissant_nodes()
     else:
         raise ValueError('Unknown %s name', name)
+
+
+def get_vectorized_behaviors(name):
+    """
+    Same behaviors as get_behaviors(), to run in a VectorizedApplicationWorld
+    """
+
+    behavior_register = BehaviorRegister()
+    for key, (type_, behavior_class) in get_behaviors(name).behaviors().items():
+        if type_ == BehaviorRegister.BehaviorType.CONDITION:
+            behavior_register.add_condition(key, _VECTORIZED_BEHAVIORS[behavior_class])
+        else:
+            behavior_register.add_action(key, _VECTORIZED_BEHAVIORS[behavior_class])
+
+    return behavior_register
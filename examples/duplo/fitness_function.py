@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from duplo.world import ApplicationWorld
+import numpy as np
+from behavior_tree_learning.sbt import StaticAnalysis, Outcome
+from duplo.world import ApplicationWorld, VectorizedApplicationWorld
 
 
 @dataclass
@@ -53,3 +55,67 @@ class FitnessFunction:
 
         fitness = -cost
         return fitness
+
+    def compute_bound(self, behavior_tree, ticks, coefficients=None):
+        """
+        Upper bound of the fitness of an episode that has run for the given ticks,
+        from the costs that can only grow as the episode goes on
+        """
+
+        if coefficients is None:
+            coefficients = Coefficients()
+
+        cost = (coefficients.length * np.asarray(behavior_tree.length) +
+                coefficients.depth * np.asarray(behavior_tree.depth) +
+                coefficients.ticks * ticks)
+        return -cost
+
+    def compute_static_estimate(self, world: ApplicationWorld, analysis: StaticAnalysis, ticks, targets,
+                                coefficients=None):
+        """
+        Estimate of the fitness of a tree from its static analysis, where ticks is the least
+        number of ticks of its episodes. A tree that cannot act leaves the world as it starts,
+        so only whether it fails is unknown, unless it always succeeds.
+        Returns the fitness and whether it is exact.
+        """
+
+        if coefficients is None:
+            coefficients = Coefficients()
+
+        fitness = float(self.compute_bound(analysis, ticks, coefficients))
+        if analysis.acts():
+            return fitness, False
+
+        for i in range(len(targets)):
+            fitness -= coefficients.task_completion * max(0, world.distance(i, targets[i]) - coefficients.pos_acc)
+        if world.get_picked() is not None:
+            fitness -= coefficients.hand_not_empty
+
+        return fitness, analysis.outcomes == Outcome.SUCCESS
+
+    def compute_batch_cost(self, world: VectorizedApplicationWorld, behavior_trees, ticks, targets,
+                           coefficients=None):
+        """
+        Same as compute_cost for every lane of the world, returns an array with the fitness of each one
+        """
+
+        if coefficients is None:
+            coefficients = Coefficients()
+
+        depth = np.array(behavior_trees.depth)
+        length = np.array(behavior_trees.length)
+        lanes = np.arange(world.size())
+
+        cost = (coefficients.length * length + coefficients.depth * depth +
+                coefficients.ticks * ticks)
+
+        for i in range(len(targets)):
+            cost += coefficients.task_completion * np.maximum(0, world.distance(lanes, i, targets[i]) -
+                                                              coefficients.pos_acc)
+
+        cost += np.where(behavior_trees.failed, coefficients.failed, 0.0)
+        cost += np.where(behavior_trees.timeout, coefficients.timeout, 0.0)
+        cost += np.where(world.get_picked(lanes) >= 0, coefficients.hand_not_empty, 0.0)
+
+        fitness = -cost
+        return fitness
@@ -9,6 +9,7 @@ import logging
 from behavior_tree_learning.sbt import BehaviorNodeFactory
 from behavior_tree_learning.learning import BehaviorTreeLearner, GeneticParameters, GeneticSelectionMethods
 from behavior_tree_learning.learning import TraceConfiguration
+from behavior_tree_learning.learning import SqliteFitnessStore, scenario_fingerprint
 
 from duplo.execution_nodes import get_behaviors
 from duplo.world import Pos as WorldPos
@@ -101,6 +102,10 @@ def run():
     scenarios = _prepare_scenarios()
     for scenario_name, start_position, target_position in scenarios:
 
+        # Trials of a deterministic scenario do not simulate again the genomes of other trials
+        fitness_store = SqliteFitnessStore(os.path.join(paths.get_outputs_directory(), 'fitness.sqlite'),
+                                           scenario_fingerprint(scenario_name, start_position, target_position))
+
         num_trials = 10
         trials = []
         for tdx in range(1, num_trials+1):
@@ -123,10 +128,12 @@ def run():
             success = bt_learner.run(parameters, seed,
                                      outputs_dir_path=paths.get_outputs_directory(),
                                      trace_conf=tracer,
-                                     verbose=False)
+                                     verbose=False,
+                                     fitness_store=fitness_store)
 
             print("Trial: %d, Succeed: %s" % (tdx, success))
 
+        fitness_store.close()
         _plot_summary(paths.get_outputs_directory(), scenario_name, trials)
 
 
@@ -3,8 +3,9 @@ from math import sqrt
 from enum import IntEnum
 from dataclasses import dataclass
 from copy import copy
+import numpy as np
 from interface import implements
-from behavior_tree_learning.sbt import World
+from behavior_tree_learning.sbt import World, VectorizedWorld
 
 
 @dataclass
@@ -99,6 +100,23 @@ class ApplicationWorld(implements(World)):
     def shutdown(self):
         pass
 
+    def state_digest(self):
+        """
+        Worlds with random events give no digest, ticks do not depend on the state alone
+        """
+
+        if self.sm_par.random_events:
+            return None
+        return self.snapshot()
+
+    def snapshot(self):
+        return tuple((brick.x, brick.y, brick.z) for brick in self.state.bricks), self.state.picked
+
+    def restore(self, snapshot):
+
+        bricks, self.state.picked = snapshot
+        self.state.bricks = [Pos(*brick) for brick in bricks]
+
     def random_event(self):
         """
         Has a probability of creating a random event,
@@ -206,6 +224,124 @@ class ApplicationWorld(implements(World)):
         return False
 
 
+class VectorizedApplicationWorld(implements(VectorizedWorld)):
+    """
+    State Machine Simulator for several lanes at once, positions of the bricks are kept in
+    an array of shape (lanes, bricks, 3) and the picked brick of each lane is -1 for none.
+    Random events use the random generator of numpy.
+    """
+
+    def __init__(self, start_positions, size, random_events=False, parameters=None, scenario: str = ""):
+
+        if parameters is None:
+            self.sm_par = SMParameters()
+        else:
+            self.sm_par = parameters
+
+        self.sm_par.random_events = random_events
+
+        if scenario == "tower":
+            self.mode = SMMode.DEFAULT
+        elif scenario == "croissant":
+            self.mode = SMMode.CROISSANT
+        else:
+            raise ValueError("Unknown [%s] scenario" % scenario)
+
+        start = np.array([[pos.x, pos.y, pos.z] for pos in start_positions], dtype=float)
+        self.bricks = np.tile(start, (size, 1, 1))
+        self.picked = np.full(size, -1, dtype=np.intp)
+
+    def size(self):
+        return len(self.picked)
+
+    def startup(self, verbose):
+        return np.ones(len(self.picked), dtype=bool)
+
+    def is_alive(self):
+        return np.ones(len(self.picked), dtype=bool)
+
+    def shutdown(self):
+        pass
+
+    def random_event(self, lanes):
+        """ Same as ApplicationWorld.random_event in each of the lanes """
+
+        if self.sm_par.random_events:
+            dropping = lanes[(np.random.random(len(lanes)) < 0.5) & (self.picked[lanes] >= 0)]
+            picked = self.picked[dropping]
+            self.bricks[dropping, picked, 0] += np.random.normal(0, 0.05, len(dropping))
+            self.bricks[dropping, picked, 1] += np.random.normal(0, 0.05, len(dropping))
+            self.bricks[dropping, picked, 2] = 0
+            self.picked[dropping] = -1
+
+    def hand_empty(self, lanes):
+        return self.picked[lanes] < 0
+
+    def pick(self, lanes, brick):
+        """ Picks given brick in the lanes with an empty hand, returns where it was picked """
+
+        success = self.picked[lanes] < 0
+        picking = lanes[success]
+        self.picked[picking] = brick
+        self.bricks[picking, brick, 2] += self.sm_par.pick_height
+        return success
+
+    def place(self, lanes, position=None, brick=None):
+        """ Place current picked object on given position or given brick, returns where it was placed """
+
+        if position is None and brick is None:
+            return np.zeros(len(lanes), dtype=bool)
+        success = self.picked[lanes] >= 0
+
+        if self.mode == SMMode.CROISSANT:
+            success &= ~(((self.picked[lanes] == 2) | (self.picked[lanes] == 3))
+                         & (np.abs(self.bricks[lanes, 1, 1]) < 0.01))
+
+        placing = lanes[success]
+        if position is not None:
+            new_brick_position = np.array([position.x, position.y, position.z])
+        else:
+            new_brick_position = self.bricks[placing, brick].copy()
+            new_brick_position[:, 2] += self.sm_par.brick_height + self.sm_par.not_pressed_dist
+
+        self.bricks[placing, self.picked[placing]] = new_brick_position
+        self.picked[placing] = -1
+        return success
+
+    def apply_force(self, lanes, brick):
+        """ Applies force on brick in the lanes with an empty hand, returns where it was applied """
+
+        success = self.picked[lanes] < 0
+        pending = lanes[success]
+        for lower_brick in range(self.bricks.shape[1]):
+            if lower_brick != brick:
+                on_top = self.on_top(pending, brick, lower_brick)
+                moving = pending[on_top]
+                self.bricks[moving, brick, 2] = self.bricks[moving, lower_brick, 2] + self.sm_par.brick_height
+                pending = pending[~on_top]
+        return success
+
+    def get_picked(self, lanes):
+        return self.picked[lanes]
+
+    def distance(self, lanes, brick, position):
+        """ Returns distance between given brick and given position """
+
+        return np.sqrt((self.bricks[lanes, brick, 0] - position.x)**2 +
+                       (self.bricks[lanes, brick, 1] - position.y)**2 +
+                       (self.bricks[lanes, brick, 2] - position.z)**2)
+
+    def on_top(self, lanes, upper_brick, lower_brick):
+        """ Checks if upper brick is on top of lower brick with margins """
+
+        upper = self.bricks[lanes, upper_brick]
+        lower = self.bricks[lanes, lower_brick]
+        height = upper[:, 2] - lower[:, 2]
+        return ((np.abs(upper[:, 0] - lower[:, 0]) < self.sm_par.ontop_margin)
+                & (np.abs(upper[:, 1] - lower[:, 1]) < self.sm_par.ontop_margin)
+                & (0 < height) & (height <= self.sm_par.brick_height + self.sm_par.ontop_margin))
+
+
 class ApplicationWorldFactory:
 
     def __init__(self, start_position, random_events=False, parameters=None, scenario: str = ""):
@@ -216,3 +352,7 @@ class ApplicationWorldFactory:
 
     def make(self):
         return ApplicationWorld(self._start_position, self._random_events, self._parameters, self._scenario)
+
+    def make_batch(self, size):
+        return VectorizedApplicationWorld(self._start_position, size, self._random_events, self._parameters,
+                                          self._scenario)
@@ -1,5 +1,6 @@
 from interface import implements
-from behavior_tree_learning.sbt import StringBehaviorTree, BehaviorNodeFactory
+from behavior_tree_learning.sbt import StringBehaviorTree, BehaviorNodeFactory, BehaviorTreeCache
+from behavior_tree_learning.sbt import ExecutionParameters, ExecutionBackend
 from behavior_tree_learning.learning import Environment
 from tiago_pnp.world import ApplicationWorldFactory
 from tiago_pnp.fitness_function import FitnessFunction
@@ -11,7 +12,8 @@ class ApplicationEnvironment(implements(Environment)):
     """
 
     def __init__(self, node_factory: BehaviorNodeFactory, world_factory: ApplicationWorldFactory,
-                 scenario: str, verbose=False):
+                 scenario: str, verbose=False, tree_cache_size=0,
+                 execution_backend=ExecutionBackend.PY_TREES):
 
         if scenario != 'scenario_1' and scenario != 'scenario_3':
             raise ValueError('Unknown selected scenario')
@@ -20,6 +22,8 @@ class ApplicationEnvironment(implements(Environment)):
         self._world_factory = world_factory
         self._node_factory = node_factory
         self._verbose = verbose
+        self._tree_cache = BehaviorTreeCache(node_factory, tree_cache_size)
+        self._execution_parameters = ExecutionParameters(backend=execution_backend)
 
     def run_and_compute(self, individual, verbose):
         """
@@ -41,9 +45,8 @@ class ApplicationEnvironment(implements(Environment)):
 
             for i in range(3):
                 world = self._world_factory.make()
-                behavior_tree = StringBehaviorTree(sbt[:], behaviors=self._node_factory, world=world,
-                                                   verbose=verbose)
-                _, ticks = behavior_tree.run_bt()
+                behavior_tree = self._tree_cache.get(sbt, world, verbose, self._execution_parameters.backend)
+                _, ticks = behavior_tree.run_bt(self._execution_parameters)
 
                 cost, output = FitnessFunction().compute_cost(world, behavior_tree, ticks, verbose)
 
@@ -58,9 +61,8 @@ class ApplicationEnvironment(implements(Environment)):
         elif self._scenario == 'scenario_1' or self._scenario == 'scenario_3':
 
             world = self._world_factory.make()
-            behavior_tree = StringBehaviorTree(sbt[:], behaviors=self._node_factory, world=world,
-                                               verbose=verbose)
-            _, ticks = behavior_tree.run_bt()
+            behavior_tree = self._tree_cache.get(sbt, world, verbose, self._execution_parameters.backend)
+            _, ticks = behavior_tree.run_bt(self._execution_parameters)
 
             cost, completed = FitnessFunction().compute_cost(world, behavior_tree, ticks, verbose)
             fitness = -cost
@@ -74,5 +76,5 @@ class ApplicationEnvironment(implements(Environment)):
         """ Saves a graphical representation of the individual """
 
         sbt = list(individual)
-        tree = StringBehaviorTree(sbt[:], behaviors=self._node_factory)
+        tree = StringBehaviorTree(sbt, behaviors=self._node_factory)
         tree.save_figure(path, name=plot_name)
@@ -61,6 +61,10 @@ class Localise(BehaviorNode):
         self._state = None
         super(Localise, self).__init__(name)
 
+    def rebind(self, world):
+        super(Localise, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if not self._world.current[sm.State.LOCALISED]:
             self._state = None
@@ -99,6 +103,10 @@ class MoveArm(BehaviorNode):
 
         super(MoveArm, self).__init__(name)
 
+    def rebind(self, world):
+        super(MoveArm, self).rebind(world)
+        self._state = None
+
     def initialise(self):
 
         if self._world.current[sm.State.ARM] != self._configuration:
@@ -202,6 +210,10 @@ class PickUp(BehaviorNode):
         self._state = None
         super(PickUp, self).__init__(name)
 
+    def rebind(self, world):
+        super(PickUp, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if self._world.feedback[sm.State.ARM] != "Pick" and not self._world.current[sm.State.HAS_CUBE]:
             self._state = None
@@ -274,6 +286,10 @@ class Place(BehaviorNode):
         self._state = None
         super(Place, self).__init__(name)
 
+    def rebind(self, world):
+        super(Place, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if self._world.current[sm.State.HAS_CUBE]:
             self._state = None
@@ -353,6 +369,10 @@ class MoveToPose(BehaviorNode):
 
         super(MoveToPose, self).__init__(name)
 
+    def rebind(self, world):
+        super(MoveToPose, self).rebind(world)
+        self._state = None
+
     def initialise(self):
 
         if self._pose == "pick_table_0":
@@ -426,6 +446,10 @@ class MoveToPoseSafely(BehaviorNode):
 
         super(MoveToPoseSafely, self).__init__("Safely to {}!".format(self._pose))
 
+    def rebind(self, world):
+        super(MoveToPoseSafely, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if self._pose == "pick_table0":
             self._sm_pose = self._world.poses.pick_table0
@@ -466,6 +490,10 @@ class MoveHeadUp(BehaviorNode):
         self._state = None
         super(MoveHeadUp, self).__init__(name)
 
+    def rebind(self, world):
+        super(MoveHeadUp, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if not self._world.manipulating and self._world.current[sm.State.HEAD] != 'Up':
             self._state = None
@@ -499,6 +527,10 @@ class MoveHeadDown(BehaviorNode):
         self._state = None
         super(MoveHeadDown, self).__init__(name)
 
+    def rebind(self, world):
+        super(MoveHeadDown, self).rebind(world)
+        self._state = None
+
     def initialise(self):
         if not self._world.moving and self._world.current[sm.State.HEAD] != 'Down':
             self._state = None
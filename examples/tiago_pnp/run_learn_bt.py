@@ -8,7 +8,7 @@ import logging
 
 from behavior_tree_learning.sbt import BehaviorNodeFactory
 from behavior_tree_learning.learning import BehaviorTreeLearner, GeneticParameters, GeneticSelectionMethods
-from behavior_tree_learning.learning import TraceConfiguration
+from behavior_tree_learning.learning import TraceConfiguration, PrototypeWorldFactory
 
 from tiago_pnp.execution_nodes import get_behaviors
 from tiago_pnp.world import ApplicationWorld, ApplicationWorldFactory
@@ -69,7 +69,7 @@ def run():
         seed = tdx*100
 
         node_factory = BehaviorNodeFactory(get_behaviors(scenario))
-        world_factory = ApplicationWorldFactory(scenario, deterministic=True)
+        world_factory = PrototypeWorldFactory(ApplicationWorldFactory(scenario, deterministic=True))
         environment = ApplicationEnvironment(node_factory, world_factory, scenario, verbose=False)
 
         bt_learner = BehaviorTreeLearner.from_environment(environment)
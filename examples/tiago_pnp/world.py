@@ -100,6 +100,16 @@ def distance(pose1, pose2):
     return math.sqrt(argument)
 
 
+def _frozen(values):
+    # Nested lists as nested tuples, and back
+
+    return tuple(_frozen(value) if type(value) is list else value for value in values)
+
+
+def _thawed(values):
+    return [_thawed(value) if type(value) is tuple else value for value in values]
+
+
 class ApplicationWorld(implements(World)):
     """
     Class for handling the State Machine Simulator
@@ -196,6 +206,31 @@ class ApplicationWorld(implements(World)):
     def is_alive(self):
         return True
 
+    def state_digest(self):
+        """
+        No digest, even for deterministic simulations, as every update of the feedback draws
+        localisation and cube noise, which replayed ticks would not draw again
+        """
+        return None
+
+    def snapshot(self):
+
+        # Feedback of the cubes may be the very lists of their spawn poses, moving them too
+        cubes_spawn_pose = self.poses.cubes_spawn_pose
+        shared = tuple(cube is spawn_pose for cube, spawn_pose in zip(self.feedback[Feedback.CUBE], cubes_spawn_pose))
+        return _frozen(self.current), _frozen(self.feedback), _frozen(cubes_spawn_pose), shared, \
+            self.manipulating, self.moving
+
+    def restore(self, snapshot):
+
+        current, feedback, cubes_spawn_pose, shared, self.manipulating, self.moving = snapshot
+        self.current = _thawed(current)
+        self.feedback = _thawed(feedback)
+        self.poses.cubes_spawn_pose = _thawed(cubes_spawn_pose)
+        for i, shared_pose in enumerate(shared):
+            if shared_pose:
+                self.feedback[Feedback.CUBE][i] = self.poses.cubes_spawn_pose[i]
+
     ##############################################
     #             UPDATE ENVIRONMENT             #
     ##############################################
@@ -3,4 +3,10 @@ from behavior_tree_learning.core.gp.environment import GeneticEnvironment, make_
 from behavior_tree_learning.core.gp.operators import GeneticOperators
 from behavior_tree_learning.core.gp.parameters import GeneticParameters, TraceConfiguration
 from behavior_tree_learning.core.gp.selection import SelectionMethods as GeneticSelectionMethods
+from behavior_tree_learning.core.gp.evaluation import EvaluationMethods as GeneticEvaluationMethods
+from behavior_tree_learning.core.gp.distributed import DistributedEvaluator, run_evaluation_worker
 from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.fitness_store import FitnessStore, SharedFitnessStore, SqliteFitnessStore, \
+    scenario_fingerprint
+from behavior_tree_learning.core.gp.migration import Migration, MigrationTopology
+from behavior_tree_learning.core.gp.islands import IslandModel
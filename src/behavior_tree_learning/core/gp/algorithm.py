@@ -1,5 +1,7 @@
 import logging
+import math
 import random
+import warnings
 from statistics import mean
 import numpy as np
 
@@ -7,6 +9,9 @@ from behavior_tree_learning.core.logger import logplot
 from behavior_tree_learning.core.gp.hash_table import HashTable
 from behavior_tree_learning.core.gp.parameters import GeneticParameters, TraceConfiguration
 from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.evaluation import make_evaluator
+from behavior_tree_learning.core.gp.fitness_store import FitnessStore
+from behavior_tree_learning.core.gp.migration import Migration
 from behavior_tree_learning.core.gp.selection import SelectionMethods, selection
 from behavior_tree_learning.core.gp.operators import GeneticOperators
 
@@ -19,15 +24,84 @@ class GeneticProgramming:
         self._output_directory = output_directory_path
 
         self._verbose = False
+        self._canonical_cache = False
+        self._screening_steps = None
+        self._screened_keys = set()
+        self._num_scored = 0
+        self._num_dominated = 0
+        self._num_racing = 1
+        self._rerun_confidence = 2.0
+        self._num_reruns_saved = 0
+        self._reruns_saved = []
+        self._bounded_cache = False
+        self._population_keys = frozenset()
+        self._num_cache_lookups = 0
+        self._num_cache_hits = 0
+        self._num_evictions = 0
+        self._fitness_store = None
+        self._migration = None
         self._logger = logging.getLogger("gp")
 
     def run(self, steps: AlgorithmSteps, parameters: GeneticParameters,
-            seed=None, hot_start=False, base_line=None, trace_conf=TraceConfiguration(), verbose=False):
+            seed=None, hot_start=False, base_line=None, trace_conf=TraceConfiguration(), verbose=False,
+            fitness_store: FitnessStore = None, migration: Migration = None):
+        """
+        A fitness store shares exact fitness values with other runs, individuals found in it
+        are not simulated. A migration exchanges individuals with other runs every generation.
+        """
+
+        if parameters.hash_table_size is not None:
+            warnings.warn("hash_table_size is deprecated and ignored, cache_capacity bounds the fitness cache",
+                          DeprecationWarning, stacklevel=2)
+        if parameters.steady_state:
+            self._check_steady_state(parameters, base_line)
 
         self._initialize_random_generator(seed)
         self._verbose = verbose
+        self._canonical_cache = parameters.canonical_cache
+        self._screening_steps = steps if parameters.static_screening else None
+        self._screened_keys = set()
+        self._num_scored = 0
+        self._num_dominated = 0
+        self._num_racing = max(1, int(round(parameters.f_elites * parameters.n_population)))
+        self._rerun_confidence = parameters.rerun_confidence
+        self._num_reruns_saved = 0
+        self._reruns_saved = []
+        self._bounded_cache = parameters.cache_capacity is not None
+        self._population_keys = frozenset()
+        self._num_cache_lookups = 0
+        self._num_cache_hits = 0
+        self._num_evictions = 0
+        self._fitness_store = fitness_store
+        self._migration = migration
         return self._run(steps, parameters, hot_start, base_line, trace_conf)
 
+    def simulations_avoided(self):
+        """
+        Number of individuals never simulated thanks to the fitness estimates of the steps,
+        as those scored exactly and those known to be worse than the cutoff
+        """
+        return self._num_scored, self._num_dominated
+
+    def reruns_saved(self):
+        """
+        Number of episodes saved by racing reruns in each generation, compared to rerunning always
+        """
+        return list(self._reruns_saved)
+
+    @staticmethod
+    def _check_steady_state(parameters, base_line):
+        """
+        Parameters steady-state generations cannot honor
+        """
+
+        if parameters.rerun_fitness != 0:
+            raise ValueError("Steady-state generations do not rerun individuals, rerun_fitness must be 0")
+        if parameters.early_termination:
+            raise ValueError("Steady-state generations do not stop episodes early, early_termination must be off")
+        if parameters.boost_baseline and base_line is not None:
+            raise ValueError("Steady-state generations do not boost the baseline, boost_baseline must be off")
+
     @staticmethod
     def _initialize_random_generator(seed):
 
@@ -41,7 +115,19 @@ class GeneticProgramming:
         steps.execution_started()
 
         logplot.configure_log(self._output_directory)
-        hash_table = HashTable(parameters.hash_table_size, logplot.get_log_folder(parameters.log_name))
+        hash_table = HashTable(path=logplot.get_log_folder(parameters.log_name), max_samples=parameters.fitness_samples,
+                               capacity=parameters.cache_capacity, eviction=parameters.cache_eviction)
+        evaluator = make_evaluator(steps, parameters)
+
+        try:
+            result = self._run_generations(steps, parameters, hot_start, base_line, trace_conf, hash_table, evaluator)
+        finally:
+            evaluator.shutdown()
+
+        self._logger.debug('[run] END')
+        return result
+
+    def _run_generations(self, steps, parameters, hot_start, base_line, trace_conf, hash_table, evaluator):
 
         # Original population
         # --------------------------------------------------
@@ -65,14 +151,14 @@ class GeneticProgramming:
 
         steps.current_population(population)
 
-        fitness = []
-        for individual in population:
-            fitness.append(self._calculate_fitness(individual, hash_table, steps, rerun=0))
+        self._protect_population(hash_table, population)
+
+        fitness = self._calculate_fitness(population, hash_table, evaluator, rerun=0)
 
         if not hot_start:
             best_fitness.append(max(fitness))
             logplot.log_fitness(parameters.log_name, fitness)
-            logplot.log_population(parameters.log_name, population)
+            logplot.log_population(parameters.log_name, self._decoded_population(population))
 
         self._print_message("=== Generation: %d ===" % last_generation)
         self._print_population("Population", population, fitness)
@@ -85,6 +171,11 @@ class GeneticProgramming:
         # --------------------------------------------------
 
         generation = last_generation + 1
+        if parameters.steady_state and generation < parameters.n_generations and not fitness_achieved:
+            population, fitness, generation, fitness_achieved = self._run_steady_state(
+                steps, parameters, population, fitness, best_fitness, num_episodes, base_line, generation,
+                hash_table, evaluator)
+
         while generation < parameters.n_generations and not fitness_achieved:
 
             steps.execute_generation(generation)
@@ -95,6 +186,8 @@ class GeneticProgramming:
 
             steps.current_population(population)
 
+            self._protect_population(hash_table, population)
+
             if parameters.keep_baseline:
                 if base_line is not None and base_line not in population:
                     # Make sure we are always able to source from baseline
@@ -102,12 +195,13 @@ class GeneticProgramming:
 
             if generation > 1:
 
-                fitness = []
+                fitness = self._calculate_fitness(population, hash_table, evaluator, parameters.rerun_fitness)
                 for index, individual in enumerate(population):
-                    fitness.append(self._calculate_fitness(individual, hash_table, steps, parameters.rerun_fitness))
                     if base_line is not None and individual == base_line:
                         baseline_index = index
 
+            cutoff = self._survivor_cutoff(population, fitness, parameters)
+
             if parameters.keep_baseline and parameters.boost_baseline and base_line is not None:
                 baseline_fitness = fitness[baseline_index]
                 fitness[baseline_index] = max(fitness)
@@ -118,9 +212,8 @@ class GeneticProgramming:
             self._print_offspring("Crossover", crossover_parents, crossover_offspring)
             steps.crossover_population(crossover_offspring)
 
-            for offspring in crossover_offspring:
-                fitness.append(self._calculate_fitness(offspring, hash_table, steps,
-                                                       parameters.rerun_fitness))
+            fitness += self._calculate_fitness(crossover_offspring, hash_table, evaluator, parameters.rerun_fitness,
+                                               cutoff, rivals=population)
 
             if parameters.boost_baseline and parameters.boost_baseline_only_co and base_line is not None:
                 # Restore original fitness for survivor selection
@@ -134,9 +227,8 @@ class GeneticProgramming:
             self._print_offspring("Mutation", mutation_parents, mutated_offspring)
             steps.mutated_population(mutated_offspring)
 
-            for offspring in mutated_offspring:
-                fitness.append(self._calculate_fitness(offspring, hash_table, steps,
-                                                       parameters.rerun_fitness))
+            fitness += self._calculate_fitness(mutated_offspring, hash_table, evaluator, parameters.rerun_fitness,
+                                               cutoff, rivals=population + crossover_offspring)
 
             if parameters.boost_baseline and base_line is not None:
                 # Restore original fitness for survivor selection
@@ -146,20 +238,10 @@ class GeneticProgramming:
                                                            crossover_offspring, mutated_offspring, parameters)
             steps.survided_population(mutated_offspring)
 
-            best_fitness.append(max(fitness))
-            num_episodes.append(hash_table.num_values())
-
-            self._print_population("Survivors", population, fitness)
-            self._print_message("Best fitness: %f" % best_fitness[-1])
-            self._print_message("Num episodes: %s" % num_episodes[-1])
-            self._print_best_individual(population, fitness)
+            if self._migration is not None:
+                population, fitness = self._migration.migrate(generation, population, fitness)
 
-            logplot.log_fitness(parameters.log_name, fitness)
-            logplot.log_population(parameters.log_name, population)
-
-            if (generation + 1) % 25 == 0 and generation < parameters.n_generations - 1:
-                # Save state every 25 generations but not the last one as it is saved later
-                self._save_state(parameters, population, None, best_fitness, num_episodes, base_line, generation,
+            self._log_generation(parameters, population, fitness, best_fitness, num_episodes, base_line, generation,
                                  hash_table)
 
             generation += 1
@@ -176,15 +258,240 @@ class GeneticProgramming:
 
         self._print_population("Final population", population, fitness)
         self._print_best_individual(population, fitness)
-        self._print_verbose_message("Best individual: %s" % best_individual)
+        self._print_verbose_message("Best individual: %s" % self._operators.decoded_genome(best_individual))
 
         self._plot_results(trace_conf, parameters, steps, population, num_episodes, best_fitness, best_individual)
 
         steps.execution_completed()
 
-        self._logger.debug('[run] END')
         return population, fitness, best_fitness, best_individual
 
+    def _run_steady_state(self, steps, parameters, population, fitness, best_fitness, num_episodes, base_line,
+                          generation, hash_table, evaluator):
+        """
+        Steady-state generations: offspring are bred one crossover or mutation at a time, and each
+        one takes the place of the worst individual, when better and not in the population yet, as
+        soon as its fitness is known. As many evaluations as workers are kept in flight, so a slow
+        episode holds back no other. Every n_population offspring count as a generation.
+
+        A baseline kept is never replaced. Individuals are not rerun, episodes are not stopped
+        early and the baseline is not boosted, run() rejects parameters asking for any of these.
+        Steps are given the offspring of each crossover and mutation once bred, and the offspring
+        that joined the population once a generation is over.
+        """
+
+        in_flight = {}
+        num_in_flight = max(1, parameters.n_workers)
+        num_offspring = 0
+        survivors = []
+        fitness_achieved = False
+
+        if parameters.keep_baseline and base_line is not None and base_line not in population:
+            population.append(base_line)
+            fitness += self._calculate_fitness([base_line], hash_table, evaluator)
+
+        steps.execute_generation(generation)
+        self._print_message("=== Generation: %d/%d ===" % (generation, parameters.n_generations))
+        steps.current_population(population)
+        self._protect_population(hash_table, population)
+
+        while generation < parameters.n_generations and not fitness_achieved:
+
+            # Offspring of known fitness complete at once, and are inserted before breeding again
+            completed = []
+            while len(in_flight) < num_in_flight and len(completed) == 0:
+                offspring, crossover = self._breed(population, fitness, parameters)
+                if len(offspring) == 0:
+                    break
+                if crossover:
+                    steps.crossover_population(offspring)
+                else:
+                    steps.mutated_population(offspring)
+                in_flight_keys = {tuple(key) for _, key in in_flight.values()}
+                for child in offspring:
+                    key = self._cache_key(child)
+                    child_fitness = self._known_fitness(child, key, hash_table)
+                    if child_fitness is not None:
+                        completed.append((child, child_fitness))
+                    elif tuple(key) not in in_flight_keys:
+                        in_flight[evaluator.submit(child, self._verbose)] = (child, key)
+                        in_flight_keys.add(tuple(key))
+
+            if len(completed) == 0:
+                if len(in_flight) == 0:
+                    self._print_message("No valid offspring can be bred")
+                    break
+                # Completed in submission order, as sets of futures are not ordered and seeded runs must repeat
+                done = evaluator.wait(in_flight)
+                for future in [future for future in in_flight if future in done]:
+                    child, key = in_flight.pop(future)
+                    hash_table.insert(key, future.result())
+                    if self._fitness_store is not None:
+                        self._fitness_store.insert(key, future.result())
+                    completed.append((child, hash_table.find_statistics(key).mean))
+
+            for child, child_fitness in completed:
+                self._print_verbose_message("Offspring: %s, fitness: %f"
+                                            % (self._operators.decoded_genome(child), child_fitness))
+                if self._replace_worst(population, fitness, child, child_fitness, parameters, base_line):
+                    survivors.append(child)
+                    self._protect_population(hash_table, population)
+                num_offspring += 1
+                if num_offspring % parameters.n_population != 0:
+                    continue
+
+                steps.survided_population(survivors)
+                survivors = []
+
+                if self._migration is not None:
+                    population, fitness = self._migration.migrate(generation, population, fitness)
+                self._log_generation(parameters, population, fitness, best_fitness, num_episodes, base_line,
+                                     generation, hash_table)
+
+                generation += 1
+                fitness_achieved = np.max(best_fitness) >= parameters.fitness_threshold
+                steps.more_generations(generation, parameters.n_generations - 1, fitness_achieved)
+                if generation >= parameters.n_generations or fitness_achieved:
+                    break
+
+                steps.execute_generation(generation)
+                self._print_message("=== Generation: %d/%d ===" % (generation, parameters.n_generations))
+                steps.current_population(population)
+                self._protect_population(hash_table, population)
+
+        # Evaluations still in flight are not needed any longer
+        for future in in_flight:
+            future.cancel()
+
+        return population, fitness, generation, fitness_achieved
+
+    def _breed(self, population, fitness, parameters):
+        """
+        Offspring of a single crossover, chosen with probability f_crossover over f_crossover plus
+        f_mutation, or else of a single mutation, and whether they come from a crossover.
+        Offspring are empty if no valid ones could be bred.
+        """
+
+        known_keys = {tuple(individual) for individual in population}
+        rates = parameters.f_crossover + parameters.f_mutation
+        p_crossover = parameters.f_crossover / rates if rates > 0 else 0
+        max_attempts = 100
+
+        for _ in range(max_attempts):
+            crossover = len(population) >= 2 and random.random() < p_crossover
+            if crossover:
+                parents = selection(parameters.parent_selection, range(len(population)), fitness, 2, self._verbose)
+                offspring = list(self._operators.crossover_genome(population[parents[0]], population[parents[1]],
+                                                                  parameters.replace_crossover))
+            else:
+                parent = selection(parameters.parent_selection, range(len(population)), fitness, 1,
+                                   self._verbose)[0]
+                offspring = [self._operators.mutate_gene(population[parent],
+                                                         parameters.mutation_p_add,
+                                                         parameters.mutation_p_delete)]
+
+            offspring = [child for child in offspring
+                         if len(child) >= parameters.min_length
+                         and (parameters.allow_identical or tuple(child) not in known_keys)]
+            if len(offspring) > 0:
+                return offspring, crossover
+
+        return [], False
+
+    def _known_fitness(self, individual, key, hash_table):
+        """
+        Fitness of the individual when known without simulating it, from the hash table, the
+        fitness store or an exact estimate of the steps
+        """
+
+        key_statistics = hash_table.find_statistics(key)
+        self._num_cache_lookups += 1
+        if key_statistics is not None:
+            self._num_cache_hits += 1
+            return key_statistics.mean
+        if self._fitness_store is not None and self._seed_from_store(key, hash_table):
+            return hash_table.find_statistics(key).mean
+        return self._estimate_fitness(individual, key, None)
+
+    def _seed_from_store(self, key, hash_table):
+        """
+        Inserts the values of the fitness store for a key unknown to the hash table, so from then
+        on the key is found there. Returns whether there were any.
+        """
+
+        if hash_table.find_statistics(key) is not None:
+            return False
+        values = self._fitness_store.find(key)
+        if values is None:
+            return False
+        for value in values:
+            hash_table.insert(key, value)
+        return True
+
+    def _protect_population(self, hash_table, population):
+        """
+        Members of the population are never evicted from the hash table
+        """
+
+        if not self._bounded_cache:
+            return
+        self._population_keys = frozenset(tuple(self._cache_key(individual)) for individual in population)
+        hash_table.protect(self._population_keys)
+
+    @staticmethod
+    def _replace_worst(population, fitness, individual, individual_fitness, parameters, base_line):
+        """
+        Puts the individual in place of the worst one of the population, if not worse than it and,
+        unless identical ones are allowed, not in the population already. A baseline kept is never
+        replaced. Returns whether the individual was put in the population.
+        """
+
+        if not parameters.allow_identical and tuple(individual) in {tuple(other) for other in population}:
+            return False
+
+        replaceable = [index for index in range(len(population))
+                       if not (parameters.keep_baseline and base_line is not None and population[index] == base_line)]
+        if len(replaceable) == 0:
+            return False
+
+        worst = min(replaceable, key=lambda index: fitness[index])
+        if individual_fitness < fitness[worst]:
+            return False
+        population[worst] = individual
+        fitness[worst] = individual_fitness
+        return True
+
+    def _log_generation(self, parameters, population, fitness, best_fitness, num_episodes, base_line, generation,
+                        hash_table):
+
+        best_fitness.append(max(fitness))
+        num_episodes.append(hash_table.num_values())
+
+        self._print_population("Survivors", population, fitness)
+        self._print_message("Best fitness: %f" % best_fitness[-1])
+        self._print_message("Num episodes: %s" % num_episodes[-1])
+        if parameters.static_screening:
+            self._print_message("Simulations avoided: %d scored, %d dominated" % self.simulations_avoided())
+        if parameters.rerun_fitness == 3:
+            self._reruns_saved.append(self._num_reruns_saved)
+            self._num_reruns_saved = 0
+            self._print_message("Reruns saved: %d" % self._reruns_saved[-1])
+        if parameters.cache_capacity is not None:
+            self._print_message("Cache hit rate: %.2f, evictions: %d"
+                                % (self._num_cache_hits / max(1, self._num_cache_lookups),
+                                   hash_table.num_evictions() - self._num_evictions))
+            self._num_cache_lookups = self._num_cache_hits = 0
+            self._num_evictions = hash_table.num_evictions()
+        self._print_best_individual(population, fitness)
+
+        logplot.log_fitness(parameters.log_name, fitness)
+        logplot.log_population(parameters.log_name, self._decoded_population(population))
+
+        if (generation + 1) % 25 == 0 and generation < parameters.n_generations - 1:
+            # Save state every 25 generations but not the last one as it is saved later
+            self._save_state(parameters, population, None, best_fitness, num_episodes, base_line, generation,
+                             hash_table)
+
     def _create_random_population(self, population_size, genome_length):
 
         self._print_verbose_message("Create random population")
@@ -192,14 +499,17 @@ class GeneticProgramming:
         self._print_verbose_message("   Genome length: %d" % genome_length)
 
         new_population = []
+        new_population_keys = set()
         max_attempts = 100
 
         for _ in range(population_size):
             attempts = 0
             while attempts < max_attempts:
                 individual = self._operators.random_genome(genome_length)
-                if individual != [] and individual not in new_population:
+                key = tuple(individual)
+                if len(individual) > 0 and key not in new_population_keys:
                     new_population.append(individual)
+                    new_population_keys.add(key)
                     break
                 attempts += 1
 
@@ -211,6 +521,7 @@ class GeneticProgramming:
         """
 
         mutated_population = []
+        known_keys = {tuple(individual) for individual in population}
         max_attempts = 100
 
         for parent in parents:
@@ -224,10 +535,11 @@ class GeneticProgramming:
                                                                      parameters.mutation_p_add,
                                                                      parameters.mutation_p_delete)
 
+                    key = tuple(mutated_individual)
                     if (len(mutated_individual) >= parameters.min_length
-                            and (parameters.allow_identical
-                                 or (mutated_individual not in population + mutated_population))):
+                            and (parameters.allow_identical or key not in known_keys)):
                         mutated_population.append(mutated_individual)
+                        known_keys.add(key)
                         break
                     attempts += 1
 
@@ -242,6 +554,7 @@ class GeneticProgramming:
             raise ValueError("Number of parents for crossover must be even number")
 
         crossover_offspring = []
+        known_keys = {tuple(individual) for individual in population}
         max_attempts = 100
 
         for _ in range(parameters.n_offspring_crossover):
@@ -258,12 +571,15 @@ class GeneticProgramming:
                                                                           population[parent2],
                                                                           parameters.replace_crossover)
 
+                key1 = tuple(offspring1)
+                key2 = tuple(offspring2)
                 if (len(offspring1) >= parameters.min_length and len(offspring2) >= parameters.min_length
                         and (parameters.allow_identical
-                             or (offspring1 not in population + crossover_offspring and
-                                 offspring2 not in population + crossover_offspring))):
+                             or (key1 not in known_keys and key2 not in known_keys))):
                     crossover_offspring.append(offspring1)
                     crossover_offspring.append(offspring2)
+                    known_keys.add(key1)
+                    known_keys.add(key2)
                     unused_parents.pop(crossover_parents[0])
                     if crossover_parents[0] < crossover_parents[1]:
                         crossover_parents[1] -= 1
@@ -275,7 +591,9 @@ class GeneticProgramming:
             if (attempts == max_attempts and len(unused_parents) > 0
                     and parameters.n_offspring_mutation <= 1 and parameters.n_offspring_crossover <= 1):
                 # Fill up with mutation in case we can't find enough good crossovers
-                crossover_offspring += self._mutation(population + crossover_offspring, unused_parents, parameters)
+                mutated_offspring = self._mutation(population + crossover_offspring, unused_parents, parameters)
+                crossover_offspring += mutated_offspring
+                known_keys.update(tuple(individual) for individual in mutated_offspring)
 
         return crossover_offspring
 
@@ -290,27 +608,184 @@ class GeneticProgramming:
         else:
             return 1 / num_runs ** 2
 
-    def _calculate_fitness(self, individual, hash_table, steps, rerun=0):
+    def _calculate_fitness(self, individuals, hash_table, evaluator, rerun=0, cutoff=None, rivals=()):
         """
-        Gets fitness from hash table if possible, otherwise gets it from simulation
+        Gets fitness of each individual from hash table if possible, otherwise gets it from simulation.
+        All the individuals to simulate are handed to the evaluator as one batch, and their results
+        are inserted in the hash table in the order of the individuals.
         rerun = 0 means never rerun
         rerun = 1 means rerun with diminishing probability
         rerun = 2 means rerun always
+        rerun = 3 means rerun while the place of the individual among the best ones is undecided,
+        the best ones of the individuals and of their rivals, already evaluated
+        With a cutoff, individuals without exact fitness may be simulated only until their fitness
+        is known to be below it, and then the upper bound obtained is used as their fitness.
+        With static screening, individuals without exact fitness are not simulated when their
+        estimate is exact or an upper bound below the cutoff.
+        With a fitness store, individuals without fitness in the hash table take the values
+        in the store, if any, inserted in the hash table, and the values obtained from
+        simulations are added to the store.
+        """
+
+        keys = [self._cache_key(individual) for individual in individuals]
+        if self._bounded_cache:
+            # Individuals of the batch are not evicted before their fitness is read
+            hash_table.protect(self._population_keys.union(tuple(key) for key in keys))
+        pending = []
+        pending_keys = []
+        bounded = []
+        bounded_keys = []
+        pending_runs = {}
+        estimates = {}
+        seeded = set()
+        if self._fitness_store is not None:
+            for key in keys:
+                if self._seed_from_store(key, hash_table):
+                    seeded.add(tuple(key))
+        racing = set()
+        if rerun == 3:
+            racing = self._racing_keys(keys + [self._cache_key(rival) for rival in rivals], hash_table)
+
+        for individual, key in zip(individuals, keys):
+            key_statistics = hash_table.find_statistics(key)
+            self._num_cache_lookups += 1
+            self._num_cache_hits += 0 if key_statistics is None or tuple(key) in seeded else 1
+
+            num_runs = (0 if key_statistics is None else key_statistics.count) + pending_runs.get(tuple(key), 0)
+
+            if num_runs == 0 and tuple(key) not in pending_runs:
+                estimate = self._estimate_fitness(individual, key, cutoff)
+                if estimate is not None:
+                    estimates[tuple(key)] = estimate
+                    continue
+
+            if num_runs == 0 and cutoff is not None:
+                bound = hash_table.find_bound(key)
+                if (bound is None or bound >= cutoff) and tuple(key) not in pending_runs:
+                    # Reruns are always exact so aborted episodes do not bias the mean
+                    bounded.append(individual)
+                    bounded_keys.append(key)
+                    pending_runs[tuple(key)] = 0
+            elif (num_runs == 0 or rerun == 2 or (rerun == 1 and random.random() < self._rerun_probability(num_runs))
+                    or (rerun == 3 and tuple(key) in racing and tuple(key) not in pending_runs)):
+                pending.append(individual)
+                pending_keys.append(key)
+                pending_runs[tuple(key)] = pending_runs.get(tuple(key), 0) + 1
+            elif rerun == 3:
+                self._num_reruns_saved += 1
+
+        for key, fitness in zip(pending_keys, evaluator.evaluate(pending, self._verbose)):
+            hash_table.insert(key, fitness)
+            if self._fitness_store is not None:
+                self._fitness_store.insert(key, fitness)
+        for key, (fitness, exact) in zip(bounded_keys, evaluator.evaluate_bounded(bounded, cutoff, self._verbose)):
+            hash_table.insert(key, fitness, exact)
+
+        fitness = []
+        for key in keys:
+            key_statistics = hash_table.find_statistics(key)
+            if key_statistics is not None:
+                value = key_statistics.mean
+            elif tuple(key) in estimates:
+                value = estimates[tuple(key)]
+            else:
+                value = hash_table.find_bound(key)
+            if self._verbose:
+                print('Calculated fitness: ', value)
+            fitness.append(value)
+
+        if self._bounded_cache:
+            hash_table.protect(self._population_keys)
+        return fitness
+
+    def _racing_keys(self, keys, hash_table):
+        """
+        Keys whose place among the best individuals, as many as the elites, is still undecided.
+        Each mean fitness is bounded by some standard errors, with the variance of the values of
+        its key or, for keys run once, the pooled variance of the others. A key is undecided when
+        its upper bound reaches strictly into the best places and its lower bound strictly out of them.
         """
 
-        values = hash_table.find(individual)
+        runs = {}
+        for key in keys:
+            key_statistics = hash_table.find_statistics(key)
+            if key_statistics is not None:
+                runs[tuple(key)] = key_statistics
+
+        variances = [key_statistics.variance() for key_statistics in runs.values() if key_statistics.count >= 2]
+        pooled_variance = mean(variances) if len(variances) > 0 else None
+
+        bounds = {}
+        for key, key_statistics in runs.items():
+            key_variance = key_statistics.variance() if key_statistics.count >= 2 else pooled_variance
+            if key_variance is None:
+                margin = math.inf
+            else:
+                margin = self._rerun_confidence * math.sqrt(key_variance / key_statistics.count)
+            bounds[key] = (key_statistics.mean - margin, key_statistics.mean + margin)
+
+        if len(bounds) <= self._num_racing:
+            return set()
+
+        # The last best place among the others is the one after it when a key is in the best places
+        last = self._num_racing - 1
+        lowers = sorted((bound[0] for bound in bounds.values()), reverse=True)
+        uppers = sorted((bound[1] for bound in bounds.values()), reverse=True)
+
+        racing = set()
+        for key, (lower, upper) in bounds.items():
+            last_lower = lowers[last + 1] if lower >= lowers[last] else lowers[last]
+            last_upper = uppers[last + 1] if upper >= uppers[last] else uppers[last]
+            # Touching bounds, as those of equal deterministic fitness, are a settled tie
+            if upper > last_lower and lower < last_upper:
+                racing.add(key)
+
+        return racing
+
+    def _estimate_fitness(self, individual, key, cutoff):
+        """
+        Fitness estimated by the steps, when it can replace the simulation of the individual
+        """
 
-        if values is None or rerun == 2 or (rerun == 1 and random.random() < self._rerun_probability(len(values))):
-            fitness = steps.calculate_fitness(individual, self._verbose)
-            hash_table.insert(individual, fitness)
+        if self._screening_steps is None:
+            return None
 
-            if values is None:
-                values = [fitness]
+        estimate = self._screening_steps.estimate_fitness(individual)
+        if estimate is None:
+            return None
 
-        if self._verbose:
-            print('Calculated fitness: ', values)
+        fitness, exact = estimate
+        if not exact and (cutoff is None or fitness >= cutoff):
+            return None
 
-        return mean(values)
+        if tuple(key) not in self._screened_keys:
+            self._screened_keys.add(tuple(key))
+            if exact:
+                self._num_scored += 1
+            else:
+                self._num_dominated += 1
+        return fitness
+
+    @staticmethod
+    def _survivor_cutoff(population, fitness, parameters):
+        """
+        Fitness under which offspring would be worse than the whole current population,
+        None when episodes are not stopped early
+        """
+
+        if not parameters.early_termination or len(population) == 0:
+            return None
+        return min(fitness[:len(population)])
+
+    def _cache_key(self, individual):
+        """
+        Key of the individual in the hash table, semantically equivalent individuals share
+        the same key when caching by canonical form
+        """
+
+        if self._canonical_cache:
+            return self._operators.canonical_genome(individual)
+        return individual
 
     def _crossover_parent_selection(self, population, fitness, parameters):
         """
@@ -408,10 +883,11 @@ class GeneticProgramming:
 
         logplot.log_last_population(parameters.log_name, population)
         if best_individual is not None:
-            logplot.log_best_individual(parameters.log_name, best_individual)
+            logplot.log_best_individual(parameters.log_name, self._operators.decoded_genome(best_individual))
         logplot.log_best_fitness(parameters.log_name, best_fitness)
         logplot.log_n_episodes(parameters.log_name, n_episodes)
-        logplot.log_settings(parameters.log_name, parameters, base_line)
+        logplot.log_settings(parameters.log_name, parameters,
+                             self._operators.decoded_genome(base_line) if base_line is not None else None)
         logplot.log_state(parameters.log_name, random.getstate(), np.random.get_state(), generation)
         hash_table.write()
 
@@ -430,6 +906,12 @@ class GeneticProgramming:
         hash_table.load()
         return best_fitness, n_episodes, generation, population
 
+    def _decoded_population(self, population):
+        """
+        Population as it is logged, see GeneticOperators.decoded_genome
+        """
+        return [self._operators.decoded_genome(individual) for individual in population]
+
     def _plot_results(self, trace_conf,
                       parameters, steps, population, num_episodes, best_fitness, best_individual):
 
@@ -457,14 +939,14 @@ class GeneticProgramming:
 
         self._print_verbose_message(title)
         for i in range(len(population)):
-            self._print_verbose_message("   (%d) Genome: %s" % (i, population[i]))
+            self._print_verbose_message("   (%d) Genome: %s" % (i, self._operators.decoded_genome(population[i])))
             self._print_verbose_message("        Fitness: %f" % fitness[i])
 
     def _print_best_individual(self, population, fitness):
 
         best = np.argmax(fitness)
         self._print_verbose_message("Best individual: %d" % best)
-        self._print_verbose_message("   Genome: %s" % population[best])
+        self._print_verbose_message("   Genome: %s" % self._operators.decoded_genome(population[best]))
         self._print_verbose_message("   Fitness: %f" % fitness[best])
         self._print_verbose_message("Fitness average: %f, std dev: %f" % (np.average(fitness), np.std(fitness)))
 
@@ -473,4 +955,4 @@ class GeneticProgramming:
         self._logger.debug(title)
         self._logger.debug("   Parents: %s", parents)
         for i in range(len(offspring)):
-            self._logger.debug("   (%d) Offspring: %s" % (i, offspring[i]))
+            self._logger.debug("   (%d) Offspring: %s" % (i, self._operators.decoded_genome(offspring[i])))
@@ -0,0 +1,255 @@
+"""
+Evaluation of batches of individuals by workers in other processes or hosts, which take
+them from the queues of a broker
+"""
+
+import time
+import queue
+import random
+import threading
+from concurrent.futures import Future
+from multiprocessing.managers import BaseManager
+import numpy as np
+from interface import implements
+from behavior_tree_learning.core.gp.evaluation import Evaluator
+
+_tasks = queue.Queue()
+_results = queue.Queue()
+
+
+def _get_tasks():
+    return _tasks
+
+
+def _get_results():
+    return _results
+
+
+class _BrokerManager(BaseManager):
+    pass
+
+
+_BrokerManager.register('get_tasks', callable=_get_tasks)
+_BrokerManager.register('get_results', callable=_get_results)
+
+_STARTED = 0
+_DONE = 1
+_FAILED = 2
+
+
+class _Task:
+    """
+    An evaluation handed out to the workers, with the future of its result
+    """
+
+    __slots__ = ('arguments', 'future', 'attempts', 'queued', 'started')
+
+    def __init__(self, arguments):
+
+        self.arguments = arguments
+        self.future = Future()
+        self.attempts = 0
+        self.queued = None
+        self.started = None
+
+
+class DistributedEvaluator(implements(Evaluator)):
+    """
+    Serves the individuals to evaluate from a broker listening at address, to the workers
+    connected to it with run_evaluation_worker(). Workers may join or leave at any time.
+    Results are collected by a thread of the calling process, so individuals submitted are
+    evaluated by as many workers as there are.
+
+    An evaluation raising an exception is retried up to max_retries times, and one started by
+    a worker that does not give its result within task_timeout seconds is handed out again,
+    as its worker may have left. So is one taken from the queue, once it is empty, but not
+    started within task_timeout seconds, as its worker may have left before starting it. When
+    no worker reports anything for worker_timeout seconds, pending evaluations fail with
+    RuntimeError.
+
+    Tasks handed out again and still queued once no evaluation is pending are dropped, so
+    workers do not simulate them again.
+
+    Like ProcessPoolEvaluator each individual is evaluated with its own seed, drawn in order
+    in the calling process, so results do not depend on the workers evaluating them.
+    """
+
+    def __init__(self, address, authkey, max_retries=2, task_timeout=300.0, worker_timeout=600.0):
+
+        if authkey is None:
+            raise ValueError("Distributed evaluation needs an authkey shared with the workers")
+
+        self._manager = _BrokerManager(address=address, authkey=authkey)
+        self._manager.start()
+        self._tasks = self._manager.get_tasks()
+        self._results = self._manager.get_results()
+        self._max_retries = max_retries
+        self._task_timeout = task_timeout
+        self._worker_timeout = worker_timeout
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._next_task = 0
+        self._last_report = time.time()
+        self._stopped = threading.Event()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @property
+    def address(self):
+        return self._manager.address
+
+    def evaluate(self, individuals, verbose):
+
+        futures = [self.submit(individual, verbose) for individual in individuals]
+        return [future.result() for future in futures]
+
+    def evaluate_bounded(self, individuals, cutoff, verbose):
+
+        futures = [self._submit((individual, random.randrange(2**32), cutoff, verbose)) for individual in individuals]
+        return [future.result() for future in futures]
+
+    def submit(self, individual, verbose):
+        return self._submit((individual, random.randrange(2**32), None, verbose))
+
+    def shutdown(self):
+
+        self._stopped.set()
+        self._collector.join()
+        self._manager.shutdown()
+
+    def _submit(self, arguments):
+
+        task = _Task(arguments)
+        with self._lock:
+            if len(self._pending) == 0:
+                self._last_report = time.time()
+            self._next_task += 1
+            self._pending[self._next_task] = task
+            self._hand_out(self._next_task, task)
+        return task.future
+
+    def _collect(self):
+
+        while not self._stopped.is_set():
+            try:
+                message = self._results.get(timeout=0.1)
+            except queue.Empty:
+                with self._lock:
+                    self._hand_out_lost()
+                continue
+            except (EOFError, ConnectionError) as exception:
+                with self._lock:
+                    self._fail_pending(RuntimeError("Broker at %s is gone: %r" % (self.address, exception)))
+                return
+
+            with self._lock:
+                self._last_report = time.time()
+                self._report(*message)
+
+    def _report(self, task_id, kind, value):
+
+        # Results of tasks handed out twice are dropped
+        task = self._pending.get(task_id)
+        if task is None:
+            return
+
+        if kind == _STARTED:
+            task.started = time.time()
+            return
+        if kind == _FAILED:
+            task.attempts += 1
+            if task.attempts <= self._max_retries:
+                task.started = None
+                self._hand_out(task_id, task)
+                return
+
+        del self._pending[task_id]
+        if len(self._pending) == 0:
+            self._drop_queued()
+        if kind == _DONE:
+            task.future.set_result(value)
+        else:
+            task.future.set_exception(RuntimeError("Evaluation of %s failed: %s" % (task.arguments[0], value)))
+
+    def _hand_out(self, task_id, task):
+
+        self._tasks.put((task_id,) + task.arguments)
+        task.queued = time.time()
+
+    def _drop_queued(self):
+
+        while True:
+            try:
+                self._tasks.get_nowait()
+            except queue.Empty:
+                return
+
+    def _fail_pending(self, exception):
+
+        tasks = list(self._pending.values())
+        self._pending.clear()
+        for task in tasks:
+            task.future.set_exception(exception)
+
+    def _hand_out_lost(self):
+
+        if len(self._pending) == 0:
+            return
+
+        now = time.time()
+        if now - self._last_report > self._worker_timeout:
+            self._drop_queued()
+            self._fail_pending(RuntimeError("No worker has reported for %.0f seconds, are workers connected to %s?"
+                                            % (self._worker_timeout, self.address)))
+            return
+
+        for task_id, task in self._pending.items():
+            if task.started is not None and now - task.started > self._task_timeout:
+                task.started = None
+                self._hand_out(task_id, task)
+
+        # With the queue empty, tasks not started yet were taken by workers that left
+        if self._tasks.qsize() == 0:
+            for task_id, task in self._pending.items():
+                if task.started is None and now - task.queued > self._task_timeout:
+                    self._hand_out(task_id, task)
+
+
+def run_evaluation_worker(steps, address, authkey, max_tasks=None, poll_time=1.0):
+    """
+    Evaluates individuals for the broker at address, with the steps given, until the broker
+    shuts down or max_tasks individuals have been evaluated. Returns how many were.
+    """
+
+    manager = _BrokerManager(address=address, authkey=authkey)
+    manager.connect()
+    tasks = manager.get_tasks()
+    results = manager.get_results()
+
+    num_tasks = 0
+    try:
+        while max_tasks is None or num_tasks < max_tasks:
+            try:
+                task_id, individual, seed, cutoff, verbose = tasks.get(timeout=poll_time)
+            except queue.Empty:
+                continue
+
+            results.put((task_id, _STARTED, None))
+            random.seed(seed)
+            np.random.seed(seed)
+            try:
+                if cutoff is None:
+                    result = steps.calculate_fitness(individual, verbose)
+                else:
+                    result = steps.calculate_fitness_bounded(individual, cutoff, verbose)
+            except Exception as exception:
+                results.put((task_id, _FAILED, repr(exception)))
+            else:
+                results.put((task_id, _DONE, result))
+            num_tasks += 1
+    except (EOFError, ConnectionError):
+        # The broker is gone
+        pass
+
+    return num_tasks
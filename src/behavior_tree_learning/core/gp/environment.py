@@ -1,3 +1,4 @@
+import interface
 from interface import Interface, implements
 from behavior_tree_learning.core.gp.steps import AlgorithmSteps
 
@@ -16,6 +17,79 @@ class GeneticEnvironment(Interface):
         """
         pass
 
+    @interface.default
+    async def run_and_compute_async(self, individual, verbose):
+        """
+        Same as run_and_compute, as a coroutine so that episodes waiting on I/O can run
+        concurrently. By default the episode is run at once, without waiting on anything.
+
+        Parameters:
+            individual
+            verbose (bool)
+        Returns:
+            fitness (float)
+        """
+        return self.run_and_compute(individual, verbose)
+
+    @interface.default
+    def run_and_compute_batch(self, individuals, verbose):
+        """
+        Run the simulation of several individuals and return their fitness.
+        Environments able to amortize work over a whole batch should override it,
+        by default each individual is run on its own.
+
+        Parameters:
+            individuals (list)
+            verbose (bool)
+        Returns:
+            fitness (list) : fitness of each individual, in the same order
+        """
+        return [self.run_and_compute(individual, verbose) for individual in individuals]
+
+    @interface.default
+    def run_and_compute_bounded(self, individual, cutoff, verbose):
+        """
+        Same as run_and_compute, but the episode may be aborted as soon as an upper bound
+        of the fitness falls below cutoff. By default the episode is always run to the end.
+
+        Parameters:
+            individual
+            cutoff (float) : fitness below which the exact value is not needed
+            verbose (bool)
+        Returns:
+            fitness (float) : the fitness, or its upper bound when the episode was aborted
+            exact (bool) : False when the episode was aborted
+        """
+        return self.run_and_compute(individual, verbose), True
+
+    @interface.default
+    def run_and_compute_batch_bounded(self, individuals, cutoff, verbose):
+        """
+        Same as run_and_compute_bounded for several individuals
+
+        Parameters:
+            individuals (list)
+            cutoff (float)
+            verbose (bool)
+        Returns:
+            results (list) : pair of fitness and exact flag of each individual, in the same order
+        """
+        return [self.run_and_compute_bounded(individual, cutoff, verbose) for individual in individuals]
+
+    @interface.default
+    def estimate_fitness(self, individual):
+        """
+        Estimate the fitness without running the simulation, by default there is no estimate
+
+        Parameters:
+            individual
+        Returns:
+            None, or
+            fitness (float) : the fitness, or an upper bound of it
+            exact (bool) : False when fitness is only an upper bound
+        """
+        return None
+
     def plot_individual(self, path, plot_name, individual):
         """
         Saves a graphical representation of the individual
@@ -30,16 +104,34 @@ class GeneticEnvironment(Interface):
         pass
 
 
-def make_steps(environment: GeneticEnvironment):
+class _StepsForEnvironment(implements(AlgorithmSteps)):
+
+    def __init__(self, environment):
+        self._environment = environment
+
+    def calculate_fitness(self, individual, verbose):
+        return self._environment.run_and_compute(individual, verbose)
+
+    async def calculate_fitness_async(self, individual, verbose):
+        return await self._environment.run_and_compute_async(individual, verbose)
 
-    class StepsForEnvironment(implements(AlgorithmSteps)):
-        def __init__(self, environment_):
-            self._environment = environment_
+    def calculate_fitness_batch(self, individuals, verbose):
+        return self._environment.run_and_compute_batch(individuals, verbose)
 
-        def calculate_fitness(self, individual, verbose):
-            return self._environment.run_and_compute(individual, verbose)
+    def calculate_fitness_bounded(self, individual, cutoff, verbose):
+        return self._environment.run_and_compute_bounded(individual, cutoff, verbose)
 
-        def plot_individual(self, path, plot_name, individual):
-            self._environment.plot_individual(path, plot_name, individual)
+    def calculate_fitness_batch_bounded(self, individuals, cutoff, verbose):
+        return self._environment.run_and_compute_batch_bounded(individuals, cutoff, verbose)
+
+    def estimate_fitness(self, individual):
+        return self._environment.estimate_fitness(individual)
+
+    def plot_individual(self, path, plot_name, individual):
+        self._environment.plot_individual(path, plot_name, individual)
+
+
+def make_steps(environment: GeneticEnvironment):
 
-    return StepsForEnvironment(environment)
+    # Steps are defined at module level so they can be sent to worker processes
+    return _StepsForEnvironment(environment)
@@ -0,0 +1,243 @@
+"""
+Evaluation of the fitness of batches of individuals
+"""
+
+import random
+import asyncio
+from enum import Enum, auto
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+import numpy as np
+import interface
+from interface import Interface, implements
+
+
+class EvaluationMethods(Enum):
+    """
+    Enum class for evaluation methods
+    """
+
+    SERIAL = auto()
+    PROCESS_POOL = auto()
+    ASYNCIO = auto()
+    DISTRIBUTED = auto()
+
+
+class Evaluator(Interface):
+
+    def evaluate(self, individuals, verbose):
+        """
+        Computes the fitness of a batch of individuals
+
+        Parameters:
+            individuals (list) : individuals to evaluate
+            verbose (bool)
+        Returns:
+            fitness (list) : fitness of each individual, in the same order
+        """
+        pass
+
+    def evaluate_bounded(self, individuals, cutoff, verbose):
+        """
+        Computes the fitness of a batch of individuals, allowing to stop the evaluation
+        of those whose fitness is known to be below cutoff
+
+        Parameters:
+            individuals (list) : individuals to evaluate
+            cutoff (float) : fitness below which the exact value is not needed
+            verbose (bool)
+        Returns:
+            results (list) : pair of fitness and exact flag of each individual, in the same order
+        """
+        pass
+
+    @interface.default
+    def submit(self, individual, verbose):
+        """
+        Starts the evaluation of an individual, without waiting for it to complete.
+        By default the individual is evaluated at once.
+
+        Parameters:
+            individual
+            verbose (bool)
+        Returns:
+            future (Future) : future of the fitness of the individual
+        """
+        future = Future()
+        future.set_result(self.evaluate([individual], verbose)[0])
+        return future
+
+    @interface.default
+    def wait(self, futures):
+        """
+        Waits for at least one of the futures returned by submit() to complete
+
+        Parameters:
+            futures (iterable)
+        Returns:
+            done (set) : futures completed
+        """
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        return done
+
+    def shutdown(self):
+        """
+        Releases the resources held by the evaluator
+        """
+        pass
+
+
+class SerialEvaluator(implements(Evaluator)):
+    """
+    Evaluates the individuals in the calling process, handing the whole batch to the steps
+    """
+
+    def __init__(self, steps):
+        self._steps = steps
+
+    def evaluate(self, individuals, verbose):
+
+        if len(individuals) == 0:
+            return []
+        return self._steps.calculate_fitness_batch(individuals, verbose)
+
+    def evaluate_bounded(self, individuals, cutoff, verbose):
+
+        if len(individuals) == 0:
+            return []
+        return self._steps.calculate_fitness_batch_bounded(individuals, cutoff, verbose)
+
+    def shutdown(self):
+        pass
+
+
+_worker_steps = None
+
+
+def _initialize_worker(steps):
+
+    global _worker_steps
+    _worker_steps = steps
+
+
+def _evaluate_in_worker(individual, seed, verbose):
+
+    random.seed(seed)
+    np.random.seed(seed)
+    return _worker_steps.calculate_fitness(individual, verbose)
+
+
+def _evaluate_bounded_in_worker(individual, seed, cutoff, verbose):
+
+    random.seed(seed)
+    np.random.seed(seed)
+    return _worker_steps.calculate_fitness_bounded(individual, cutoff, verbose)
+
+
+class ProcessPoolEvaluator(implements(Evaluator)):
+    """
+    Evaluates the individuals concurrently in a pool of worker processes.
+
+    Each individual is evaluated with its own seed, drawn in order from the random generator
+    of the calling process, and results are returned in the order of the individuals. So a
+    seeded run gives the same results whatever the number of workers is.
+    """
+
+    def __init__(self, steps, num_workers):
+
+        self._executor = ProcessPoolExecutor(max_workers=num_workers,
+                                             initializer=_initialize_worker, initargs=(steps,))
+
+    def evaluate(self, individuals, verbose):
+
+        seeds = [random.randrange(2**32) for _ in individuals]
+        return list(self._executor.map(_evaluate_in_worker, individuals, seeds, [verbose] * len(individuals)))
+
+    def evaluate_bounded(self, individuals, cutoff, verbose):
+
+        seeds = [random.randrange(2**32) for _ in individuals]
+        return list(self._executor.map(_evaluate_bounded_in_worker, individuals, seeds,
+                                       [cutoff] * len(individuals), [verbose] * len(individuals)))
+
+    def submit(self, individual, verbose):
+        return self._executor.submit(_evaluate_in_worker, individual, random.randrange(2**32), verbose)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class AsyncioEvaluator(implements(Evaluator)):
+    """
+    Evaluates the individuals as concurrent episodes in an event loop of the calling process,
+    for steps whose evaluations mostly wait on I/O, as episodes run in an AsyncWorld. At most
+    max_episodes run at the same time, one per simulator instance for example.
+
+    The whole batch is awaited as a group, in a loop kept between batches. Individuals submitted
+    are tasks of the same loop, which runs while waiting for them. Episodes are never aborted,
+    so bounded evaluations always give the exact fitness.
+    """
+
+    def __init__(self, steps, max_episodes):
+
+        self._steps = steps
+        self._max_episodes = max_episodes
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+
+    def evaluate(self, individuals, verbose):
+
+        if len(individuals) == 0:
+            return []
+        return self._loop.run_until_complete(self._evaluate_batch(individuals, verbose))
+
+    def evaluate_bounded(self, individuals, cutoff, verbose):
+        return [(fitness, True) for fitness in self.evaluate(individuals, verbose)]
+
+    def submit(self, individual, verbose):
+        return self._loop.create_task(self._evaluate(individual, verbose))
+
+    def wait(self, futures):
+
+        done, _ = self._loop.run_until_complete(asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED))
+        return done
+
+    def shutdown(self):
+
+        # Submitted individuals whose fitness was not needed are cancelled
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if len(tasks) > 0:
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    async def _evaluate_batch(self, individuals, verbose):
+        return list(await asyncio.gather(*[self._evaluate(individual, verbose) for individual in individuals]))
+
+    async def _evaluate(self, individual, verbose):
+
+        # Created in the loop, as before Python 3.10 a semaphore is bound to the loop current when created
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_episodes)
+        async with self._semaphore:
+            return await self._steps.calculate_fitness_async(individual, verbose)
+
+
+def make_evaluator(steps, parameters):
+    """
+    Creates the evaluator selected in the parameters
+    """
+
+    if parameters.evaluation == EvaluationMethods.SERIAL:
+        evaluator = SerialEvaluator(steps)
+    elif parameters.evaluation == EvaluationMethods.PROCESS_POOL:
+        evaluator = ProcessPoolEvaluator(steps, parameters.n_workers)
+    elif parameters.evaluation == EvaluationMethods.ASYNCIO:
+        evaluator = AsyncioEvaluator(steps, parameters.n_workers)
+    elif parameters.evaluation == EvaluationMethods.DISTRIBUTED:
+        # Imported here, as the distributed evaluator is built on this module
+        from behavior_tree_learning.core.gp.distributed import DistributedEvaluator
+        evaluator = DistributedEvaluator(parameters.broker_address, parameters.broker_authkey)
+    else:
+        raise Exception('Invalid evaluation method')
+
+    return evaluator
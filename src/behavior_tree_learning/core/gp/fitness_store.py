@@ -0,0 +1,117 @@
+"""
+Stores of fitness values shared by several runs of the algorithm, so that an individual
+simulated by one of them is known to all the others
+"""
+
+import os
+import sqlite3
+import hashlib
+import pathlib
+from interface import Interface, implements
+
+
+def scenario_fingerprint(*parts):
+    """
+    Identifier of a scenario from its description, such as its name and the positions of its
+    objects, so that only runs of the same scenario share their fitness values
+    """
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class FitnessStore(Interface):
+
+    def find(self, key):
+        """
+        Find the exact fitness values stored for a key
+
+        Parameters:
+            key : genome, as used in the hash table
+        Returns:
+            values (list) : values stored under the key, or None if not found
+        """
+        pass
+
+    def insert(self, key, value):
+        """
+        Stores a new exact fitness value for a key
+        """
+        pass
+
+
+class SharedFitnessStore(implements(FitnessStore)):
+    """
+    Store kept in a dictionary shared between processes, such as the dictionaries of a
+    multiprocessing manager, guarded by a lock of the same kind
+    """
+
+    def __init__(self, values, lock):
+
+        self._values = values
+        self._lock = lock
+
+    def find(self, key):
+        return self._values.get(tuple(key))
+
+    def insert(self, key, value):
+
+        key = tuple(key)
+        with self._lock:
+            self._values[key] = self._values.get(key, []) + [value]
+
+
+class SqliteFitnessStore(implements(FitnessStore)):
+    """
+    Store kept in an SQLite database on disk, shared by runs in the same or other processes,
+    now or later, as long as they give the same scenario fingerprint. Each value is appended
+    in a transaction of its own to a database in write-ahead logging mode, so runs read while
+    others write, and concurrent writes wait for each other up to timeout seconds.
+
+    Values of all runs are mixed, so the scenario should be deterministic, or the fitness its
+    values average over.
+    """
+
+    def __init__(self, path, scenario, timeout=30.0):
+
+        self._path = path
+        self._scenario = scenario
+        self._timeout = timeout
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+
+        # Other processes open their own connection
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
+
+    def find(self, key):
+
+        rows = self._connect().execute("SELECT value FROM fitness WHERE scenario = ? AND genome = ? ORDER BY id",
+                                       (self._scenario, repr(tuple(key)))).fetchall()
+        return [row[0] for row in rows] if len(rows) > 0 else None
+
+    def insert(self, key, value):
+        self._connect().execute("INSERT INTO fitness (scenario, genome, value) VALUES (?, ?, ?)",
+                                (self._scenario, repr(tuple(key)), value))
+
+    def close(self):
+
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def _connect(self):
+
+        # Connections are not used across a fork, each process opens its own one
+        if self._connection is None or self._pid != os.getpid():
+            pathlib.Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=self._timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS fitness "
+                               "(id INTEGER PRIMARY KEY, scenario TEXT, genome TEXT, value REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS fitness_genome ON fitness (scenario, genome)")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
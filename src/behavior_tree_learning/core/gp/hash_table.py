@@ -1,129 +1,461 @@
 """
-Hash table with linked list for entries with same hash
+Hash table caching the fitness values obtained by each genome.
+
+Genomes are stored as tuples, so every lookup is a single dictionary access. The values of
+each genome are kept as running statistics, and only optionally, up to a number of them, as
+raw samples. Contents are persisted in an append-only log where each write adds only the
+statistics of the genomes changed since the previous write.
+
+A table with a capacity keeps at most that many genomes, evicting first the least recently
+used ones or those of lowest fitness, except for the genomes protected, such as those of the
+current population. Evicted genomes stay in the log, and are found there by a hot start.
+Each time a genome enters the table without values it starts a new incarnation, and the
+statistics of all its incarnations in the log are merged when loading.
+
+Values obtained from episodes stopped early are not exact but upper bounds of the fitness,
+they are kept apart from the exact values and only the lowest bound of each genome is used.
 """
 
 import os
-import pathlib
-import hashlib
+import sys
 import ast
+import math
+import heapq
+import pickle
+import random
+import warnings
+import pathlib
+from enum import Enum, auto
+from collections import OrderedDict
+
+_STATISTICS = 'statistics'
+_BOUND = 'bound'
+_NUM_VALUES = 'num_values'
 
 
-class _Node:
+class EvictionPolicies(Enum):
     """
-    Node data structure - essentially a LinkedList node
+    Enum class for the genomes evicted first from a full hash table
     """
 
-    def __init__(self, key, value):
-        self.key = key
-        self.value = [value]
-        self.next = None
+    LRU = auto()                # Least recently inserted or found
+    LOWEST_FITNESS = auto()     # Lowest mean fitness, or lowest bound if only bounded
+
+
+def _make_key(genome):
+
+    return tuple(sys.intern(gene) if isinstance(gene, str) else gene for gene in genome)
+
+
+class FitnessStatistics:
+    """
+    Count, mean, variance, minimum and maximum of the values of a genome, updated with each new
+    value in constant time with Welford's algorithm. Values are also kept as samples, either all
+    of them, with max_samples None, or a uniform reservoir of at most max_samples.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max', 'samples')
+
+    def __init__(self, max_samples=None):
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.samples = [] if max_samples is None or max_samples > 0 else None
 
     def __eq__(self, other):
-        if not isinstance(other, _Node):
+
+        if not isinstance(other, FitnessStatistics):
             return False
-        equal = self.key == other.key and self.value == other.value
-        if equal:
-            if self.next is not None or other.next is not None:
-                if self.next is None or other.next is None:
-                    equal = False
-                else:
-                    equal = self.next == other.next
-        return equal
+        return self.state() == other.state()
+
+    def add(self, value, max_samples=None, generator=random):
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        if self.samples is None:
+            return
+        if max_samples is None or len(self.samples) < max_samples:
+            self.samples.append(value)
+        else:
+            index = generator.randrange(self.count)
+            if index < max_samples:
+                self.samples[index] = value
+
+    def merge(self, other, max_samples=None, generator=random):
+        """
+        Adds the values of other, as if they had been added one by one. When samples are limited,
+        each sample kept is drawn from the samples of either one in proportion to its count.
+        """
+
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        if self.samples is not None and other.samples is not None:
+            if max_samples is None or len(self.samples) + len(other.samples) <= max_samples:
+                self.samples = self.samples + other.samples
+            else:
+                own = generator.sample(self.samples, len(self.samples))
+                others = generator.sample(other.samples, len(other.samples))
+                samples = []
+                while len(samples) < max_samples:
+                    if len(own) == 0 or (len(others) > 0 and generator.random() * count < other.count):
+                        samples.append(others.pop())
+                    else:
+                        samples.append(own.pop())
+                self.samples = samples
+        self.count = count
+
+    def variance(self):
+        """
+        Sample variance of the values, None with fewer than two of them
+        """
+        return self.m2 / (self.count - 1) if self.count >= 2 else None
+
+    def state(self):
+        return (self.count, self.mean, self.m2, self.min, self.max,
+                None if self.samples is None else tuple(self.samples))
+
+    @classmethod
+    def from_state(cls, state):
+
+        statistics = cls()
+        statistics.count, statistics.mean, statistics.m2, statistics.min, statistics.max, samples = state
+        statistics.samples = None if samples is None else list(samples)
+        return statistics
 
 
 class HashTable:
 
-    _FILE_NAME = 'hash_log.txt'
+    _FILE_NAME = 'hash_log.pickle'
+    _LEGACY_FILE_NAME = 'hash_log.txt'
     _DEFAULT_DIRECTORY_NAME = 'logs'
 
-    def __init__(self, size=100000, path: str = ''):
-        """_
-        Initialize hash table to fixed size
+    def __init__(self, size=None, path: str = '', *, max_samples=None, capacity=None, eviction=EvictionPolicies.LRU):
+        """
+        size - deprecated and ignored, the table grows as needed
+        max_samples - raw values kept for each genome, None for all of them
+        capacity - genomes kept in the table, None for all of them
+        eviction - genomes evicted first when over capacity
         """
 
-        self._size = size
+        if size is not None:
+            warnings.warn("The size of HashTable is deprecated and ignored, use capacity to bound it",
+                          DeprecationWarning, stacklevel=2)
+
         self._directory_name = self._DEFAULT_DIRECTORY_NAME if path == '' else path
-        self._buckets = [None]*self._size
+        self._max_samples = max_samples
+        self._table = {}
+        self._bounds = {}
+        self._num_bounds = {}
         self._num_values = 0
+        self._unsaved = {}
+        self._append = False
+        # Reservoirs draw from their own generator, not to alter the random sequence of the caller
+        self._generator = random.Random(0)
+
+        self._capacity = capacity
+        self._eviction = eviction
+        self._order = OrderedDict() if capacity is not None else None
+        self._by_fitness = []
+        self._protected = frozenset()
+        self._evicted_records = []
+        self._num_evictions = 0
+        self._incarnations = {}
+        self._next_incarnation = 0
 
     def __eq__(self, other):
 
         if not isinstance(other, HashTable):
             return False
-
-        equal = True
-        for i in range(self._size):
-            if self._buckets[i] != other._buckets[i]:
-                equal = False
-                break
-        return equal
+        return self._table == other._table and self._bounds == other._bounds
 
     def num_values(self):
         return self._num_values
 
-    def hash(self, key: str):
+    def num_evictions(self):
+        return self._num_evictions
+
+    def protect(self, keys):
         """
-        Generate a hash for a given key
-        Input:  string key
-        Output: hash
+        Genomes never evicted, replacing those protected before
         """
+        self._protected = frozenset(tuple(key) for key in keys)
 
-        string = ''.join(key)
-        new_hash = hashlib.md5()
-        new_hash.update(string.encode('utf-8'))
-        hashcode = new_hash.hexdigest()
-        hashcode = int(hashcode, 16)
-        return hashcode % self._size
-
-    def insert(self, key: str, value):
+    def insert(self, key, value, exact=True):
         """
         Insert a key - value pair to the hashtable
-        Input:  key - string
+        Input:  key - genome
                 value - anything
+                exact - False when value is only an upper bound
         """
 
-        index = self.hash(key)
-        node = self._buckets[index]
-        if node is None:
-            self._buckets[index] = _Node(key, value)
+        key = _make_key(key)
+        if key not in self._table and key not in self._bounds:
+            self._incarnations[key] = self._next_incarnation
+            self._next_incarnation += 1
+
+        if exact:
+            statistics = self._table.get(key)
+            if statistics is None:
+                statistics = self._table[key] = FitnessStatistics(self._max_samples)
+            statistics.add(value, self._max_samples, self._generator)
+            self._unsaved[(_STATISTICS, key)] = True
         else:
-            done = False
-            while not done:
-                if node.key == key:
-                    node.value.append(value)
-                    done = True
-                elif node.next is None:
-                    node.next = _Node(key, value)
-                    done = True
-                else:
-                    node = node.next
+            bound = self._bounds.get(key)
+            self._bounds[key] = value if bound is None else min(bound, value)
+            self._num_bounds[key] = self._num_bounds.get(key, 0) + 1
+            self._unsaved[(_BOUND, key)] = True
 
         self._num_values += 1
+        if self._order is not None:
+            self._admit(key)
 
-    def find(self, key: str):
+    def find(self, key):
         """
-        Find a data value based on key
-        Input:  key - string
-        Output: value stored under "key" or None if not found
+        Find the values stored for a key
+        Input:  key - genome
+        Output: values stored under "key" or None if not found
+        Raises ValueError when the table keeps only samples of the values, see find_samples
         """
 
-        index = self.hash(key)
-        node = self._buckets[index]
-        while node is not None and node.key != key:
-            node = node.next
+        if self._max_samples is not None:
+            raise ValueError("The hash table keeps at most %d samples of the values, use find_samples "
+                             "or find_statistics" % self._max_samples)
+        return self.find_samples(key)
+
+    def find_samples(self, key):
+        """
+        Find the values kept as samples for a key
+        Input:  key - genome
+        Output: values kept as samples under "key", empty when none are kept, or None if not found
+        """
 
-        if node is None:
+        statistics = self.find_statistics(key)
+        if statistics is None:
             return None
-        return node.value
+        return [] if statistics.samples is None else statistics.samples
+
+    def find_statistics(self, key):
+        """
+        Find the statistics of the values stored for a key
+        Input:  key - genome
+        Output: FitnessStatistics of "key" or None if not found
+        """
+
+        statistics = self._table.get(tuple(key))
+        if statistics is not None and self._order is not None:
+            self._order.move_to_end(tuple(key))
+        return statistics
+
+    def find_bound(self, key):
+        """
+        Find the upper bound stored for a key
+        Input:  key - genome
+        Output: lowest upper bound stored under "key" or None if not found
+        """
+
+        bound = self._bounds.get(tuple(key))
+        if bound is not None and self._order is not None:
+            self._order.move_to_end(tuple(key))
+        return bound
 
     def load(self):
         """
         Loads hash table information.
+        Tables written by previous versions, as text or as single values, are still accepted.
+        """
+
+        self._create_directory(self._directory_name)
+
+        file_path = os.path.join(self._directory_name, self._FILE_NAME)
+        legacy_file_path = os.path.join(self._directory_name, self._LEGACY_FILE_NAME)
+        if not os.path.exists(file_path) and os.path.exists(legacy_file_path):
+            # Loaded values are kept as unsaved so the next write creates the new log
+            self._load_legacy(legacy_file_path)
+            return
+
+        # Genomes are admitted once all their incarnations are merged, in the order last written
+        order = self._order
+        self._order = None
+        incarnations = {}
+        recent = OrderedDict()
+        with open(file_path, 'rb') as f:
+            while True:
+                try:
+                    records = pickle.load(f)
+                except EOFError:
+                    break
+                for record in records:
+                    key = self._load_record(record, incarnations)
+                    if key is not None:
+                        recent[key] = True
+                        recent.move_to_end(key)
+
+        self._unsaved = {}
+        self._evicted_records = []
+        self._incarnations = {}
+        self._append = True
+        self._order = order
+        if self._order is not None:
+            for key in recent:
+                self._admit(key)
+
+    def write(self):
+        """
+        Writes the statistics and bounds changed since the last write, or load, to the log
         """
 
         self._create_directory(self._directory_name)
 
-        with open(os.path.join(self._directory_name, self._FILE_NAME), 'r') as f:
+        records = self._evicted_records
+        for kind, key in self._unsaved:
+            records.append(self._record(kind, key))
+        records.append((_NUM_VALUES, self._num_values))
+
+        mode = 'ab' if self._append else 'wb'
+        with open(os.path.join(self._directory_name, self._FILE_NAME), mode) as f:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._unsaved = {}
+        self._evicted_records = []
+        self._append = True
+
+    def _record(self, kind, key):
+
+        # Genomes loaded are written without incarnation, their statistics include all of them
+        incarnation = self._incarnations.get(key)
+        if kind == _STATISTICS:
+            return _STATISTICS, key, self._table[key].state(), incarnation
+        return _BOUND, key, self._bounds[key], self._num_bounds[key], incarnation
+
+    def _load_record(self, record, incarnations):
+        """
+        Loads a record, merging incarnations of a genome, and returns the key of its genome if any
+        """
+
+        if not isinstance(record[0], str):
+            # Single value, as written by previous versions
+            self.insert(*record)
+            return _make_key(record[0])
+
+        if record[0] == _NUM_VALUES:
+            # Also counts the values of genomes evicted before being inserted again
+            self._num_values = record[1]
+            return None
+
+        kind, key = record[0], _make_key(record[1])
+        length = 4 if kind == _STATISTICS else 5
+        incarnation = record[length - 1] if len(record) == length else None
+        if incarnation is None:
+            # Whole statistics of the genome, as written by previous versions or for loaded genomes
+            incarnations.pop(key, None)
+            base = None
+        else:
+            self._next_incarnation = max(self._next_incarnation, incarnation + 1)
+            if key not in incarnations or incarnations[key][0] != incarnation:
+                statistics = self._table.get(key)
+                incarnations[key] = (incarnation,
+                                     (None if statistics is None else FitnessStatistics.from_state(statistics.state()),
+                                      self._bounds.get(key), self._num_bounds.get(key, 0)))
+            base = incarnations[key][1]
+
+        # Later records of an incarnation replace the earlier ones
+        previous = self._table.get(key)
+        num_values = (0 if previous is None else previous.count) + self._num_bounds.get(key, 0)
+        if kind == _STATISTICS:
+            statistics = FitnessStatistics.from_state(record[2])
+            if base is not None and base[0] is not None:
+                merged = FitnessStatistics.from_state(base[0].state())
+                merged.merge(statistics, self._max_samples, self._generator)
+                statistics = merged
+            self._table[key] = statistics
+        else:
+            bound, num_bounds = record[2], record[3]
+            if base is not None and base[1] is not None:
+                bound, num_bounds = min(base[1], bound), base[2] + num_bounds
+            self._bounds[key], self._num_bounds[key] = bound, num_bounds
+        previous = self._table.get(key)
+        self._num_values += (0 if previous is None else previous.count) + self._num_bounds.get(key, 0) - num_values
+
+        return key
+
+    def _fitness(self, key):
+
+        statistics = self._table.get(key)
+        return statistics.mean if statistics is not None else self._bounds[key]
+
+    def _admit(self, key):
+        """
+        Makes the key the most recently used, and evicts other keys while over capacity
+        """
+
+        self._order[key] = True
+        self._order.move_to_end(key)
+        if self._eviction == EvictionPolicies.LOWEST_FITNESS:
+            heapq.heappush(self._by_fitness, (self._fitness(key), key))
+            if len(self._by_fitness) > 2 * len(self._order) + 64:
+                # Drop the entries left behind by later values of the same keys
+                self._by_fitness = [(self._fitness(other), other) for other in self._order]
+                heapq.heapify(self._by_fitness)
+
+        while len(self._order) > self._capacity:
+            victim = self._lowest_fitness(key) if self._eviction == EvictionPolicies.LOWEST_FITNESS \
+                else next((other for other in self._order if other != key and other not in self._protected), None)
+            if victim is None:
+                # Every other key is protected
+                return
+            self._evict(victim)
+
+    def _lowest_fitness(self, admitted):
+
+        kept = []
+        victim = None
+        while len(self._by_fitness) > 0:
+            fitness, other = heapq.heappop(self._by_fitness)
+            if other not in self._order or self._fitness(other) != fitness:
+                continue
+            if other == admitted or other in self._protected:
+                kept.append((fitness, other))
+                continue
+            victim = other
+            break
+
+        for entry in kept:
+            heapq.heappush(self._by_fitness, entry)
+        return victim
+
+    def _evict(self, key):
+
+        # Values not written yet are still written, so the log is complete
+        for kind in (_STATISTICS, _BOUND):
+            if self._unsaved.pop((kind, key), None):
+                self._evicted_records.append(self._record(kind, key))
+
+        del self._order[key]
+        self._incarnations.pop(key, None)
+        self._table.pop(key, None)
+        self._bounds.pop(key, None)
+        self._num_bounds.pop(key, None)
+        self._num_evictions += 1
+
+    def _load_legacy(self, file_path):
+
+        with open(file_path, 'r') as f:
             lines = f.read().splitlines()
 
             for i in range(0, len(lines)):
@@ -135,24 +467,7 @@ class HashTable:
                 for value in values:
                     self.insert(key, float(value))
 
-    def write(self):
-        """
-        Writes table contents to a file
-        """
-
-        self._create_directory(self._directory_name)
-
-        with open(os.path.join(self._directory_name, self._FILE_NAME), 'w') as f:
-            for node in filter(lambda x: x is not None, self._buckets):
-                while node is not None:
-                    f.writelines('key: ' + str(node.key) +
-                                 ', value: ' + str(node.value) +
-                                 ', count: ' + str(len(node.value)) + '\n')
-                    node = node.next
-        f.close()
-
     @staticmethod
     def _create_directory(directory_path):
 
         pathlib.Path(directory_path).mkdir(parents=True, exist_ok=True)
-
@@ -0,0 +1,107 @@
+"""
+Island model, several populations evolving in parallel and exchanging individuals
+"""
+
+import queue
+import traceback
+import multiprocessing
+from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
+from behavior_tree_learning.core.gp.operators import GeneticOperators
+from behavior_tree_learning.core.gp.parameters import TraceConfiguration
+from behavior_tree_learning.core.gp.fitness_store import SharedFitnessStore
+from behavior_tree_learning.core.gp.migration import MigrationTopology, QueueMigration, neighbours
+
+
+def _run_island(index, operators, output_directory_path, steps, parameters, seed, base_line, trace_conf, verbose,
+                fitness_store, migration, results):
+
+    try:
+        gp = GeneticProgramming(operators, output_directory_path)
+        result = gp.run(steps, parameters, seed, base_line=base_line, trace_conf=trace_conf, verbose=verbose,
+                        fitness_store=fitness_store, migration=migration)
+        results.put((index, result, None))
+    except Exception:
+        results.put((index, None, traceback.format_exc()))
+
+
+class IslandModel:
+    """
+    Runs a population on each island, in a process of its own and with its own parameters.
+    Islands send their best individuals to their neighbours in the topology every few
+    generations, and share a single fitness store, so an individual simulated on an island
+    is not simulated again on any other one.
+
+    An island whose process dies without giving its result, for instance when killed, makes
+    run raise RuntimeError naming it once the other islands are over.
+
+    Migrants arrive whenever their island sends them, so runs are not repeatable even if seeded.
+    """
+
+    def __init__(self, operators: GeneticOperators, output_directory_path,
+                 topology=MigrationTopology.RING, migration_interval=5, num_migrants=2, poll_time=1.0):
+
+        self._operators = operators
+        self._output_directory = output_directory_path
+        self._topology = topology
+        self._migration_interval = migration_interval
+        self._num_migrants = num_migrants
+        self._poll_time = poll_time
+
+    def run(self, steps, parameters, seeds=None, base_line=None, trace_conf=TraceConfiguration(), verbose=False):
+        """
+        Runs an island for each of the parameters given, which must have different log names.
+        Returns the results of GeneticProgramming.run for each island, in the same order.
+        """
+
+        log_names = [island_parameters.log_name for island_parameters in parameters]
+        if len(set(log_names)) != len(log_names):
+            raise ValueError("Islands must have different log names")
+        if seeds is None:
+            seeds = [None] * len(parameters)
+
+        manager = multiprocessing.Manager()
+        try:
+            fitness_store = SharedFitnessStore(manager.dict(), manager.Lock())
+            inboxes = [manager.Queue() for _ in parameters]
+            results = manager.Queue()
+
+            islands = []
+            for index, (island_parameters, seed) in enumerate(zip(parameters, seeds)):
+                migration = QueueMigration(inboxes[index],
+                                           [inboxes[other]
+                                            for other in neighbours(self._topology, index, len(parameters))],
+                                           self._migration_interval, self._num_migrants)
+                island = multiprocessing.Process(target=_run_island,
+                                                 args=(index, self._operators, self._output_directory, steps,
+                                                       island_parameters, seed, base_line, trace_conf, verbose,
+                                                       fitness_store, migration, results))
+                island.start()
+                islands.append(island)
+
+            island_results = [None] * len(parameters)
+            errors = []
+            pending = set(range(len(islands)))
+            while len(pending) > 0:
+                try:
+                    index, result, error = results.get(timeout=self._poll_time)
+                except queue.Empty:
+                    # An island dying without raising, killed or crashed, never gives its result
+                    for index in sorted(pending):
+                        if not islands[index].is_alive() and results.empty():
+                            pending.remove(index)
+                            errors.append("Island %d died with exit code %s" % (index, islands[index].exitcode))
+                    continue
+
+                pending.discard(index)
+                island_results[index] = result
+                if error is not None:
+                    errors.append("Island %d failed:\n%s" % (index, error))
+
+            for island in islands:
+                island.join()
+        finally:
+            manager.shutdown()
+
+        if len(errors) > 0:
+            raise RuntimeError("\n".join(errors))
+        return island_results
@@ -0,0 +1,99 @@
+"""
+Migration of individuals between the populations of several runs of the algorithm
+"""
+
+import queue
+from enum import Enum, auto
+from interface import Interface, implements
+
+
+class MigrationTopology(Enum):
+    """
+    Enum class for the ways populations send their migrants to each other
+    """
+
+    RING = auto()               # Each population to the next one, the last one to the first
+    FULLY_CONNECTED = auto()    # Each population to all the others
+
+
+def neighbours(topology, index, num_populations):
+    """
+    Populations receiving the migrants of the population at index
+    """
+
+    if num_populations <= 1:
+        return []
+    if topology == MigrationTopology.RING:
+        return [(index + 1) % num_populations]
+    if topology == MigrationTopology.FULLY_CONNECTED:
+        return [other for other in range(num_populations) if other != index]
+    raise ValueError("Unknown migration topology")
+
+
+class Migration(Interface):
+
+    def migrate(self, generation, population, fitness):
+        """
+        Exchanges individuals with other populations, once the survivors of a generation are known
+
+        Parameters:
+            generation (int)
+            population (list)
+            fitness (list) : fitness of each individual
+        Returns:
+            population (list) : same population, with immigrants in place of some individuals
+            fitness (list)
+        """
+        pass
+
+
+class QueueMigration(implements(Migration)):
+    """
+    Every 'interval' generations, sends the best 'num_migrants' individuals of the population
+    to the inboxes of its neighbours, and takes the individuals waiting in its own inbox in
+    place of the worst ones, as long as they are better and not in the population already.
+
+    Inboxes are queues shared between processes, and never waited on, so populations going
+    at different speeds do not hold each other back.
+    """
+
+    def __init__(self, inbox, neighbour_inboxes, interval, num_migrants):
+
+        self._inbox = inbox
+        self._neighbour_inboxes = neighbour_inboxes
+        self._interval = interval
+        self._num_migrants = num_migrants
+
+    def migrate(self, generation, population, fitness):
+
+        if self._interval <= 0 or generation % self._interval != 0:
+            return population, fitness
+
+        best = sorted(range(len(population)), key=lambda i: fitness[i], reverse=True)[:self._num_migrants]
+        migrants = [(population[i], fitness[i]) for i in best]
+        for inbox in self._neighbour_inboxes:
+            inbox.put(migrants)
+
+        population = list(population)
+        fitness = list(fitness)
+        known_keys = {tuple(individual) for individual in population}
+        for individual, individual_fitness in self._receive():
+            if tuple(individual) in known_keys:
+                continue
+            worst = min(range(len(population)), key=lambda i: fitness[i])
+            if individual_fitness > fitness[worst]:
+                known_keys.discard(tuple(population[worst]))
+                population[worst] = individual
+                fitness[worst] = individual_fitness
+                known_keys.add(tuple(individual))
+
+        return population, fitness
+
+    def _receive(self):
+
+        immigrants = []
+        while True:
+            try:
+                immigrants += self._inbox.get_nowait()
+            except queue.Empty:
+                return immigrants
@@ -1,3 +1,4 @@
+import interface
 from interface import Interface
 
 
@@ -40,3 +41,28 @@ class GeneticOperators(Interface):
             genome2
         """
         pass
+
+    @interface.default
+    def canonical_genome(self, genome):
+        """
+        Maps a genome to a normal form shared by all the genomes with the same behavior,
+        by default the genome itself
+
+        Parameters:
+            genome
+        Returns:
+            genome
+        """
+        return genome
+
+    @interface.default
+    def decoded_genome(self, genome):
+        """
+        Maps a genome to the form it is logged and shown in, by default the genome itself
+
+        Parameters:
+            genome
+        Returns:
+            genome
+        """
+        return genome
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 from behavior_tree_learning.core.gp.selection import SelectionMethods
+from behavior_tree_learning.core.gp.evaluation import EvaluationMethods
+from behavior_tree_learning.core.gp.hash_table import EvictionPolicies
 
 
 @dataclass
@@ -27,8 +29,20 @@ class GeneticParameters:
     boost_baseline_only_co: bool = True                    # Baseline is boosted for crossover selection, not mutation
     n_generations: int = 100                               # Maximum number of generations
     fitness_threshold: float = 0.0                         # Finish when best fitness is over this threshold
-    hash_table_size: int = 100000                          # Size of hash table
-    rerun_fitness: int = 0                                 # 0-run only once, 1-according to prob, 2-always
+    hash_table_size: int = None                            # Deprecated and ignored, the fitness cache has no size
+    rerun_fitness: int = 0                                 # 0-run only once, 1-according to prob, 2-always, 3-racing
+    rerun_confidence: float = 2.0                          # Standard errors of the bounds raced by rerun 3
+    canonical_cache: bool = False                          # Fitness is cached by the canonical form of genomes
+    fitness_samples: int = 0                               # Raw fitness values cached per genome, None for all
+    cache_capacity: int = None                             # Genomes kept in the fitness cache, None for all
+    cache_eviction: int = EvictionPolicies.LRU             # Genomes evicted first from a full fitness cache
+    early_termination: bool = False                        # Offspring episodes stop once worse than population
+    static_screening: bool = False                         # Fitness estimates may replace simulations
+    steady_state: bool = False                             # Offspring join the population once evaluated
+    evaluation: int = EvaluationMethods.SERIAL             # Evaluation method for each batch of individuals
+    n_workers: int = 1                                     # Number of worker processes or concurrent episodes
+    broker_address: tuple = ('', 50000)                    # Where distributed workers find the broker
+    broker_authkey: bytes = None                           # Key shared with the distributed workers
     log_name: str = '1'                                    # Name of log for folder and file handling
 
 
@@ -31,6 +31,40 @@ class AlgorithmSteps(Interface):
     def calculate_fitness(self, individual, verbose):
         pass
 
+    @interface.default
+    async def calculate_fitness_async(self, individual, verbose):
+        """
+        Same as calculate_fitness, as a coroutine to run concurrently with others.
+        By default it does not wait on anything, running the evaluation at once.
+        """
+        return self.calculate_fitness(individual, verbose)
+
+    @interface.default
+    def calculate_fitness_batch(self, individuals, verbose):
+        return [self.calculate_fitness(individual, verbose) for individual in individuals]
+
+    @interface.default
+    def calculate_fitness_bounded(self, individual, cutoff, verbose):
+        """
+        Same as calculate_fitness, but the evaluation may stop as soon as the fitness is known
+        to be below cutoff. Returns the fitness and whether it is exact, when it is not the
+        returned value is an upper bound of the fitness below cutoff.
+        """
+        return self.calculate_fitness(individual, verbose), True
+
+    @interface.default
+    def calculate_fitness_batch_bounded(self, individuals, cutoff, verbose):
+        return [self.calculate_fitness_bounded(individual, cutoff, verbose) for individual in individuals]
+
+    @interface.default
+    def estimate_fitness(self, individual):
+        """
+        Cheap estimate of the fitness, without simulating the individual. Returns None when there
+        is no estimate, or the fitness and whether it is exact, when it is not the returned value
+        is an upper bound of the fitness.
+        """
+        return None
+
     @interface.default
     def more_generations(self, generation, last_generation, fitness_achieved):
         pass
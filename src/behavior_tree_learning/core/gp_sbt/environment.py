@@ -1,5 +1,7 @@
+import interface
 from interface import Interface, implements
-from behavior_tree_learning.core.sbt import BehaviorNodeFactory, StringBehaviorTree, ExecutionParameters
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, StringBehaviorTree, ExecutionParameters, \
+    ExecutionBackend, BehaviorTreeCache, SubtreeTraceCache, make_behavior_tree
 from behavior_tree_learning.core.gp_sbt.world_factory import WorldFactory
 from behavior_tree_learning.core.gp_sbt.fitness_function import FitnessFunction
 
@@ -18,6 +20,41 @@ class Environment(Interface):
         """
         pass
 
+    @interface.default
+    async def run_and_compute_async(self, individual, verbose):
+        """
+        Same as GeneticEnvironment.run_and_compute_async
+        """
+        return self.run_and_compute(individual, verbose)
+
+    @interface.default
+    def run_and_compute_batch(self, individuals, verbose):
+        """
+        Same as GeneticEnvironment.run_and_compute_batch
+        """
+        return [self.run_and_compute(individual, verbose) for individual in individuals]
+
+    @interface.default
+    def run_and_compute_bounded(self, individual, cutoff, verbose):
+        """
+        Same as GeneticEnvironment.run_and_compute_bounded
+        """
+        return self.run_and_compute(individual, verbose), True
+
+    @interface.default
+    def run_and_compute_batch_bounded(self, individuals, cutoff, verbose):
+        """
+        Same as GeneticEnvironment.run_and_compute_batch_bounded
+        """
+        return [self.run_and_compute_bounded(individual, cutoff, verbose) for individual in individuals]
+
+    @interface.default
+    def estimate_fitness(self, individual):
+        """
+        Same as GeneticEnvironment.estimate_fitness
+        """
+        return None
+
     def plot_individual(self, path, plot_name, individual):
         """
         Saves a graphical representation of the individual
@@ -38,12 +75,16 @@ class EnvironmentWithFitnessFunction(implements(Environment)):
                  node_factory: BehaviorNodeFactory,
                  world_factory: WorldFactory,
                  fitness_function: FitnessFunction,
-                 verbose=False):
+                 verbose=False, tree_cache_size=0, trace_cache_size=0,
+                 execution_backend=ExecutionBackend.PY_TREES):
 
         self._node_factory = node_factory
         self._world_factory = world_factory
         self._fitness_function = fitness_function
         self._verbose = verbose
+        self._tree_cache = BehaviorTreeCache(node_factory, tree_cache_size)
+        self._trace_cache = SubtreeTraceCache(trace_cache_size) if trace_cache_size > 0 else None
+        self._execution_parameters = ExecutionParameters(successes_required=1, backend=execution_backend)
 
     def run_and_compute(self, individual, verbose):
 
@@ -55,19 +96,34 @@ class EnvironmentWithFitnessFunction(implements(Environment)):
 
         world = self._world_factory.make()
 
-        tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=world, verbose=verbose)
-        success, ticks = tree.run_bt(parameters=ExecutionParameters(successes_required=1))
+        tree = self._tree_cache.get(sbt, world, verbose, self._execution_parameters.backend,
+                                    trace_cache=self._trace_cache)
+        success, ticks = tree.run_bt(parameters=self._execution_parameters)
 
-        fitness = FitnessFunction().compute_cost(world, tree, ticks, self._targets,
-                                                 self._fitness_coefficients, verbose=verbose)
+        fitness = self._fitness_function.compute_cost(world, tree, ticks, verbose)
 
         if verbose_enabled:
             print("fitness: ", fitness)
 
         return fitness
 
+    async def run_and_compute_async(self, individual, verbose):
+        """
+        Runs the episode in an AsyncWorld. Episodes may run at the same time, so each one
+        gets its own tree, and the factory must make a new world every time.
+        """
+
+        sbt = list(individual)
+        world = self._world_factory.make()
+
+        tree = make_behavior_tree(sbt, behaviors=self._node_factory, world=world, verbose=verbose,
+                                  backend=self._execution_parameters.backend)
+        _, ticks = await tree.run_bt_async(parameters=self._execution_parameters)
+
+        return self._fitness_function.compute_cost(world, tree, ticks, verbose)
+
     def plot_individual(self, path, plot_name, individual):
 
         sbt = list(individual)
-        tree = StringBehaviorTree(sbt[:], behaviors=self._node_factory)
+        tree = StringBehaviorTree(sbt, behaviors=self._node_factory)
         tree.save_figure(path, name=plot_name)
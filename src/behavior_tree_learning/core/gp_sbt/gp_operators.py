@@ -1,17 +1,21 @@
 import random
+from array import array
 from interface import implements
 from behavior_tree_learning.core.gp import GeneticOperators
 from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation
+from behavior_tree_learning.core.sbt.behavior_tree import EncodedBehaviorTreeRepresentation, decode
 
 
 class Operators(implements(GeneticOperators)):
 
+    _representation = BehaviorTreeStringRepresentation
+
     def random_genome(self, length):
         """
         Returns a random genome
         """
 
-        bt = BehaviorTreeStringRepresentation([])
+        bt = self._representation([])
         return bt.random(length)
 
     def mutate_gene(self, genome, p_add, p_delete):
@@ -25,7 +29,7 @@ class Operators(implements(GeneticOperators)):
         if p_add + p_delete > 1:
             raise Exception("Sum of the mutation probabilities must be less than 1.")
 
-        mutated_individual = BehaviorTreeStringRepresentation([])
+        mutated_individual = self._representation([])
         max_attempts = 100
         attempts = 0
         while (not mutated_individual.is_valid() or mutated_individual.bt == genome) and attempts < max_attempts:
@@ -45,7 +49,7 @@ class Operators(implements(GeneticOperators)):
             attempts += 1
 
         if attempts >= max_attempts and (not mutated_individual.is_valid() or mutated_individual.bt == genome):
-            mutated_individual = BehaviorTreeStringRepresentation([])
+            mutated_individual = self._representation([])
 
         return mutated_individual.bt
 
@@ -54,10 +58,10 @@ class Operators(implements(GeneticOperators)):
         Do crossover between genomes at random points
         """
 
-        bt1 = BehaviorTreeStringRepresentation(genome1)
-        bt2 = BehaviorTreeStringRepresentation(genome2)
-        offspring1 = BehaviorTreeStringRepresentation([])
-        offspring2 = BehaviorTreeStringRepresentation([])
+        bt1 = self._representation(genome1)
+        bt2 = self._representation(genome2)
+        offspring1 = self._representation([])
+        offspring2 = self._representation([])
 
         if bt1.is_valid() and bt2.is_valid():
             max_attempts = 100
@@ -103,3 +107,36 @@ class Operators(implements(GeneticOperators)):
                 offspring2.set([])
 
         return offspring1.bt, offspring2.bt
+
+    def canonical_genome(self, genome):
+        """
+        Returns the normal form of the genome
+        """
+
+        return self._representation(genome).canonical()
+
+
+class EncodedOperators(Operators):
+    """
+    Operators for genomes encoded as arrays of node ids, see behavior_tree.encode.
+    They edit the node ids directly, following the same rules as Operators.
+    """
+
+    _representation = EncodedBehaviorTreeRepresentation
+
+    def random_genome(self, length):
+        return array('H', super().random_genome(length))
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        return array('H', super().mutate_gene(list(genome), p_add, p_delete))
+
+    def crossover_genome(self, genome1, genome2, replace):
+
+        offspring1, offspring2 = super().crossover_genome(genome1, genome2, replace)
+        return array('H', offspring1), array('H', offspring2)
+
+    def canonical_genome(self, genome):
+        return array('H', super().canonical_genome(genome))
+
+    def decoded_genome(self, genome):
+        return decode(genome)
@@ -1,22 +1,32 @@
 from interface import implements
 from behavior_tree_learning.core.gp import GeneticEnvironment, make_steps
 from behavior_tree_learning.core.gp import GeneticParameters, TraceConfiguration
-from behavior_tree_learning.core.gp import AlgorithmSteps
-from behavior_tree_learning.core.gp import GeneticProgramming
+from behavior_tree_learning.core.gp import AlgorithmSteps, FitnessStore
+from behavior_tree_learning.core.gp import GeneticProgramming, run_evaluation_worker
+from behavior_tree_learning.core.gp import IslandModel, MigrationTopology
 from behavior_tree_learning.core.gp_sbt.environment \
     import Environment, EnvironmentWithFitnessFunction
 from behavior_tree_learning.core.gp_sbt.gp_operators \
-    import Operators as GeneticOperatorsForSBT
+    import Operators as GeneticOperatorsForSBT, EncodedOperators as EncodedGeneticOperatorsForSBT
+from behavior_tree_learning.core.sbt.behavior_tree import encode, decode
 
 
 class BehaviorTreeLearner:
 
     @staticmethod
-    def from_environment(environment: Environment):
+    def from_environment(environment: Environment, encoded_genomes=False):
+        """
+        With encoded genomes the algorithm works with arrays of node ids, which are
+        decoded before passing them to the environment
+        """
 
         bt = BehaviorTreeLearner()
-        bt._gp_operators = GeneticOperatorsForSBT()
-        bt._steps = make_steps(_EnvironmentAdapter(environment))
+        if encoded_genomes:
+            bt._gp_operators = EncodedGeneticOperatorsForSBT()
+        else:
+            bt._gp_operators = GeneticOperatorsForSBT()
+        bt._steps = make_steps(_EnvironmentAdapter(environment, encoded_genomes))
+        bt._encoded_genomes = encoded_genomes
         return bt
 
     @staticmethod
@@ -30,26 +40,85 @@ class BehaviorTreeLearner:
     def __init__(self):
         self._gp_operators = None
         self._steps = None
+        self._encoded_genomes = False
 
     def run(self, parameters: GeneticParameters, seed=None, hot_start=False, base_line=None, verbose=False,
-            outputs_dir_path="", trace_conf=TraceConfiguration()):
+            outputs_dir_path="", trace_conf=TraceConfiguration(), fitness_store: FitnessStore = None):
+        """
+        A fitness store shares fitness values with other runs, such as other trials of the
+        same scenario, see GeneticProgramming.run
+        """
 
         if not self._gp_operators or not self._steps:
             raise RuntimeError("Object not created correctly, a factory method should be used")
 
+        if self._encoded_genomes and base_line is not None:
+            base_line = encode(base_line)
+
         gp = GeneticProgramming(self._gp_operators, outputs_dir_path)
-        gp.run(self._steps, parameters, seed, hot_start, base_line, trace_conf=trace_conf, verbose=verbose)
+        gp.run(self._steps, parameters, seed, hot_start, base_line, trace_conf=trace_conf, verbose=verbose,
+               fitness_store=fitness_store)
+
+        return True
+
+    def run_islands(self, parameters: list, seeds=None, topology=MigrationTopology.RING, migration_interval=5,
+                    num_migrants=2, base_line=None, verbose=False, outputs_dir_path="",
+                    trace_conf=TraceConfiguration()):
+        """
+        Runs an island of the island model for each of the parameters, see IslandModel
+        """
+
+        if not self._gp_operators or not self._steps:
+            raise RuntimeError("Object not created correctly, a factory method should be used")
+
+        if self._encoded_genomes and base_line is not None:
+            base_line = encode(base_line)
+
+        islands = IslandModel(self._gp_operators, outputs_dir_path, topology, migration_interval, num_migrants)
+        islands.run(self._steps, parameters, seeds, base_line, trace_conf=trace_conf, verbose=verbose)
 
         return True
 
+    def serve_evaluations(self, address, authkey, max_tasks=None):
+        """
+        Runs as a worker of a learner with distributed evaluation, evaluating individuals in the
+        environment of this one until the broker at address shuts down. Returns how many were.
+        """
+
+        if not self._steps:
+            raise RuntimeError("Object not created correctly, a factory method should be used")
+
+        return run_evaluation_worker(self._steps, address, authkey, max_tasks)
+
 
 class _EnvironmentAdapter(implements(GeneticEnvironment)):
 
-    def __init__(self, environment_):
+    def __init__(self, environment_, encoded_genomes=False):
         self._environment = environment_
+        self._encoded_genomes = encoded_genomes
 
     def run_and_compute(self, individual, verbose):
-        return self._environment.run_and_compute(individual, verbose)
+        return self._environment.run_and_compute(self._decode(individual), verbose)
+
+    async def run_and_compute_async(self, individual, verbose):
+        return await self._environment.run_and_compute_async(self._decode(individual), verbose)
+
+    def run_and_compute_batch(self, individuals, verbose):
+        return self._environment.run_and_compute_batch([self._decode(individual) for individual in individuals],
+                                                       verbose)
+
+    def run_and_compute_bounded(self, individual, cutoff, verbose):
+        return self._environment.run_and_compute_bounded(self._decode(individual), cutoff, verbose)
+
+    def run_and_compute_batch_bounded(self, individuals, cutoff, verbose):
+        return self._environment.run_and_compute_batch_bounded(
+            [self._decode(individual) for individual in individuals], cutoff, verbose)
+
+    def estimate_fitness(self, individual):
+        return self._environment.estimate_fitness(self._decode(individual))
 
     def plot_individual(self, path, plot_name, individual):
-        self._environment.plot_individual(path, plot_name, individual)
+        self._environment.plot_individual(path, plot_name, self._decode(individual))
+
+    def _decode(self, individual):
+        return decode(individual) if self._encoded_genomes else individual
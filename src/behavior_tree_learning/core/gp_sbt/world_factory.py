@@ -1,7 +1,45 @@
-from interface import Interface
+from interface import Interface, implements
 
 
 class WorldFactory(Interface):
 
     def make(self):
         pass
+
+
+class PrototypeWorldFactory(implements(WorldFactory)):
+    """
+    Makes a single world, the prototype, and for every episode after the first one restores it
+    in place to the state it was made in, with World.snapshot() and restore(). This is cheaper
+    than making a new world when that means setting up the whole simulation again.
+
+    Each world made is the same object, so the world of an episode is not valid any longer
+    once the next one is made.
+    """
+
+    def __init__(self, world_factory: WorldFactory):
+
+        self._world_factory = world_factory
+        self._world = None
+        self._snapshot = None
+
+    def __getstate__(self):
+
+        # Other processes make their own prototype
+        state = self.__dict__.copy()
+        state['_world'] = None
+        state['_snapshot'] = None
+        return state
+
+    def make(self):
+
+        if self._world is None:
+            world = self._world_factory.make()
+            snapshot = world.snapshot()
+            if snapshot is None:
+                raise ValueError("The world cannot be restored, it gives no snapshot")
+            self._world, self._snapshot = world, snapshot
+        else:
+            self._world.restore(self._snapshot)
+
+        return self._world
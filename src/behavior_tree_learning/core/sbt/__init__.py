@@ -2,6 +2,11 @@ from behavior_tree_learning.core.sbt.behavior_tree import BehaviorTreeStringRepr
 from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory, BehaviorRegister, \
     BehaviorNode, BehaviorNodeWithOperation
 from behavior_tree_learning.core.sbt.executor import BehaviorTreeExecutor
-from behavior_tree_learning.core.sbt.py_tree import StringBehaviorTree, ExecutionParameters
-from behavior_tree_learning.core.sbt.world import World
+from behavior_tree_learning.core.sbt.py_tree import StringBehaviorTree, ExecutionParameters, ExecutionBackend
+from behavior_tree_learning.core.sbt.tick_engine import NativeBehaviorTree, make_behavior_tree
+from behavior_tree_learning.core.sbt.batch_engine import BatchBehaviorTrees, BatchStatus, VectorizedBehaviorNode
+from behavior_tree_learning.core.sbt.tree_cache import BehaviorTreeCache
+from behavior_tree_learning.core.sbt.trace_cache import SubtreeTraceCache
+from behavior_tree_learning.core.sbt.static_analysis import StaticAnalysis, Outcome
+from behavior_tree_learning.core.sbt.world import World, VectorizedWorld, AsyncWorld
 from behavior_tree_learning.core.sbt.graphics import plot_behavior_tree
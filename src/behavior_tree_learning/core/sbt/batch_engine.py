@@ -0,0 +1,426 @@
+"""
+Engine ticking the trees of many strings in lock-step, each one in its own lane of a vectorized world
+"""
+
+import time
+from enum import IntEnum
+import numpy as np
+import interface
+from interface import Interface
+from behavior_tree_learning.core.sbt.world import VectorizedWorld
+from behavior_tree_learning.core.sbt.behavior_tree import BehaviorTreeStringRepresentation
+from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory
+from behavior_tree_learning.core.sbt.py_tree import ExecutionParameters
+from behavior_tree_learning.core.sbt.tick_engine import NODE_KIND_LEAF, NODE_KIND_FALLBACK, NODE_KIND_SEQUENCE, \
+    NODE_KIND_PARALLEL, node_kind
+
+
+class BatchStatus(IntEnum):
+    """
+    Codes of the status of the nodes, same meaning as py_trees.common.Status
+    """
+
+    INVALID = 0
+    RUNNING = 1
+    SUCCESS = 2
+    FAILURE = 3
+
+
+_INVALID = int(BatchStatus.INVALID)
+_RUNNING = int(BatchStatus.RUNNING)
+_SUCCESS = int(BatchStatus.SUCCESS)
+_FAILURE = int(BatchStatus.FAILURE)
+
+
+class VectorizedBehaviorNode(Interface):
+    """
+    Behavior acting on all the lanes of a vectorized world at once.
+
+    Like a BehaviorNode it is made with make(text, world, verbose), but a single object is made
+    for each behavior of a batch and it acts for all the nodes of that behavior in the trees of
+    the batch. Methods are given the lanes and the nodes to act on, and 'memory', an array of
+    integers with an entry per node, starting at 0, where behaviors may keep their state.
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        pass
+
+    @interface.default
+    def initialise(self, lanes, nodes, memory):
+        pass
+
+    @interface.default
+    def update(self, lanes, nodes, memory):
+        """
+        Returns an array with the BatchStatus of each node
+        """
+        return np.full(len(nodes), _SUCCESS, dtype=np.int8)
+
+    @interface.default
+    def terminate(self, lanes, nodes, new_status, memory):
+        pass
+
+
+class BatchBehaviorTrees:
+    """
+    Runs the trees of several strings, the tree of the i-th string in the lane i of a vectorized
+    world, with the semantics of StringBehaviorTree.
+
+    Trees are ticked together: at each step every tree moves one node, entering it or returning
+    from it, and the behaviors entered by the trees are updated with a single call for all of
+    them. Nodes of all the trees are kept in a single table, the nodes of a tree follow the
+    order in its string and a subtree takes a contiguous range of the table.
+
+    A stopped subtree only terminates the behaviors of it that were not INVALID already.
+    """
+
+    def __init__(self, strings, behaviors: BehaviorNodeFactory, world: VectorizedWorld, verbose=False):
+
+        if len(strings) != world.size():
+            raise ValueError("Expected a string for each of the %d lanes of the world" % world.size())
+
+        self._world = world
+        self._behavior_factory = behaviors
+        self._verbose = verbose
+
+        self._kinds = []
+        self._lanes = []
+        self._parents = []
+        self._first_children = []
+        self._next_siblings = []
+        self._ends = []
+        self._kernel_ids = []
+        self._kernels = []
+        self._kernels_by_name = {}
+
+        self.depth = []
+        self.length = []
+        roots = []
+        for lane, string in enumerate(strings):
+            bt = BehaviorTreeStringRepresentation(string)
+            self.depth.append(bt.depth())
+            self.length.append(bt.length())
+            roots.append(self._compile(lane, string))
+
+        self._roots = np.array(roots, dtype=np.intp)
+        self._kind = np.array(self._kinds, dtype=np.int8)
+        self._lane = np.array(self._lanes, dtype=np.intp)
+        self._parent = np.array(self._parents, dtype=np.intp)
+        self._first_child = np.array(self._first_children, dtype=np.intp)
+        self._next_sibling = np.array(self._next_siblings, dtype=np.intp)
+        self._end = np.array(self._ends, dtype=np.intp)
+        self._kernel = np.array(self._kernel_ids, dtype=np.intp)
+        self._terminates = [type(kernel).terminate is not VectorizedBehaviorNode.terminate.implementation
+                            for kernel in self._kernels]
+        self._any_terminates = any(self._terminates)
+
+        self._status = np.zeros(len(self._kinds), dtype=np.int8)
+        self._current = np.full(len(self._kinds), -1, dtype=np.intp)
+        self._previous = np.full(len(self._kinds), -1, dtype=np.intp)
+        self.memory = np.zeros(len(self._kinds), dtype=np.int64)
+
+        self.failed = np.zeros(len(strings), dtype=bool)
+        self.timeout = np.zeros(len(strings), dtype=bool)
+        self.aborted = np.zeros(len(strings), dtype=bool)
+
+    def _compile(self, lane, string):
+
+        root = len(self._kinds)
+        last_children = {}
+        parents = []
+        for name in string:
+            if name == ")":
+                if len(parents) == 0:
+                    break
+                self._ends[parents.pop()] = len(self._kinds)
+                if len(parents) == 0:
+                    break
+                continue
+
+            index = len(self._kinds)
+            parent = parents[-1] if len(parents) > 0 else -1
+            if parent >= 0:
+                if parent in last_children:
+                    self._next_siblings[last_children[parent]] = index
+                else:
+                    self._first_children[parent] = index
+                last_children[parent] = index
+
+            kind = node_kind(name)
+            self._kinds.append(kind)
+            self._lanes.append(lane)
+            self._parents.append(parent)
+            self._first_children.append(-1)
+            self._next_siblings.append(-1)
+            self._ends.append(index + 1)
+            self._kernel_ids.append(self._kernel_id(name) if kind == NODE_KIND_LEAF else -1)
+
+            if kind != NODE_KIND_LEAF:
+                parents.append(index)
+            elif len(parents) == 0:
+                # A single behavior is the whole tree
+                break
+
+        for parent in parents:
+            self._ends[parent] = len(self._kinds)
+
+        if len(self._kinds) == root:
+            raise Exception("Unexpected character", string[0] if len(string) > 0 else None)
+        return root
+
+    def _kernel_id(self, name):
+
+        if name not in self._kernels_by_name:
+            node, has_children = self._behavior_factory.make_node(name, self._world, self._verbose)
+            if node is None or has_children:
+                raise Exception("Unexpected character", name)
+            self._kernels_by_name[name] = len(self._kernels)
+            self._kernels.append(node)
+        return self._kernels_by_name[name]
+
+    @property
+    def status(self):
+        """
+        Status of the root of every tree
+        """
+        return self._status[self._roots]
+
+    def statuses(self, lane):
+        """
+        Returns the status of every node of the tree of a lane, in the order of the nodes in its string
+        """
+
+        root = self._roots[lane]
+        return [BatchStatus(status) for status in self._status[root:self._end[root]]]
+
+    def tick_once(self, lanes=None):
+        """
+        Ticks the trees of the given lanes, all of them by default
+        """
+
+        if lanes is None:
+            lanes = np.arange(len(self._roots))
+        self._tick(np.asarray(lanes, dtype=np.intp))
+
+    def _tick(self, lanes):
+
+        # For every tree, the node it is at and whether it is entering it or returning from it
+        pc = self._roots[lanes]
+        entering = np.ones(len(lanes), dtype=bool)
+        active = np.arange(len(lanes))
+
+        while active.size > 0:
+            nodes = pc[active]
+            is_entering = entering[active]
+            is_leaf = self._kind[nodes] == NODE_KIND_LEAF
+
+            controls = is_entering & ~is_leaf
+            if controls.any():
+                self._enter_controls(nodes[controls], active[controls], pc, entering)
+
+            leaves = is_entering & is_leaf
+            if leaves.any():
+                self._update_behaviors(lanes[active[leaves]], nodes[leaves])
+                entering[active[leaves]] = False
+
+            returning = ~is_entering
+            if returning.any():
+                finished = self._return_to_parents(nodes[returning], active[returning], pc, entering)
+                if finished.size > 0:
+                    active = np.setdiff1d(active, finished, assume_unique=True)
+
+    def _enter_controls(self, nodes, items, pc, entering):
+
+        status = self._status
+        kinds = self._kind[nodes]
+        not_running = status[nodes] != _RUNNING
+
+        # A fallback restarts from its first child, a parallel stops its children
+        restarting = nodes[(kinds == NODE_KIND_FALLBACK) & not_running]
+        self._current[restarting] = self._first_child[restarting]
+        for node in nodes[(kinds == NODE_KIND_PARALLEL) & not_running]:
+            self._stop_range(node + 1, self._end[node])
+            self._current[node] = -1
+
+        with_previous = nodes[kinds != NODE_KIND_PARALLEL]
+        self._previous[with_previous] = self._current[with_previous]
+
+        first_children = self._first_child[nodes]
+        empty = first_children < 0
+        if empty.any():
+            self._current[nodes[empty]] = -1
+            status[nodes[empty & (kinds == NODE_KIND_FALLBACK)]] = _FAILURE
+            status[nodes[empty & (kinds != NODE_KIND_FALLBACK)]] = _SUCCESS
+            entering[items[empty]] = False
+        pc[items[~empty]] = first_children[~empty]
+
+    def _update_behaviors(self, lanes, nodes):
+
+        status = self._status
+        kernel_ids = self._kernel[nodes]
+        order = np.argsort(kernel_ids, kind='stable')
+        bounds = np.flatnonzero(np.diff(kernel_ids[order])) + 1
+
+        for group in np.split(order, bounds):
+            kernel_id = kernel_ids[group[0]]
+            kernel = self._kernels[kernel_id]
+            group_lanes = lanes[group]
+            group_nodes = nodes[group]
+
+            initialising = status[group_nodes] != _RUNNING
+            if initialising.any():
+                kernel.initialise(group_lanes[initialising], group_nodes[initialising], self.memory)
+
+            new_status = np.asarray(kernel.update(group_lanes, group_nodes, self.memory), dtype=np.int8)
+
+            if self._terminates[kernel_id]:
+                terminating = new_status != _RUNNING
+                if terminating.any():
+                    kernel.terminate(group_lanes[terminating], group_nodes[terminating],
+                                     new_status[terminating], self.memory)
+            status[group_nodes] = new_status
+
+    def _return_to_parents(self, children, items, pc, entering):
+
+        status = self._status
+        parents = self._parent[children]
+        finished = items[parents < 0]
+
+        returning = parents >= 0
+        children, parents, items = children[returning], parents[returning], items[returning]
+        kinds = self._kind[parents]
+        child_status = status[children]
+
+        # A fallback or sequence returns the status of the child, invalidating the
+        # children after it when the child it returns from has changed
+        returns_at = (((kinds == NODE_KIND_FALLBACK) & ((child_status == _RUNNING) | (child_status == _SUCCESS)))
+                      | ((kinds == NODE_KIND_SEQUENCE) & ((child_status == _RUNNING) | (child_status == _FAILURE))))
+        if returns_at.any():
+            at_children, at_parents = children[returns_at], parents[returns_at]
+            changed = self._previous[at_parents] != at_children
+            self._current[at_parents] = at_children
+            status[at_parents] = child_status[returns_at]
+            for start, end in zip(self._end[at_children[changed]], self._end[at_parents[changed]]):
+                if start < end:
+                    self._stop_range(start, end)
+            pc[items[returns_at]] = at_parents
+
+        next_siblings = self._next_sibling[children]
+        to_next = ~returns_at & (next_siblings >= 0)
+        pc[items[to_next]] = next_siblings[to_next]
+        entering[items[to_next]] = True
+
+        after_last = ~returns_at & (next_siblings < 0)
+        if after_last.any():
+            last_children, last_parents, last_kinds = children[after_last], parents[after_last], kinds[after_last]
+            self._current[last_parents] = last_children
+            status[last_parents[last_kinds == NODE_KIND_FALLBACK]] = _FAILURE
+            status[last_parents[last_kinds == NODE_KIND_SEQUENCE]] = _SUCCESS
+            for parent in last_parents[last_kinds == NODE_KIND_PARALLEL]:
+                self._finish_parallel(parent)
+            pc[items[after_last]] = last_parents
+
+        return finished
+
+    def _finish_parallel(self, parent):
+
+        status = self._status
+        children = []
+        child = self._first_child[parent]
+        while child >= 0:
+            children.append(child)
+            child = self._next_sibling[child]
+
+        new_status = _RUNNING
+        for child in children:
+            if status[child] == _FAILURE:
+                new_status = _FAILURE
+                self._current[parent] = child
+                break
+        else:
+            if all(status[child] == _SUCCESS for child in children):
+                new_status = _SUCCESS
+
+        if new_status != _RUNNING:
+            for child in children:
+                if status[child] == _RUNNING:
+                    self._stop_range(child, self._end[child])
+        status[parent] = new_status
+
+    def _stop_range(self, start, end):
+        # Stops with INVALID the subtrees in the range of nodes
+
+        if self._any_terminates:
+            nodes = np.arange(start, end)
+            nodes = nodes[(self._kind[nodes] == NODE_KIND_LEAF) & (self._status[nodes] != _INVALID)]
+            for node in nodes:
+                kernel_id = self._kernel[node]
+                if self._terminates[kernel_id]:
+                    self._kernels[kernel_id].terminate(self._lane[node:node + 1], np.array([node]),
+                                                       np.array([_INVALID], dtype=np.int8), self.memory)
+
+        self._status[start:end] = _INVALID
+        self._current[start:end] = -1
+
+    def run_bt(self, parameters: ExecutionParameters = ExecutionParameters(), abort=None):
+        """
+        Executes the trees, same as StringBehaviorTree.run_bt for each lane.
+        Returns arrays with the status and the number of ticks of every lane.
+        When given, abort(ticks) returns for every lane whether to stop its episode.
+        """
+
+        num_lanes = len(self._roots)
+        status_ok = np.array(self._world.startup(self._verbose), dtype=bool).reshape(num_lanes)
+        started = status_ok.copy()
+
+        max_ticks = parameters.max_ticks
+        max_time = parameters.max_time
+        max_straight_fails = parameters.max_straight_fails
+        successes_required = parameters.successes_required
+
+        ticks = np.zeros(num_lanes, dtype=np.int64)
+        straight_fails = np.zeros(num_lanes, dtype=np.int64)
+        successes = np.zeros(num_lanes, dtype=np.int64)
+        aborted = np.zeros(num_lanes, dtype=bool)
+        start = time.time()
+
+        while True:
+            root_status = self._status[self._roots]
+            running = (((root_status != _FAILURE) | (straight_fails < max_straight_fails))
+                       & ((root_status != _SUCCESS) | (successes < successes_required))
+                       & (ticks < max_ticks) & status_ok & ~aborted)
+            if abort is not None and running.any():
+                aborted |= running & np.asarray(abort(ticks), dtype=bool).reshape(num_lanes)
+                running &= ~aborted
+            if not running.any():
+                break
+
+            alive = np.array(self._world.is_alive(), dtype=bool).reshape(num_lanes)
+            status_ok[running] = alive[running]
+            lanes = np.flatnonzero(running & alive)
+            if lanes.size == 0:
+                continue
+
+            self._tick(lanes)
+
+            ticks[lanes] += 1
+            root_status = self._status[self._roots[lanes]]
+            successes[lanes] = np.where(root_status == _SUCCESS, successes[lanes] + 1, 0)
+            straight_fails[lanes] = np.where(root_status == _FAILURE, straight_fails[lanes] + 1, 0)
+
+            if time.time() - start > max_time:
+                status_ok[lanes] = False
+                if self._verbose:
+                    print("Max time expired")
+
+        if self._verbose:
+            print("Status: %s Ticks: %s, Time: %s" % (status_ok, ticks, time.time() - start))
+
+        self.timeout = started & (ticks >= max_ticks)
+        self.failed = started & (straight_fails >= max_straight_fails)
+        self.aborted = aborted
+
+        self._world.shutdown()
+
+        return status_ok, ticks
@@ -2,6 +2,7 @@
 Class for handling string representations of behavior trees
 """
 import random
+from array import array
 import yaml
 
 FALLBACK_NODES = []
@@ -67,6 +68,135 @@ Basically leaf nodes that actually do something and that may be implemented as t
 
 ALL_NODES = []
 
+NODE_TYPE_UP = 0
+NODE_TYPE_FALLBACK = 1
+NODE_TYPE_SEQUENCE = 2
+NODE_TYPE_CONTROL = 3
+NODE_TYPE_CONDITION = 4
+NODE_TYPE_ACTION = 5
+NODE_TYPE_ATOMIC_FALLBACK = 6
+NODE_TYPE_ATOMIC_SEQUENCE = 7
+"""
+Type codes of the nodes, NODE_TYPE_CONTROL is used for control nodes that are neither
+fallbacks nor sequences
+"""
+
+_NODE_TYPES = {}
+"""
+Type code of each node name. Together with the node tables below it is compiled from the lists
+above by _compile_settings, so that checking the type of a node does not depend on the number
+of nodes registered. Lists must not be modified directly, or the tables will be out of date.
+"""
+
+_SYMBOLS = []
+_SYMBOL_IDS = {}
+"""
+Symbol table for encoding bts as arrays of node ids. The id of a node is its position in
+ALL_NODES, so encoded bts are only meaningful with the same settings they were encoded with.
+"""
+
+
+class _NodeTable:
+    """
+    The nodes of the settings as they are written in bts, as names or as node ids, in lists
+    and in frozensets. BehaviorTreeStringRepresentation takes the nodes from a table, so the
+    same code edits bts of names and bts encoded as node ids.
+    """
+
+    def __init__(self, encoded):
+
+        self.encoded = encoded
+        self.compile()
+
+    def _nodes(self, names):
+        return [_SYMBOL_IDS[name] for name in names] if self.encoded else names[:]
+
+    def compile(self):
+
+        self.control_nodes = self._nodes(CONTROL_NODES)
+        self.condition_nodes = self._nodes(CONDITION_NODES)
+        self.leaf_nodes = self._nodes(LEAF_NODES)
+        self.behavior_nodes = self._nodes(BEHAVIOR_NODES)
+        self.up_node = self._nodes(UP_NODE)
+
+        self.fallback_set = frozenset(self._nodes(FALLBACK_NODES))
+        self.sequence_set = frozenset(self._nodes(SEQUENCE_NODES))
+        self.control_set = frozenset(self.control_nodes)
+        self.condition_set = frozenset(self.condition_nodes)
+        self.action_set = frozenset(self._nodes(ACTION_NODES))
+        self.up_set = frozenset(self.up_node)
+        self.leaf_set = frozenset(self.leaf_nodes)
+        self.behavior_set = frozenset(self.behavior_nodes)
+        self.all_set = frozenset(self._nodes(ALL_NODES))
+
+        self.node_types = dict(zip(self._nodes(list(_NODE_TYPES)), _NODE_TYPES.values()))
+
+
+_NAMES = _NodeTable(encoded=False)
+_NODE_IDS = _NodeTable(encoded=True)
+
+
+def _compile_settings():
+
+    global _NODE_TYPES
+    global _SYMBOLS
+    global _SYMBOL_IDS
+
+    # Filled from the lowest to the highest precedence, as a name may be in several lists
+    node_types = {}
+    for names, type_ in [(ACTION_NODES, NODE_TYPE_ACTION),
+                         (CONDITION_NODES, NODE_TYPE_CONDITION),
+                         (CONTROL_NODES, NODE_TYPE_CONTROL),
+                         (SEQUENCE_NODES, NODE_TYPE_SEQUENCE),
+                         (FALLBACK_NODES, NODE_TYPE_FALLBACK),
+                         (ATOMIC_SEQUENCE_NODES, NODE_TYPE_ATOMIC_SEQUENCE),
+                         (ATOMIC_FALLBACK_NODES, NODE_TYPE_ATOMIC_FALLBACK),
+                         (UP_NODE, NODE_TYPE_UP)]:
+        for name in names:
+            node_types[name] = type_
+    _NODE_TYPES = node_types
+
+    _SYMBOLS = list(dict.fromkeys(ALL_NODES))
+    _SYMBOL_IDS = {name: id_ for id_, name in enumerate(_SYMBOLS)}
+
+    _NAMES.compile()
+    _NODE_IDS.compile()
+
+
+_ALLOWED_CHILDREN = {NODE_TYPE_FALLBACK: (False, True),
+                     NODE_TYPE_SEQUENCE: (True, False),
+                     NODE_TYPE_CONTROL: (True, True)}
+"""
+What the children of each type of control node allow: (fallback_allowed, sequence_allowed)
+"""
+
+
+def get_node_type(name):
+    """
+    Returns the type code of a node, or None if the node is not registered
+    """
+
+    return _NODE_TYPES.get(name)
+
+
+def encode(bt):
+    """
+    Returns the bt encoded as an array of node ids
+    """
+
+    try:
+        return array('H', [_SYMBOL_IDS[node] for node in bt])
+    except KeyError as e:
+        raise Exception('Node not in settings: %s' % e) from e
+
+
+def decode(encoded_bt):
+    """
+    Returns the bt, as a list of nodes, from an array of node ids
+    """
+
+    return [_SYMBOLS[id_] for id_ in encoded_bt]
+
 
 def _clean_settings():
 
@@ -94,6 +224,8 @@ def _clean_settings():
     UP_NODE = []
     ALL_NODES = []
 
+    _compile_settings()
+
 
 def _load_settings(file_path):
 
@@ -176,6 +308,8 @@ def add_node(type_, name):
         UP_NODE.append(name)
         ALL_NODES.append(name)
 
+    _compile_settings()
+
 
 def load_settings_from_file(file_path):
 
@@ -206,6 +340,8 @@ def load_settings_from_file(file_path):
     BEHAVIOR_NODES = nodes['behavior_nodes']
     ALL_NODES = nodes['all_nodes']
 
+    _compile_settings()
+
 
 def get_action_list():
 
@@ -213,24 +349,97 @@ def get_action_list():
     return ACTION_NODES
 
 
+class _StructureIndex:
+    """
+    Structure of a bt computed in one pass: the up node matching each control node, which is
+    also the end of its subtree, the parent of each node and the children of each control node.
+    Up nodes without a control node to match are ignored, and control nodes without an up node
+    get -1. Nodes are looked up in the node table given.
+    """
+
+    def __init__(self, bt, nodes):
+
+        self.bt = list(bt)
+        self.up = [-1] * len(bt)
+        self.parent = [-1] * len(bt)
+        self.children = {}
+
+        stack = []
+        unmatched = 0
+        for i, node in enumerate(bt):
+            parent = stack[-1] if len(stack) > 0 else -1
+            self.parent[i] = parent
+            if node in nodes.up_set:
+                if len(stack) > 0:
+                    self.up[stack.pop()] = i
+                else:
+                    unmatched += 1
+                continue
+            if parent >= 0:
+                self.children[parent].append(i)
+            if node in nodes.control_set:
+                self.children[i] = []
+                stack.append(i)
+
+        # Whether the bt is a control node with its subtree, closed by the last node
+        self.is_tree = len(stack) == 0 and unmatched == 0 and len(bt) > 1 and self.up[0] == len(bt) - 1
+
+
 class BehaviorTreeStringRepresentation:
     """
     Represent a string behavior tree (SBT), it converts a string to a string behavior tree.
+
+    Structural queries use an index that is built when needed and discarded whenever the bt
+    changes. Once the list of nodes has been handed out through the bt property, it may be
+    changed in place, so the index is then checked against the nodes it was built from.
     """
 
+    _nodes = _NAMES
+
     def __init__(self, bt):
         """
         Creates a bt from string
         """
 
-        self.bt = bt[:]
+        self._set_bt(bt[:])
+
+    @property
+    def bt(self):
+        self._handed_out = True
+        return self._bt
+
+    @bt.setter
+    def bt(self, bt):
+        self._bt = bt
+        self._index = None
+        self._handed_out = True
+
+    def _set_bt(self, bt):
+        """
+        Sets a list of nodes not known outside
+        """
+
+        self._bt = bt
+        self._index = None
+        self._handed_out = False
+
+    def _structure(self):
+
+        if self._index is not None and self._handed_out and self._index.bt != self._bt:
+            self._index = None
+        if self._index is None:
+            self._index = _StructureIndex(self._bt, self._nodes)
+        return self._index
+
+    def _invalidate_structure(self):
+        self._index = None
 
     def set(self, bt):
         """
         Sets bt from string
         """
 
-        self.bt = bt[:]
+        self._set_bt(bt[:])
         return self
 
     def random(self, length):
@@ -239,120 +448,183 @@ class BehaviorTreeStringRepresentation:
         Tries to follow some of the rules for valid trees to speed up the process
         """
 
-        self.bt = []
+        self._set_bt([])
         while not self.is_valid():
             if length == 1:
-                self.bt = [random.choice(BEHAVIOR_NODES)]
+                self._set_bt([random.choice(self._nodes.behavior_nodes)])
             else:
-                self.bt = [random.choice(CONTROL_NODES)]
+                self._set_bt([random.choice(self._nodes.control_nodes)])
                 for _ in range(length - 1):
-                    if self.bt[-1] in CONTROL_NODES:
-                        child = [BehaviorTreeStringRepresentation.random_node()]
-                        while child in UP_NODE:
-                            child = [BehaviorTreeStringRepresentation.random_node()]
-                        self.bt += child
+                    if self._bt[-1] in self._nodes.control_set:
+                        child = [self.random_node()]
+                        while child in self._nodes.up_node:
+                            child = [self.random_node()]
+                        self._bt += child
                     else:
-                        self.bt += [BehaviorTreeStringRepresentation.random_node()]
+                        self._bt += [self.random_node()]
 
-                    if self.bt[-1] in ACTION_NODES:
-                        self.bt += [UP_NODE[0]]
+                    if self._bt[-1] in self._nodes.action_set:
+                        self._bt += [self._nodes.up_node[0]]
 
                 for _ in range(length - self.length() - 1):
                     # add nodes to match the number of individuals defined in length
                     # this is required when random node gives 'up' nodes
                     # condition nodes make it more likely to be valid
-                    self.bt += [random.choice(CONDITION_NODES)]
+                    self._bt += [random.choice(self._nodes.condition_nodes)]
                 if self.length() < length:
-                    self.bt += [random.choice(BEHAVIOR_NODES)]
+                    self._bt += [random.choice(self._nodes.behavior_nodes)]
                 self.close()
 
         return self.bt
 
     def is_valid(self):
         """
-        Checks if bt is a valid behavior tree.
-        Checks are somewhat in order of likelihood to fail.
+        Checks if bt is a valid behavior tree, in a single pass.
         """
 
-        valid = True
+        bt = self._bt
+        last = len(bt) - 1
+        nodes = self._nodes
+        control_set = nodes.control_set
+        up_set = nodes.up_set
 
         # Empty string
-        if len(self.bt) <= 0:
-            valid = False
+        if last < 0:
+            return False
 
-        # The first element cannot be a leaf if after it there are other elements
-        elif (self.bt[0] not in CONTROL_NODES) and (len(self.bt) != 1):
-            valid = False
+        # A single node must be a leaf
+        if last == 0:
+            return bt[0] not in control_set and bt[0] not in up_set
 
+        # The first element cannot be a leaf if after it there are other elements
+        if bt[0] not in control_set:
+            return False
+
+        # What the open control nodes allow as children: (fallback_allowed, sequence_allowed)
+        if bt[0] in nodes.fallback_set:
+            allowed = [(False, True)]
+        elif bt[0] in nodes.sequence_set:
+            allowed = [(True, False)]
         else:
-            for i in range(len(self.bt) - 1):
-
-                # 'up' directly after a control node
-                if (self.bt[i] in CONTROL_NODES) and (self.bt[i+1] in UP_NODE):
-                    valid = False
-
-                # Identical condition nodes directly after one another - waste
-                elif self.bt[i] in CONDITION_NODES and self.bt[i] == self.bt[i+1]:
-                    valid = False
-                # check for non-SBT elements
-                elif self.bt[i] not in ALL_NODES:
-                    valid = False
-
-            if valid:
-                # Check on the bt depth: to be > 0
-                depth = self.depth()
-                if (depth < 0) or (depth == 0 and len(self.bt) > 1):
-                    valid = False
-
-            if valid and self.bt[0] in CONTROL_NODES:
-                fallback_allowed = True
-                sequence_allowed = True
-                if self.bt[0] in FALLBACK_NODES:
-                    fallback_allowed = False
-                elif self.bt[0] in SEQUENCE_NODES:
-                    sequence_allowed = False
-                valid = self.is_subtree_valid(self.bt[1:], fallback_allowed, sequence_allowed)
-
-        return valid
+            allowed = [(True, True)]
+
+        depth = 1
+        for i in range(1, last + 1):
+            previous = bt[i - 1]
+            node = bt[i]
+
+            # 'up' directly after a control node
+            if previous in control_set and node in up_set:
+                return False
+            # Identical condition nodes directly after one another - waste
+            if previous in nodes.condition_set and previous == node:
+                return False
+            # Non-SBT elements, except for the last one
+            if i < last and node not in nodes.all_set:
+                return False
+
+            if node in control_set:
+                depth += 1
+            elif node in up_set:
+                depth -= 1
+                # Only the last node can close the tree
+                if depth == 0 and i != last:
+                    return False
+
+            type_ = nodes.node_types.get(node)
+            if type_ == NODE_TYPE_UP:
+                allowed.pop()
+            elif type_ is not None and type_ != NODE_TYPE_CONDITION and type_ != NODE_TYPE_ACTION:
+                if not self._is_child_allowed(type_, allowed[-1]):
+                    return False
+                if type_ in _ALLOWED_CHILDREN:
+                    allowed.append(_ALLOWED_CHILDREN[type_])
+
+        return depth == 0
 
     def is_subtree_valid(self, string, fallback_allowed, sequence_allowed):
-        # pylint: disable=too-many-return-statements, too-many-branches
         """
         Checks whether the subtree starting with string[0] is valid according to a couple rules
         1. Fallbacks must not be children of fallbacks
         2. Sequences must not be children of sequences
-        """
-
-        while len(string) > 0:
-            node = string.pop(0)
-
-            if node in UP_NODE:
-                return True
-            if node in ATOMIC_FALLBACK_NODES:
-                if not fallback_allowed:
+        The subtree ends with the up node that closes the level string[0] is in.
+        """
+
+        allowed = [(fallback_allowed, sequence_allowed)]
+        for node in string:
+            type_ = self._nodes.node_types.get(node)
+            if type_ == NODE_TYPE_UP:
+                allowed.pop()
+                if len(allowed) == 0:
+                    return True
+            elif type_ is not None and type_ != NODE_TYPE_CONDITION and type_ != NODE_TYPE_ACTION:
+                if not self._is_child_allowed(type_, allowed[-1]):
                     return False
-            elif node in ATOMIC_SEQUENCE_NODES:
-                if not sequence_allowed:
-                    return False
-            elif node in CONTROL_NODES:
-                if node in FALLBACK_NODES:
-                    if fallback_allowed:
-                        if not self.is_subtree_valid(string, False, True):
-                            return False
-                    else:
-                        return False
-                elif node in SEQUENCE_NODES:
-                    if sequence_allowed:
-                        if not self.is_subtree_valid(string, True, False):
-                            return False
-                    else:
-                        return False
-                else:
-                    if not self.is_subtree_valid(string, True, True):
-                        return False
+                if type_ in _ALLOWED_CHILDREN:
+                    allowed.append(_ALLOWED_CHILDREN[type_])
 
         return False
 
+    @staticmethod
+    def _is_child_allowed(type_, allowed):
+
+        fallback_allowed, sequence_allowed = allowed
+        if type_ == NODE_TYPE_FALLBACK or type_ == NODE_TYPE_ATOMIC_FALLBACK:
+            return fallback_allowed
+        if type_ == NODE_TYPE_SEQUENCE or type_ == NODE_TYPE_ATOMIC_SEQUENCE:
+            return sequence_allowed
+        return True
+
+    def canonical(self):
+        """
+        Returns the normal form of the bt, where each run of adjacent condition nodes
+        under a fallback or sequence node is sorted. Conditions have no effects and never
+        return RUNNING, so reordering them changes neither behavior, length nor depth.
+        Strings that are not a single closed tree are returned unchanged.
+        """
+
+        if len(self._bt) == 1 or len(self._bt) == 0 or self._bt[0] not in self._nodes.control_set:
+            return self._bt[:]
+
+        stack = []
+        for i, node in enumerate(self._bt):
+            if node in self._nodes.control_set:
+                stack.append((node, []))
+            elif node in self._nodes.up_set:
+                if len(stack) == 0:
+                    return self._bt[:]
+                parent, children = stack.pop()
+                if parent in self._nodes.fallback_set or parent in self._nodes.sequence_set:
+                    children = self._sort_condition_runs(children)
+                subtree = [parent]
+                for child in children:
+                    subtree += child
+                subtree.append(node)
+                if len(stack) == 0:
+                    if i != len(self._bt) - 1:
+                        return self._bt[:]
+                    return subtree
+                stack[-1][1].append(subtree)
+            elif len(stack) > 0:
+                stack[-1][1].append([node])
+
+        return self._bt[:]
+
+    @classmethod
+    def _sort_condition_runs(cls, children):
+
+        sorted_children = []
+        run = []
+        for child in children:
+            if len(child) == 1 and child[0] in cls._nodes.condition_set:
+                run.append(child)
+            else:
+                sorted_children += sorted(run)
+                sorted_children.append(child)
+                run = []
+        sorted_children += sorted(run)
+        return sorted_children
+
     def close(self):
         """
         Adds missing up nodes at the end, or removes from the end if too many
@@ -361,47 +633,90 @@ class BehaviorTreeStringRepresentation:
         open_subtrees = 0
 
         # Make sure tree always ends with up node if starts with control node
-        if len(self.bt) > 0:
-            if self.bt[0] in CONTROL_NODES and self.bt[len(self.bt)-1] not in UP_NODE:
-                self.bt += UP_NODE
+        if len(self._bt) > 0:
+            if self._bt[0] in self._nodes.control_set and self._bt[len(self._bt)-1] not in self._nodes.up_set:
+                self._bt += self._nodes.up_node
 
-        for node in self.bt:
-            if node in CONTROL_NODES:
+        for node in self._bt:
+            if node in self._nodes.control_set:
                 open_subtrees += 1
-            elif node in UP_NODE:
+            elif node in self._nodes.up_set:
                 open_subtrees -= 1
 
         if open_subtrees > 0:
             for _ in range(open_subtrees):
-                self.bt += UP_NODE
+                self._bt += self._nodes.up_node
         elif open_subtrees < 0:
             for _ in range(-open_subtrees):
                 # Do not remove the very last node, and only up nodes
-                for j in range(len(self.bt) - 2, 0, -1): # pragma: no branch, we will always find an up
-                    if self.bt[j] in UP_NODE:
-                        self.bt.pop(j)
+                for j in range(len(self._bt) - 2, 0, -1): # pragma: no branch, we will always find an up
+                    if self._bt[j] in self._nodes.up_set:
+                        self._bt.pop(j)
                         break
 
+        self._invalidate_structure()
+
     def trim(self):
         """
         Removes control nodes with only one child
         """
 
-        for index in range(len(self.bt)-1, 0, -1):
-            if self.bt[index] in CONTROL_NODES:
+        if self._structure().is_tree:
+            self._set_bt(self._trimmed_tree())
+            return
+
+        for index in range(len(self._bt)-1, 0, -1):
+            if self._bt[index] in self._nodes.control_set:
                 children = self.find_children(index)
                 if len(children) <= 1:
                     up_node_index = self.find_up_node(index)
-                    self.bt.pop(up_node_index)
+                    self._bt.pop(up_node_index)
+                    self._invalidate_structure()
                     if len(children) == 1:
                         parent = self.find_parent(index)
-                        if parent is not None and self.bt[parent] == self.bt[children[0]]:
+                        if parent is not None and self._bt[parent] == self._bt[children[0]]:
                             # Parent and only child will be identical control nodes,
                             #   child can be removed
                             up_node_index = self.find_up_node(children[0])
-                            self.bt.pop(up_node_index)
-                            self.bt.pop(children[0])
-                    self.bt.pop(index)
+                            self._bt.pop(up_node_index)
+                            self._bt.pop(children[0])
+                    self._bt.pop(index)
+                    self._invalidate_structure()
+
+    def _trimmed_tree(self):
+        """
+        Same as trim, for a bt that is a single tree, but working on the lists of children
+        and building the trimmed bt at the end
+        """
+
+        structure = self._structure()
+        children = {index: node_children[:] for index, node_children in structure.children.items()}
+
+        for index in range(len(self._bt) - 1, 0, -1):
+            if index in children and len(children[index]) <= 1:
+                parent = structure.parent[index]
+                replacement = children[index]
+                if len(replacement) == 1 and self._bt[parent] == self._bt[replacement[0]]:
+                    # Parent and only child will be identical control nodes,
+                    #   child can be removed
+                    replacement = children[replacement[0]]
+                siblings = children[parent]
+                position = siblings.index(index)
+                siblings[position:position + 1] = replacement
+
+        trimmed_bt = []
+        stack = [0]
+        while len(stack) > 0:
+            index = stack.pop()
+            if index < 0:
+                trimmed_bt.append(self._bt[~index])
+            else:
+                trimmed_bt.append(self._bt[index])
+                if index in children:
+                    stack.append(~structure.up[index])
+                    stack += reversed(children[index])
+
+        return trimmed_bt
 
     def depth(self):
         """
@@ -411,13 +726,13 @@ class BehaviorTreeStringRepresentation:
         depth = 0
         max_depth = 0
 
-        for i in range(len(self.bt)):
-            if self.bt[i] in CONTROL_NODES:
+        for i in range(len(self._bt)):
+            if self._bt[i] in self._nodes.control_set:
                 depth += 1
                 max_depth = max(depth, max_depth)
-            elif self.bt[i] in UP_NODE:
+            elif self._bt[i] in self._nodes.up_set:
                 depth -= 1
-                if (depth < 0) or (depth == 0 and i is not len(self.bt) - 1):
+                if (depth < 0) or (depth == 0 and i != len(self._bt) - 1):
                     return -1
 
         if depth != 0:
@@ -431,13 +746,13 @@ class BehaviorTreeStringRepresentation:
         """
 
         length = 0
-        for node in self.bt:
-            if node not in UP_NODE:
+        for node in self._bt:
+            if node not in self._nodes.up_set:
                 length += 1
         return length
 
-    @staticmethod
-    def random_node():
+    @classmethod
+    def random_node(cls):
         """
         Returns a random node.
         Usually the set of leaf nodes is much larger than the set of
@@ -447,39 +762,41 @@ class BehaviorTreeStringRepresentation:
         """
 
         if random.random() < 0.5:
-            return random.choice(CONTROL_NODES)
+            return random.choice(cls._nodes.control_nodes)
 
-        return random.choice(LEAF_NODES)
+        return random.choice(cls._nodes.leaf_nodes)
 
     def change_node(self, index, new_node=None):
         """
         Changes node at index
         """
 
-        if self.bt[index] in UP_NODE:
+        if self._bt[index] in self._nodes.up_set:
             return
 
         if new_node is None:
-            new_node = BehaviorTreeStringRepresentation.random_node()
+            new_node = self.random_node()
 
         # Change control node to leaf node, remove whole subtree
-        if new_node in LEAF_NODES and self.bt[index] in CONTROL_NODES:
+        if new_node in self._nodes.leaf_set and self._bt[index] in self._nodes.control_set:
             self.delete_node(index)
-            self.bt.insert(index, new_node)
+            self._bt.insert(index, new_node)
 
         # Change leaf node to control node. Add up and extra condition/behavior node child
-        elif new_node in CONTROL_NODES and self.bt[index] in LEAF_NODES:
-            old_node = self.bt[index]
-            self.bt[index] = new_node
-            if old_node in BEHAVIOR_NODES:
-                self.bt.insert(index + 1, random.choice(LEAF_NODES))
-                self.bt.insert(index + 2, old_node)
+        elif new_node in self._nodes.control_set and self._bt[index] in self._nodes.leaf_set:
+            old_node = self._bt[index]
+            self._bt[index] = new_node
+            if old_node in self._nodes.behavior_set:
+                self._bt.insert(index + 1, random.choice(self._nodes.leaf_nodes))
+                self._bt.insert(index + 2, old_node)
             else: #CONDITION_NODE
-                self.bt.insert(index + 1, old_node)
-                self.bt.insert(index + 2, random.choice(BEHAVIOR_NODES))
-            self.bt.insert(index + 3, UP_NODE[0])
+                self._bt.insert(index + 1, old_node)
+                self._bt.insert(index + 2, random.choice(self._nodes.behavior_nodes))
+            self._bt.insert(index + 3, self._nodes.up_node[0])
         else:
-            self.bt[index] = new_node
+            self._bt[index] = new_node
+
+        self._invalidate_structure()
 
     def add_node(self, index, new_node=None):
         """
@@ -487,34 +804,37 @@ class BehaviorTreeStringRepresentation:
         """
 
         if new_node is None:
-            new_node = BehaviorTreeStringRepresentation.random_node()
-        if new_node in CONTROL_NODES:
+            new_node = self.random_node()
+        if new_node in self._nodes.control_set:
             if index == 0:
                 # Adding new control node to encapsulate entire tree
-                self.bt.insert(index, new_node)
-                self.bt.append(UP_NODE[0])
+                self._bt.insert(index, new_node)
+                self._bt.append(self._nodes.up_node[0])
             else:
-                self.bt.insert(index, new_node)
-                self.bt.insert(index + 1, random.choice(LEAF_NODES))
-                self.bt.insert(index + 2, random.choice(BEHAVIOR_NODES))
-                self.bt.insert(index + 3, UP_NODE[0])
+                self._bt.insert(index, new_node)
+                self._bt.insert(index + 1, random.choice(self._nodes.leaf_nodes))
+                self._bt.insert(index + 2, random.choice(self._nodes.behavior_nodes))
+                self._bt.insert(index + 3, self._nodes.up_node[0])
         else:
-            self.bt.insert(index, new_node)
+            self._bt.insert(index, new_node)
+
+        self._invalidate_structure()
 
     def delete_node(self, index):
         """
         Deletes node at index
         """
 
-        if self.bt[index] in UP_NODE:
+        if self._bt[index] in self._nodes.up_set:
             return
 
-        if self.bt[index] in CONTROL_NODES:
+        if self._bt[index] in self._nodes.control_set:
             up_node_index = self.find_up_node(index)
             for i in range(up_node_index, index, -1):
-                self.bt.pop(i)
+                self._bt.pop(i)
 
-        self.bt.pop(index)
+        self._bt.pop(index)
+        self._invalidate_structure()
 
     def find_parent(self, index):
         """
@@ -524,62 +844,39 @@ class BehaviorTreeStringRepresentation:
         if index == 0:
             return None
 
-        parent = index
-        siblings_left = 0
-        while parent > 0:
-            parent -= 1
-            if self.bt[parent] in CONTROL_NODES:
-                if siblings_left == 0:
-                    return parent
-                siblings_left -= 1
-            elif self.bt[parent] in UP_NODE:
-                siblings_left += 1
-        return None
+        parent = self._structure().parent[index]
+        return parent if parent >= 0 else None
 
     def find_children(self, index):
         """
         Finds all children to the node at index
         """
 
-        children = []
-        if self.bt[index] in CONTROL_NODES:
-            child = index + 1
-            level = 0
-            while level >= 0:
-                if self.bt[child] in UP_NODE:
-                    level -= 1
-                elif level == 0:
-                    children.append(child)
-
-                if self.bt[child] in CONTROL_NODES:
-                    level += 1
-                child += 1
+        if self._bt[index] not in self._nodes.control_set:
+            return []
 
-        return children
+        structure = self._structure()
+        if structure.up[index] < 0:
+            raise IndexError('Node at index has no up node')
+        return structure.children[index][:]
 
     def find_up_node(self, index):
         """
         Returns index of the up node connected to the control node at input index
         """
 
-        if self.bt[index] not in CONTROL_NODES:
+        if self._bt[index] not in self._nodes.control_set:
             raise Exception('Invalid call. Node at index not a control node')
 
         if index == 0:
-            if self.bt[len(self.bt)-1] in UP_NODE:
-                index = len(self.bt) - 1
+            if self._bt[len(self._bt)-1] in self._nodes.up_set:
+                index = len(self._bt) - 1
             else:
                 raise Exception('Changing invalid SBT. Missing up.')
         else:
-            level = 1
-            while level > 0:
-                index += 1
-                if index == len(self.bt):
-                    raise Exception('Changing invalid SBT. Missing up.')
-                if self.bt[index] in CONTROL_NODES:
-                    level += 1
-                elif self.bt[index] in UP_NODE:
-                    level -= 1
+            index = self._structure().up[index]
+            if index < 0:
+                raise Exception('Changing invalid SBT. Missing up.')
 
         return index
 
@@ -590,10 +887,10 @@ class BehaviorTreeStringRepresentation:
 
         subtree = []
 
-        if self.bt[index] in LEAF_NODES:
-            subtree = [self.bt[index]]
-        elif self.bt[index] in CONTROL_NODES:
-            subtree = self.bt[index : self.find_up_node(index) + 1]
+        if self._bt[index] in self._nodes.leaf_set:
+            subtree = [self._bt[index]]
+        elif self._bt[index] in self._nodes.control_set:
+            subtree = self._bt[index : self.find_up_node(index) + 1]
         else:
             subtree = []
 
@@ -605,7 +902,8 @@ class BehaviorTreeStringRepresentation:
         """
 
         for i in range(len(subtree)):
-            self.bt.insert(index + i, subtree.pop(0))
+            self._bt.insert(index + i, subtree.pop(0))
+        self._invalidate_structure()
 
     def swap_subtrees(self, bt2, index1, index2):
         """
@@ -618,9 +916,11 @@ class BehaviorTreeStringRepresentation:
         if subtree1 != [] and subtree2 != []:
             # Remove subtrees that will be replaced
             for _ in range(len(subtree1)):
-                self.bt.pop(index1)
+                self._bt.pop(index1)
             for _ in range(len(subtree2)):
-                bt2.bt.pop(index2)
+                bt2._bt.pop(index2)
+            self._invalidate_structure()
+            bt2._invalidate_structure()
 
             self.insert_subtree(subtree2, index1)
             bt2.insert_subtree(subtree1, index2)
@@ -630,4 +930,24 @@ class BehaviorTreeStringRepresentation:
         Checks if node at index is root of a subtree
         """
 
-        return bool(0 <= index < len(self.bt) and self.bt[index] not in UP_NODE)
+        return bool(0 <= index < len(self._bt) and self._bt[index] not in self._nodes.up_set)
+
+
+class EncodedBehaviorTreeRepresentation(BehaviorTreeStringRepresentation):
+    """
+    Same as BehaviorTreeStringRepresentation, for a bt encoded as node ids, see encode().
+    The bt is edited as a list of ids, and sorted by id instead of name in its normal form.
+    """
+
+    _nodes = _NODE_IDS
+
+    def __init__(self, bt):
+        super().__init__(list(bt))
+
+    def set(self, bt):
+        """
+        Sets bt from an encoded bt
+        """
+
+        self._set_bt(list(bt))
+        return self
@@ -1,17 +1,21 @@
 from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory
-from behavior_tree_learning.core.sbt.py_tree import StringBehaviorTree, ExecutionParameters
+from behavior_tree_learning.core.sbt.py_tree import ExecutionParameters
+from behavior_tree_learning.core.sbt.tick_engine import make_behavior_tree
+from behavior_tree_learning.core.sbt.trace_cache import SubtreeTraceCache
 from behavior_tree_learning.core.sbt.world import World
 
 
 class BehaviorTreeExecutor:
 
-    def __init__(self, node_factory: BehaviorNodeFactory, world: World):
+    def __init__(self, node_factory: BehaviorNodeFactory, world: World, trace_cache: SubtreeTraceCache = None):
 
         self._node_factory = node_factory
         self._world = world
+        self._trace_cache = trace_cache
 
     def run(self, sbt: str, parameters: ExecutionParameters, verbose=False):
 
-        tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=self._world, verbose=verbose)
+        tree = make_behavior_tree(sbt, behaviors=self._node_factory, world=self._world, verbose=verbose,
+                                  backend=parameters.backend, trace_cache=self._trace_cache)
         success, ticks = tree.run_bt(parameters=parameters)
         return success, ticks, tree
@@ -22,6 +22,13 @@ class BehaviorNode(pt.behaviour.Behaviour):
     def __init__(self, name):
         super().__init__(name)
 
+    def rebind(self, world):
+        """
+        Prepares the node to run again, in a new world, as if it had just been made.
+        Nodes keeping state between ticks outside the world must extend it to reset that state.
+        """
+        self._world = world
+
 
 class BehaviorNodeWithOperation(pt.behaviour.Behaviour):
 
@@ -34,6 +41,12 @@ class BehaviorNodeWithOperation(pt.behaviour.Behaviour):
         self._operation = operation.parse_function(text)
         super().__init__(self._operation[0])
 
+    def rebind(self, world):
+        """
+        Same as BehaviorNode.rebind
+        """
+        self._world = world
+
 
 class BehaviorRegister:
 
@@ -83,6 +96,14 @@ class BehaviorNodeFactory:
 
         return node, has_children
 
+    def rebind_node(self, node, world):
+        """
+        Binds a node made by this factory to a new world, control nodes have no world
+        """
+
+        if isinstance(node, (BehaviorNode, BehaviorNodeWithOperation)):
+            node.rebind(world)
+
     def _load_sbt_settings(self):
 
         bt.initialize_settings()
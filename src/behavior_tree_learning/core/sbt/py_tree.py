@@ -1,20 +1,117 @@
 import time
+from enum import Enum, auto
 import py_trees as pt
 from behavior_tree_learning.core.sbt.world import World
 from behavior_tree_learning.core.sbt.behavior_tree import BehaviorTreeStringRepresentation
 from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory
 
 
+class ExecutionBackend(Enum):
+    """
+    Enum class for the engines able to tick a tree built from a string
+    """
+
+    PY_TREES = auto()
+    NATIVE = auto()
+
+
 class ExecutionParameters:
 
-    def __init__(self, max_ticks=30, max_time=30.0, max_straight_fails=1, successes_required=2):
+    def __init__(self, max_ticks=30, max_time=30.0, max_straight_fails=1, successes_required=2,
+                 backend=ExecutionBackend.PY_TREES):
         
         self.max_ticks = max_ticks
         self.max_time = max_time 
         self.max_straight_fails = max_straight_fails
         self.successes_required = successes_required
+        self.backend = backend
         
 
+def tick_loop(tree, parameters: ExecutionParameters, abort, verbose):
+    """
+    Ticks the tree, which has tick_once(), a status and the failed, timeout and aborted flags,
+    until its episode is over, as run_bt does. It is a generator yielding before every tick to
+    be sent whether the world is alive, so the same loop runs in worlds that are awaited or not.
+    Returns status_ok and the number of ticks.
+    """
+
+    max_ticks = parameters.max_ticks
+    max_time = parameters.max_time
+    max_straight_fails = parameters.max_straight_fails
+    successes_required = parameters.successes_required
+
+    ticks = 0
+    straight_fails = 0
+    successes = 0
+    status_ok = True
+    start = time.time()
+
+    while (tree.status is not pt.common.Status.FAILURE or straight_fails < max_straight_fails) \
+            and (tree.status is not pt.common.Status.SUCCESS or successes < successes_required) \
+            and ticks < max_ticks and status_ok:
+
+        if abort is not None and abort(ticks):
+            tree.aborted = True
+            break
+
+        status_ok = yield
+
+        if status_ok:
+            tree.tick_once()
+
+            ticks += 1
+            if tree.status is pt.common.Status.SUCCESS:
+                successes += 1
+            else:
+                successes = 0
+
+            if tree.status is pt.common.Status.FAILURE:
+                straight_fails += 1
+            else:
+                straight_fails = 0
+
+            if time.time() - start > max_time:
+                status_ok = False
+                if verbose:
+                    print("Max time expired")
+
+    if verbose:
+        print("Status: %s Ticks: %d, Time: %s" % (status_ok, ticks, time.time() - start))
+
+    if ticks >= max_ticks:
+        tree.timeout = True
+    if straight_fails >= max_straight_fails:
+        tree.failed = True
+
+    return status_ok, ticks
+
+
+def run_tick_loop(world: World, loop):
+    """
+    Runs a tick_loop, asking world whether it is alive before every tick
+    """
+
+    try:
+        loop.send(None)
+        while True:
+            loop.send(world.is_alive())
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_tick_loop_async(world, loop):
+    """
+    Same as run_tick_loop, in an AsyncWorld
+    """
+
+    try:
+        loop.send(None)
+        while True:
+            loop.send(await world.is_alive())
+    except StopIteration as stop:
+        return stop.value
+
+
 class StringBehaviorTree(pt.trees.BehaviourTree):
 
     class TraceInfo:
@@ -33,6 +130,7 @@ class StringBehaviorTree(pt.trees.BehaviourTree):
         self.length = self.bt.length()
         self.failed = False
         self.timeout = False
+        self.aborted = False
 
         self._world = world
         self._behavior_factory = behaviors
@@ -42,12 +140,11 @@ class StringBehaviorTree(pt.trees.BehaviourTree):
             has_children = False
         else:
             self.root, has_children = self._behavior_factory.make_node(string[0], self._world, self._trace_info.verbose)
-            string.pop(0)
 
         super().__init__(root=self.root)
 
         if has_children:
-            self.create_from_string(string, self.root)
+            self.create_from_string(string, self.root, start=1)
 
     def to_string(self):
         """
@@ -79,82 +176,77 @@ class StringBehaviorTree(pt.trees.BehaviourTree):
         
         return bt_obj.bt
 
-    def create_from_string(self, string: str, node):
+    def create_from_string(self, string: str, node, start=0):
         """
-        Recursive function to generate the tree from a string
+        Generates the tree from a string, adding the nodes from string[start] on as children
+        of node until the up node that closes it. The string is not modified.
         """
 
-        while len(string) > 0:
-            if string[0] == ")":
-                string.pop(0)
-                return node
-
-            new_node, has_children = self._behavior_factory.make_node(string[0], self._world, self._trace_info.verbose)
-            string.pop(0)
+        parents = [node]
+        for index in range(start, len(string)):
+            if string[index] == ")":
+                parents.pop()
+                if len(parents) == 0:
+                    break
+                continue
+
+            new_node, has_children = self._behavior_factory.make_node(string[index], self._world,
+                                                                     self._trace_info.verbose)
+            parents[-1].add_child(new_node)
             if has_children:
-                # Node is a control node or decorator with children - add subtree via string and then add to parent
-                new_node = self.create_from_string(string, new_node)
-                node.add_child(new_node)
-            else:
-                # Node is a leaf/action node - add to parent, then keep looking for siblings
-                node.add_child(new_node)
+                # Node is a control node or decorator with children, next nodes are its subtree
+                parents.append(new_node)
 
-        # This return is only reached if there are too few up nodes
+        # Missing up nodes at the end are tolerated
         return node
 
-    def run_bt(self, parameters: ExecutionParameters = ExecutionParameters()):
+    def rebind(self, world: World):
         """
-        Function executing the behavior tree
+        Resets the tree to run again from scratch, in a new world
         """
 
-        if not self._world.startup(self._trace_info.verbose):
-            return False, 0
+        self.root.stop(pt.common.Status.INVALID)
+        for node in self.root.iterate():
+            self._behavior_factory.rebind_node(node, world)
 
-        max_ticks = parameters.max_ticks
-        max_time = parameters.max_time
-        max_straight_fails = parameters.max_straight_fails
-        successes_required = parameters.successes_required        
-        
-        ticks = 0
-        straight_fails = 0
-        successes = 0        
-        status_ok = True
-        start = time.time()
+        self._world = world
+        self.failed = False
+        self.timeout = False
+        self.aborted = False
 
-        while (self.root.status is not pt.common.Status.FAILURE or straight_fails < max_straight_fails) \
-                and (self.root.status is not pt.common.Status.SUCCESS or successes < successes_required) \
-                and ticks < max_ticks and status_ok:
+    @property
+    def status(self):
+        return self.root.status
 
-            status_ok = self._world.is_alive()
+    def tick_once(self):
+        self.root.tick_once()
 
-            if status_ok:
-                self.root.tick_once()
+    def run_bt(self, parameters: ExecutionParameters = ExecutionParameters(), abort=None):
+        """
+        Function executing the behavior tree.
+        When given, abort(ticks) is called before every tick and the episode is stopped
+        as soon as it returns True, leaving the aborted flag set.
+        """
 
-                ticks += 1
-                if self.root.status is pt.common.Status.SUCCESS:
-                    successes += 1
-                else:
-                    successes = 0
+        if not self._world.startup(self._trace_info.verbose):
+            return False, 0
 
-                if self.root.status is pt.common.Status.FAILURE:
-                    straight_fails += 1
-                else:
-                    straight_fails = 0
+        status_ok, ticks = run_tick_loop(self._world, tick_loop(self, parameters, abort, self._trace_info.verbose))
+        self._world.shutdown()
 
-                if time.time() - start > max_time:
-                    status_ok = False
-                    if self._trace_info.verbose:
-                        print("Max time expired")
+        return status_ok, ticks
 
-        if self._trace_info.verbose:
-            print("Status: %s Ticks: %d, Time: %s" % (status_ok, ticks, time.time() - start))
+    async def run_bt_async(self, parameters: ExecutionParameters = ExecutionParameters(), abort=None):
+        """
+        Same as run_bt, for trees running in an AsyncWorld
+        """
 
-        if ticks >= max_ticks:
-            self.timeout = True
-        if straight_fails >= max_straight_fails:
-            self.failed = True
+        if not await self._world.startup(self._trace_info.verbose):
+            return False, 0
 
-        self._world.shutdown()
+        status_ok, ticks = await run_tick_loop_async(self._world,
+                                                     tick_loop(self, parameters, abort, self._trace_info.verbose))
+        await self._world.shutdown()
 
         return status_ok, ticks
 
@@ -0,0 +1,153 @@
+"""
+Static analysis of string behavior trees, what can be told of a tree from its structure alone,
+without ticking it in any world
+"""
+
+from enum import IntFlag, auto
+from behavior_tree_learning.core.sbt import behavior_tree as bt
+
+
+class Outcome(IntFlag):
+    """
+    Flags for the statuses a node may return when ticked
+    """
+
+    SUCCESS = auto()
+    FAILURE = auto()
+    RUNNING = auto()
+
+
+_NONE = Outcome(0)
+_ANY = Outcome.SUCCESS | Outcome.FAILURE | Outcome.RUNNING
+_CONDITION = Outcome.SUCCESS | Outcome.FAILURE
+
+_CONTROL_TYPES = (bt.NODE_TYPE_FALLBACK, bt.NODE_TYPE_SEQUENCE, bt.NODE_TYPE_CONTROL)
+_PARALLEL = 'p('  # Made by the node factory, even if it is not in the settings
+_BEHAVIOR_TYPES = (bt.NODE_TYPE_ACTION, bt.NODE_TYPE_ATOMIC_FALLBACK, bt.NODE_TYPE_ATOMIC_SEQUENCE)
+
+
+def _node_type(name):
+
+    if name == _PARALLEL:
+        return bt.NODE_TYPE_CONTROL
+    return bt.get_node_type(name)
+
+
+class StaticAnalysis:
+    """
+    Analysis of a string behavior tree, valid for any world.
+
+    Conditions may succeed or fail and the other leaves may also return RUNNING, unless
+    leaf_outcomes tells what a leaf may return. From that, the outcomes of every node are
+    worked out bottom-up, and which nodes can ever be ticked top-down: a child of a fallback
+    is only ticked if all the children before it can fail, and a child of a sequence if they
+    can all succeed. Up nodes have no outcomes and are reachable as their control node.
+    """
+
+    def __init__(self, string, leaf_outcomes=None):
+
+        string = list(string)
+        tree = bt.BehaviorTreeStringRepresentation(string)
+        self.length = tree.length()
+        self.depth = tree.depth()
+
+        children, ups = self._structure(string)
+        self.node_outcomes = [_NONE] * len(string)
+        self.reachable = [False] * len(string)
+
+        for index in range(len(string) - 1, -1, -1):
+            if index in children:
+                self.node_outcomes[index] = self._control_outcomes(string[index],
+                                                                   [self.node_outcomes[child]
+                                                                    for child in children[index]])
+            elif _node_type(string[index]) != bt.NODE_TYPE_UP:
+                self.node_outcomes[index] = self._leaf_outcomes(string[index], leaf_outcomes)
+
+        if len(string) > 0:
+            self.reachable[0] = True
+        for index in range(len(string)):
+            if index in children and self.reachable[index]:
+                for child in self._reachable_children(string[index], children[index]):
+                    self.reachable[child] = True
+                if ups[index] >= 0:
+                    self.reachable[ups[index]] = True
+
+        self.outcomes = self.node_outcomes[0] if len(string) > 0 else _NONE
+        self.num_unreachable = sum(1 for index, node in enumerate(string)
+                                   if not self.reachable[index] and _node_type(node) != bt.NODE_TYPE_UP)
+        self.num_reachable_behaviors = sum(1 for index, node in enumerate(string)
+                                           if self.reachable[index] and _node_type(node) in _BEHAVIOR_TYPES)
+
+    def acts(self):
+        """
+        Whether the tree may tick any behavior, trees that cannot only ever read the world
+        """
+        return self.num_reachable_behaviors > 0
+
+    @staticmethod
+    def _structure(string):
+        # Children of each control node and the up node closing it, -1 if it is not closed
+
+        children = {}
+        ups = [-1] * len(string)
+        stack = []
+        for index, node in enumerate(string):
+            type_ = _node_type(node)
+            if type_ == bt.NODE_TYPE_UP:
+                if len(stack) > 0:
+                    ups[stack.pop()] = index
+                continue
+            if len(stack) > 0:
+                children[stack[-1]].append(index)
+            if type_ in _CONTROL_TYPES:
+                children[index] = []
+                stack.append(index)
+        return children, ups
+
+    @staticmethod
+    def _leaf_outcomes(name, leaf_outcomes):
+
+        if leaf_outcomes is not None and name in leaf_outcomes:
+            return Outcome(leaf_outcomes[name])
+        if _node_type(name) == bt.NODE_TYPE_CONDITION:
+            return _CONDITION
+        return _ANY
+
+    @staticmethod
+    def _control_outcomes(name, children_outcomes):
+
+        type_ = _node_type(name)
+        if type_ in (bt.NODE_TYPE_FALLBACK, bt.NODE_TYPE_SEQUENCE):
+            # A fallback goes on to the next child on failure and a sequence on success
+            passing = Outcome.FAILURE if type_ == bt.NODE_TYPE_FALLBACK else Outcome.SUCCESS
+            outcomes = _NONE
+            for child_outcomes in children_outcomes:
+                outcomes |= child_outcomes & ~passing
+                if not child_outcomes & passing:
+                    return outcomes
+            return outcomes | passing
+
+        # Parallel nodes fail if any child fails and succeed once all of them succeed
+        outcomes = _NONE
+        if any(child_outcomes & Outcome.FAILURE for child_outcomes in children_outcomes):
+            outcomes |= Outcome.FAILURE
+        if all(child_outcomes & Outcome.SUCCESS for child_outcomes in children_outcomes):
+            outcomes |= Outcome.SUCCESS
+        if (any(child_outcomes & Outcome.RUNNING for child_outcomes in children_outcomes)
+                and all(child_outcomes & ~Outcome.FAILURE for child_outcomes in children_outcomes)):
+            outcomes |= Outcome.RUNNING
+        return outcomes
+
+    def _reachable_children(self, name, children):
+
+        type_ = _node_type(name)
+        if type_ not in (bt.NODE_TYPE_FALLBACK, bt.NODE_TYPE_SEQUENCE):
+            return children
+
+        passing = Outcome.FAILURE if type_ == bt.NODE_TYPE_FALLBACK else Outcome.SUCCESS
+        reachable = []
+        for child in children:
+            reachable.append(child)
+            if not self.node_outcomes[child] & passing:
+                break
+        return reachable
@@ -0,0 +1,354 @@
+"""
+Native engine ticking a tree built from a string without py_trees composites
+"""
+
+import py_trees as pt
+from behavior_tree_learning.core.sbt.world import World
+from behavior_tree_learning.core.sbt import behavior_tree as bt
+from behavior_tree_learning.core.sbt.behavior_tree import BehaviorTreeStringRepresentation
+from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory
+from behavior_tree_learning.core.sbt.py_tree import StringBehaviorTree, ExecutionParameters, ExecutionBackend, \
+    tick_loop, run_tick_loop, run_tick_loop_async
+from behavior_tree_learning.core.sbt.trace_cache import SubtreeTraceCache
+
+NODE_KIND_LEAF = 0
+NODE_KIND_FALLBACK = 1
+NODE_KIND_SEQUENCE = 2
+NODE_KIND_PARALLEL = 3
+"""
+Kind codes of the nodes, shared with the batch engine. Control nodes made by BehaviorNodeFactory:
+a fallback is a py_trees Selector without memory, a sequence is a RSequence and a parallel is
+a py_trees Parallel succeeding on all its children
+"""
+
+_PARALLEL = 'p('  # Made by the node factory, even if it is not in the settings
+_NODE_KINDS = {bt.NODE_TYPE_FALLBACK: NODE_KIND_FALLBACK, bt.NODE_TYPE_SEQUENCE: NODE_KIND_SEQUENCE,
+               bt.NODE_TYPE_CONTROL: NODE_KIND_PARALLEL}
+
+
+def node_kind(name):
+    """
+    Kind code of a node, from its type in the settings of behavior_tree. The parallel node is
+    the only control node made by the node factory that is neither a fallback nor a sequence.
+    """
+
+    if name == _PARALLEL:
+        return NODE_KIND_PARALLEL
+    return _NODE_KINDS.get(bt.get_node_type(name), NODE_KIND_LEAF)
+
+_INVALID = pt.common.Status.INVALID
+_RUNNING = pt.common.Status.RUNNING
+_SUCCESS = pt.common.Status.SUCCESS
+_FAILURE = pt.common.Status.FAILURE
+_STATUSES = (_INVALID, _RUNNING, _SUCCESS, _FAILURE)
+
+
+class NativeBehaviorTree:
+    """
+    Runs the tree of a string like StringBehaviorTree does, but over a table of nodes compiled
+    from the string. Control nodes are rows of the table, ticked by the engine with the same
+    semantics that py_trees gives them, and only the behaviors are py_trees objects.
+
+    Nodes are numbered in the order they appear in the string, ignoring up nodes, so the root
+    is the node 0. Behaviors are driven through initialise(), update() and terminate().
+
+    With a trace cache, control nodes that are not RUNNING replay their tick from the cache
+    when the world and the nodes of their subtree are in a state already recorded.
+    """
+
+    def __init__(self, string: str, behaviors: BehaviorNodeFactory, world: World = None, verbose=False,
+                 trace_cache: SubtreeTraceCache = None):
+
+        self.bt = BehaviorTreeStringRepresentation(string)
+        self.depth = self.bt.depth()
+        self.length = self.bt.length()
+        self.failed = False
+        self.timeout = False
+        self.aborted = False
+
+        self._world = world
+        self._behavior_factory = behaviors
+        self._verbose = verbose
+
+        self._kinds = []
+        self._names = []
+        self._children = []
+        self._behaviors = []
+        self._compile(string)
+
+        self._status = [_INVALID] * len(self._kinds)
+        self._current_child = [None] * len(self._kinds)
+
+        self._trace_cache = trace_cache
+        if trace_cache is not None:
+            self._compile_subtrees(trace_cache)
+            self._tick = self._tick_traced
+
+    def _compile(self, string):
+
+        parents = []
+        for name in string:
+            if name == ")":
+                if len(parents) == 0:
+                    break
+                parents.pop()
+                if len(parents) == 0:
+                    break
+                continue
+
+            index = len(self._kinds)
+            if len(parents) > 0:
+                self._children[parents[-1]].append(index)
+
+            kind = node_kind(name)
+            if kind == NODE_KIND_LEAF:
+                node, has_children = self._behavior_factory.make_node(name, self._world, self._verbose)
+                if node is None or has_children:
+                    raise Exception("Unexpected character", name)
+            else:
+                node = None
+
+            self._kinds.append(kind)
+            self._names.append(name)
+            self._children.append([])
+            self._behaviors.append(node)
+
+            if kind != NODE_KIND_LEAF:
+                parents.append(index)
+            elif len(parents) == 0:
+                # A single behavior is the whole tree
+                break
+
+        if len(self._kinds) == 0:
+            raise Exception("Unexpected character", string[0] if len(string) > 0 else None)
+        self._children = [tuple(children) for children in self._children]
+
+    def _compile_subtrees(self, trace_cache):
+        # Nodes of a subtree are the range from its root to its end, and the subtree is
+        # identified by the names and number of children of its nodes
+
+        self._ends = [0] * len(self._kinds)
+        for index in range(len(self._kinds) - 1, -1, -1):
+            children = self._children[index]
+            self._ends[index] = self._ends[children[-1]] if children else index + 1
+
+        self._subtree_ids = [trace_cache.subtree_id(tuple((self._names[node], len(self._children[node]))
+                                                          for node in range(index, self._ends[index])))
+                             if self._kinds[index] != NODE_KIND_LEAF else None
+                             for index in range(len(self._kinds))]
+
+    @property
+    def status(self):
+        return self._status[0]
+
+    def statuses(self):
+        """
+        Returns the status of every node, in the order of the nodes in the string
+        """
+        return list(self._status)
+
+    def tick_once(self):
+        self._tick(0)
+
+    def _tick(self, index):
+
+        kind = self._kinds[index]
+        status = self._status
+
+        if kind == NODE_KIND_LEAF:
+            behavior = self._behaviors[index]
+            if status[index] != _RUNNING:
+                behavior.initialise()
+            new_status = behavior.update()
+            if new_status not in _STATUSES:
+                new_status = _INVALID
+            if new_status != _RUNNING:
+                behavior.terminate(new_status)
+            behavior.status = new_status
+            status[index] = new_status
+
+        elif kind == NODE_KIND_FALLBACK:
+            children = self._children[index]
+            if status[index] != _RUNNING:
+                self._current_child[index] = children[0] if children else None
+            if not children:
+                self._current_child[index] = None
+                self._stop(index, _FAILURE)
+                return
+
+            previous = self._current_child[index]
+            for child in children:
+                self._tick(child)
+                if status[child] == _RUNNING or status[child] == _SUCCESS:
+                    self._finish_at(index, child, previous)
+                    return
+            status[index] = _FAILURE
+            self._current_child[index] = children[-1]
+
+        elif kind == NODE_KIND_SEQUENCE:
+            children = self._children[index]
+            previous = self._current_child[index]
+            for child in children:
+                self._tick(child)
+                if status[child] == _RUNNING or status[child] == _FAILURE:
+                    self._finish_at(index, child, previous)
+                    return
+            status[index] = _SUCCESS
+            self._current_child[index] = children[-1] if children else None
+
+        else:
+            children = self._children[index]
+            if status[index] != _RUNNING:
+                for child in children:
+                    if status[child] != _INVALID:
+                        self._stop(child, _INVALID)
+                self._current_child[index] = None
+            if not children:
+                self._current_child[index] = None
+                self._stop(index, _SUCCESS)
+                return
+
+            for child in children:
+                self._tick(child)
+
+            new_status = _RUNNING
+            self._current_child[index] = children[-1]
+            for child in children:
+                if status[child] == _FAILURE:
+                    new_status = _FAILURE
+                    self._current_child[index] = child
+                    break
+            else:
+                if all(status[child] == _SUCCESS for child in children):
+                    new_status = _SUCCESS
+            if new_status != _RUNNING:
+                self._stop(index, new_status)
+            status[index] = new_status
+
+    def _tick_traced(self, index):
+        # Replaces _tick when there is a trace cache, for the tree and its subtrees
+
+        status = self._status
+        if self._kinds[index] == NODE_KIND_LEAF or status[index] is _RUNNING:
+            NativeBehaviorTree._tick(self, index)
+            return
+
+        digest = self._world.state_digest()
+        end = self._ends[index]
+        statuses = tuple(status[index:end])
+        if digest is None or _RUNNING in statuses:
+            NativeBehaviorTree._tick(self, index)
+            return
+
+        key = (self._subtree_ids[index], digest, statuses, self._current_children(index, end))
+        entry = self._trace_cache.find(key)
+        if entry is not None:
+            new_statuses, new_current_children, snapshot = entry
+            self._world.restore(snapshot)
+            status[index:end] = new_statuses
+            self._current_child[index:end] = [None if child is None else index + child
+                                              for child in new_current_children]
+            for node in range(index, end):
+                if self._behaviors[node] is not None:
+                    self._behaviors[node].status = status[node]
+            return
+
+        NativeBehaviorTree._tick(self, index)
+        statuses = tuple(status[index:end])
+        if _RUNNING not in statuses:
+            self._trace_cache.insert(key, (statuses, self._current_children(index, end), self._world.snapshot()))
+
+    def _current_children(self, index, end):
+        # Current children of the nodes of a subtree, relative to its root
+
+        return tuple(None if child is None else child - index for child in self._current_child[index:end])
+
+    def _finish_at(self, index, child, previous):
+        # A fallback or sequence returns the status of the child, invalidating the
+        # children after it when the child it returns from has changed
+
+        self._current_child[index] = child
+        self._status[index] = self._status[child]
+        if previous is None or previous != child:
+            passed = False
+            for sibling in self._children[index]:
+                if passed and self._status[sibling] != _INVALID:
+                    self._stop(sibling, _INVALID)
+                if sibling == child:
+                    passed = True
+
+    def _stop(self, index, new_status):
+
+        kind = self._kinds[index]
+        if kind == NODE_KIND_LEAF:
+            behavior = self._behaviors[index]
+            behavior.terminate(new_status)
+            behavior.status = new_status
+            self._status[index] = new_status
+            return
+
+        children = self._children[index]
+        if kind == NODE_KIND_PARALLEL:
+            for child in children:
+                if self._status[child] == _RUNNING:
+                    self._stop(child, _INVALID)
+        if new_status == _INVALID:
+            self._current_child[index] = None
+            for child in children:
+                self._stop(child, _INVALID)
+        self._status[index] = new_status
+
+    def rebind(self, world: World):
+        """
+        Resets the tree to run again from scratch, in a new world
+        """
+
+        self._stop(0, _INVALID)
+        for behavior in self._behaviors:
+            if behavior is not None:
+                self._behavior_factory.rebind_node(behavior, world)
+
+        self._world = world
+        self.failed = False
+        self.timeout = False
+        self.aborted = False
+
+    def run_bt(self, parameters: ExecutionParameters = ExecutionParameters(), abort=None):
+        """
+        Function executing the behavior tree, same as StringBehaviorTree.run_bt
+        """
+
+        if not self._world.startup(self._verbose):
+            return False, 0
+
+        status_ok, ticks = run_tick_loop(self._world, tick_loop(self, parameters, abort, self._verbose))
+        self._world.shutdown()
+
+        return status_ok, ticks
+
+    async def run_bt_async(self, parameters: ExecutionParameters = ExecutionParameters(), abort=None):
+        """
+        Same as run_bt, for trees running in an AsyncWorld
+        """
+
+        if not await self._world.startup(self._verbose):
+            return False, 0
+
+        status_ok, ticks = await run_tick_loop_async(self._world, tick_loop(self, parameters, abort, self._verbose))
+        await self._world.shutdown()
+
+        return status_ok, ticks
+
+
+def make_behavior_tree(string: str, behaviors: BehaviorNodeFactory, world: World = None, verbose=False,
+                       backend=ExecutionBackend.PY_TREES, trace_cache: SubtreeTraceCache = None):
+    """
+    Builds the tree of a string, to be run by the given backend.
+    Only the native backend replays subtrees from a trace cache.
+    """
+
+    if backend == ExecutionBackend.NATIVE:
+        return NativeBehaviorTree(string, behaviors=behaviors, world=world, verbose=verbose, trace_cache=trace_cache)
+    if trace_cache is not None:
+        raise ValueError("A trace cache needs the native backend")
+    return StringBehaviorTree(string, behaviors=behaviors, world=world, verbose=verbose)
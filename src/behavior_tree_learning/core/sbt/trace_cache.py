@@ -0,0 +1,85 @@
+"""
+Cache of the outcomes of ticking subtrees, shared by the trees of related sbts
+"""
+
+from collections import OrderedDict
+
+
+class SubtreeTraceCache:
+    """
+    In a deterministic world, ticking a subtree that is not RUNNING from a given state of the
+    world always ends the same way. The cache keeps, for the subtree, the state of the world
+    before the tick and the statuses of the subtree nodes, what the tick left: the new statuses
+    and a snapshot of the world. Trees using the cache replay the tick from it when they meet
+    the same key again, so a subtree shared by several sbts is only simulated once.
+
+    Worlds take part through World.state_digest(), snapshot() and restore(), and the cache is
+    only sound if behaviors that are not RUNNING keep no state other than the world. Entries,
+    and the ids of subtrees, are dropped in least recently used order once there are more than
+    'capacity' of them.
+    """
+
+    def __init__(self, capacity=10000):
+
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._subtree_ids = OrderedDict()
+        self._next_subtree_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+
+        # Entries are not sent to other processes, each one records its own
+        state = self.__dict__.copy()
+        state['_entries'] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self._entries)
+
+    def subtree_id(self, subtree):
+        """
+        Returns a small id for a subtree, given as a tuple telling it apart from any other.
+        Ids are never given twice, so entries of a dropped id never match another subtree.
+        """
+
+        subtree_id = self._subtree_ids.get(subtree)
+        if subtree_id is not None:
+            self._subtree_ids.move_to_end(subtree)
+            return subtree_id
+
+        subtree_id = self._next_subtree_id
+        self._next_subtree_id += 1
+        self._subtree_ids[subtree] = subtree_id
+        if len(self._subtree_ids) > max(self._capacity, 1):
+            self._subtree_ids.popitem(last=False)
+        return subtree_id
+
+    def find(self, key):
+        """
+        Returns the entry stored for the key or None, counting hits and misses
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def insert(self, key, entry):
+
+        if self._capacity <= 0:
+            return
+        self._entries[key] = entry
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
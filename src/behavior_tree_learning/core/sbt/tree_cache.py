@@ -0,0 +1,60 @@
+"""
+Cache of the trees built for the most recently run sbts
+"""
+
+from collections import OrderedDict
+from behavior_tree_learning.core.sbt.world import World
+from behavior_tree_learning.core.sbt.node_factory import BehaviorNodeFactory
+from behavior_tree_learning.core.sbt.py_tree import ExecutionBackend
+from behavior_tree_learning.core.sbt.tick_engine import make_behavior_tree
+from behavior_tree_learning.core.sbt.trace_cache import SubtreeTraceCache
+
+
+class BehaviorTreeCache:
+    """
+    Keeps the trees of the last sbts that were run, so running one of them again rebinds its
+    tree to the new world instead of building the tree again. Trees are dropped in least
+    recently used order once there are more than 'capacity', a capacity of 0 disables the cache.
+
+    A tree is only valid until the next call to get(), which may reset it.
+    """
+
+    def __init__(self, node_factory: BehaviorNodeFactory, capacity=100):
+
+        self._node_factory = node_factory
+        self._capacity = capacity
+        self._trees = OrderedDict()
+
+    def __getstate__(self):
+
+        # Trees are not sent to other processes, each one builds its own
+        state = self.__dict__.copy()
+        state['_trees'] = OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self._trees)
+
+    def get(self, sbt, world: World, verbose=False, backend=ExecutionBackend.PY_TREES,
+            trace_cache: SubtreeTraceCache = None):
+        """
+        Returns a tree for the sbt, ready to run in the world by the backend
+        """
+
+        key = (tuple(sbt), verbose, backend, trace_cache)
+        tree = self._trees.get(key)
+        if tree is not None:
+            self._trees.move_to_end(key)
+            tree.rebind(world)
+            return tree
+
+        tree = make_behavior_tree(sbt, behaviors=self._node_factory, world=world, verbose=verbose, backend=backend,
+                                  trace_cache=trace_cache)
+        if self._capacity > 0:
+            self._trees[key] = tree
+            if len(self._trees) > self._capacity:
+                self._trees.popitem(last=False)
+        return tree
+
+    def clear(self):
+        self._trees.clear()
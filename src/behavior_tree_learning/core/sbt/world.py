@@ -1,3 +1,4 @@
+import interface
 from interface import Interface
 
 
@@ -11,3 +12,71 @@ class World(Interface):
 
     def shutdown(self):
         pass
+
+    @interface.default
+    def state_digest(self):
+        """
+        Returns a hashable digest of the current state, equal for equal states, or None when
+        what happens from the state is not determined by it, as in worlds with random events.
+        By default worlds give no digest, so their subtrees are never replayed.
+        """
+        return None
+
+    @interface.default
+    def snapshot(self):
+        """
+        Returns a copy of the current state, not changed by the world afterwards
+        """
+        return None
+
+    @interface.default
+    def restore(self, snapshot):
+        """
+        Sets the current state from a snapshot, which may be restored again later
+        """
+        pass
+
+
+class VectorizedWorld(Interface):
+    """
+    Holds the states of several independent worlds in arrays, one lane per world, so that
+    behaviors can query and change all of them at once using the lanes they act on.
+    """
+
+    def size(self):
+        """
+        Returns the number of lanes
+        """
+        pass
+
+    def startup(self, verbose):
+        """
+        Returns an array of booleans telling which lanes started
+        """
+        pass
+
+    def is_alive(self):
+        """
+        Returns an array of booleans telling which lanes are alive
+        """
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class AsyncWorld(Interface):
+    """
+    World waiting on I/O, as a simulator or a robot reached through the network. Trees run in it
+    with run_bt_async(), which awaits is_alive() before every tick, so the world can wait there
+    for the outcome of the commands given in the last tick while other episodes go on.
+    """
+
+    async def startup(self, verbose):
+        pass
+
+    async def is_alive(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -1,3 +1,4 @@
 from behavior_tree_learning.core.gp import GeneticEnvironment, GeneticOperators
-from behavior_tree_learning.core.gp import GeneticParameters, GeneticSelectionMethods, TraceConfiguration
-from behavior_tree_learning.core.gp import GeneticProgramming
+from behavior_tree_learning.core.gp import GeneticParameters, GeneticSelectionMethods, GeneticEvaluationMethods, \
+    TraceConfiguration
+from behavior_tree_learning.core.gp import GeneticProgramming, IslandModel, MigrationTopology
@@ -1,5 +1,7 @@
-from behavior_tree_learning.core.gp import GeneticParameters, GeneticSelectionMethods, TraceConfiguration
+from behavior_tree_learning.core.gp import GeneticParameters, GeneticSelectionMethods, GeneticEvaluationMethods, \
+    TraceConfiguration, MigrationTopology
+from behavior_tree_learning.core.gp import SqliteFitnessStore, scenario_fingerprint
 from behavior_tree_learning.core.sbt import World, StringBehaviorTree, BehaviorTreeStringRepresentation
 from behavior_tree_learning.core.sbt import BehaviorNodeFactory, BehaviorRegister
 from behavior_tree_learning.core.sbt import ExecutionParameters
-from behavior_tree_learning.core.gp_sbt import Environment, BehaviorTreeLearner
+from behavior_tree_learning.core.gp_sbt import Environment, BehaviorTreeLearner, PrototypeWorldFactory
@@ -1,6 +1,9 @@
-from behavior_tree_learning.core.sbt import BehaviorTreeExecutor, ExecutionParameters
+from behavior_tree_learning.core.sbt import BehaviorTreeExecutor, ExecutionParameters, ExecutionBackend
 from behavior_tree_learning.core.sbt import BehaviorNodeFactory, BehaviorRegister, \
     BehaviorNode, BehaviorNodeWithOperation
-from behavior_tree_learning.core.sbt import World, StringBehaviorTree
-from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation
+from behavior_tree_learning.core.sbt import World, StringBehaviorTree, BehaviorTreeCache, SubtreeTraceCache
+from behavior_tree_learning.core.sbt import NativeBehaviorTree, make_behavior_tree
+from behavior_tree_learning.core.sbt import VectorizedWorld, BatchBehaviorTrees, BatchStatus, VectorizedBehaviorNode
+from behavior_tree_learning.core.sbt import AsyncWorld
+from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation, StaticAnalysis, Outcome
 from behavior_tree_learning.core.sbt import plot_behavior_tree
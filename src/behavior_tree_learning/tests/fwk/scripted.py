@@ -0,0 +1,174 @@
+"""
+Behaviors returning scripted statuses, to compare the engines ticking trees
+"""
+
+import random
+import asyncio
+import numpy as np
+import py_trees as pt
+from interface import implements
+from behavior_tree_learning.sbt import BehaviorRegister, BehaviorNode, World, AsyncWorld
+from behavior_tree_learning.sbt import VectorizedWorld, VectorizedBehaviorNode, BatchStatus
+
+STATUSES = [pt.common.Status.RUNNING, pt.common.Status.SUCCESS, pt.common.Status.FAILURE]
+BEHAVIORS = ['c0', 'c1', 'a0', 'a1', 'a2']
+
+_BATCH_STATUSES = {pt.common.Status.INVALID: BatchStatus.INVALID, pt.common.Status.RUNNING: BatchStatus.RUNNING,
+                   pt.common.Status.SUCCESS: BatchStatus.SUCCESS, pt.common.Status.FAILURE: BatchStatus.FAILURE}
+
+
+def to_batch_status(status):
+    return _BATCH_STATUSES[status]
+
+
+class ScriptedWorld(implements(World)):
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.updates = {name: 0 for name in scripts}
+        self.log = []
+
+    def startup(self, verbose):
+        return True
+
+    def is_alive(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def next_status(self, name):
+        script = self.scripts[name]
+        status = script[self.updates[name] % len(script)]
+        self.updates[name] += 1
+        return status
+
+
+class AsyncScriptedWorld(implements(AsyncWorld)):
+    """
+    ScriptedWorld yielding to other episodes before every tick
+    """
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.updates = {name: 0 for name in scripts}
+        self.log = []
+
+    async def startup(self, verbose):
+        return True
+
+    async def is_alive(self):
+        await asyncio.sleep(0)
+        return True
+
+    async def shutdown(self):
+        pass
+
+    next_status = ScriptedWorld.next_status
+
+
+class ScriptedWorlds(implements(VectorizedWorld)):
+    """
+    A ScriptedWorld in each lane
+    """
+
+    def __init__(self, scripts):
+        self.worlds = [ScriptedWorld(lane_scripts) for lane_scripts in scripts]
+
+    def size(self):
+        return len(self.worlds)
+
+    def startup(self, verbose):
+        return np.ones(len(self.worlds), dtype=bool)
+
+    def is_alive(self):
+        return np.ones(len(self.worlds), dtype=bool)
+
+    def shutdown(self):
+        pass
+
+
+class Scripted(BehaviorNode):
+    """
+    Behavior returning the statuses its world has for it, in turn, and logging its calls
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return Scripted(text, world)
+
+    def __init__(self, name, world):
+        self._world = world
+        super(Scripted, self).__init__(str(name))
+
+    def initialise(self):
+        self._world.log.append((self.name, 'initialise'))
+
+    def update(self):
+        status = self._world.next_status(self.name)
+        self._world.log.append((self.name, 'update', status))
+        return status
+
+    def terminate(self, new_status):
+        self._world.log.append((self.name, 'terminate', new_status))
+
+
+class VectorizedScripted(implements(VectorizedBehaviorNode)):
+    """
+    Scripted behavior for all the lanes of ScriptedWorlds, it does not log terminate()
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return VectorizedScripted(text, world)
+
+    def __init__(self, name, world):
+        self._name = name
+        self._world = world
+
+    def initialise(self, lanes, nodes, memory):
+        for lane in lanes:
+            self._world.worlds[lane].log.append((self._name, 'initialise'))
+
+    def update(self, lanes, nodes, memory):
+        statuses = []
+        for lane in lanes:
+            world = self._world.worlds[lane]
+            status = world.next_status(self._name)
+            world.log.append((self._name, 'update', status))
+            statuses.append(to_batch_status(status))
+        return np.array(statuses, dtype=np.int8)
+
+
+def get_scripted_behaviors(behavior_class=Scripted):
+
+    behavior_register = BehaviorRegister()
+    for name in BEHAVIORS:
+        if name.startswith('c'):
+            behavior_register.add_condition(name, behavior_class)
+        else:
+            behavior_register.add_action(name, behavior_class)
+    return behavior_register
+
+
+def random_scripts():
+    return {name: [random.choice(STATUSES) for _ in range(random.randint(1, 4))] for name in BEHAVIORS}
+
+
+def random_tree(depth=0):
+
+    if depth == 3 or random.random() < 0.3:
+        return [random.choice(BEHAVIORS)]
+
+    tree = [random.choice(['f(', 's(', 'p('])]
+    for _ in range(random.randint(1, 3)):
+        tree += random_tree(depth + 1)
+    return tree + [')']
+
+
+def py_trees_statuses(node):
+
+    statuses = [node.status]
+    for child in node.children:
+        statuses += py_trees_statuses(child)
+    return statuses
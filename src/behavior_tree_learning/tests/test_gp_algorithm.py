@@ -3,10 +3,15 @@
 import paths
 paths.add_modules_to_path()
 
+import random
+import shutil
+import tempfile
 import unittest
 from interface import implements
 from behavior_tree_learning.core.gp.hash_table import HashTable
 from behavior_tree_learning.core.gp.parameters import GeneticParameters
+from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.evaluation import SerialEvaluator
 from behavior_tree_learning.core.gp.operators import GeneticOperators
 from behavior_tree_learning.core.gp.environment import GeneticEnvironment
 from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
@@ -24,6 +29,22 @@ class FakeOperators(implements(GeneticOperators)):
         pass
 
 
+class BinaryOperators(implements(GeneticOperators)):
+
+    def random_genome(self, length):
+        return [random.choice('01') for _ in range(length)]
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        mutated = list(genome)
+        index = random.randint(0, len(mutated) - 1)
+        mutated[index] = '1' if mutated[index] == '0' else '0'
+        return mutated
+
+    def crossover_genome(self, genome1, genome2, replace):
+        point = random.randint(1, len(genome1) - 1)
+        return genome1[:point] + genome2[point:], genome2[:point] + genome1[point:]
+
+
 class FakEnvironment(implements(GeneticEnvironment)):
 
         def run_and_compute(self, individual, verbose):
@@ -33,6 +54,16 @@ class FakEnvironment(implements(GeneticEnvironment)):
             pass
 
 
+class RecordingSteps(implements(AlgorithmSteps)):
+
+    def __init__(self):
+        self.runs = []
+
+    def calculate_fitness(self, individual, verbose):
+        self.runs.append(list(individual))
+        return 0.0
+
+
 class TestGpAlgorithm(unittest.TestCase):
 
     def test_create_population(self):
@@ -44,6 +75,98 @@ class TestGpAlgorithm(unittest.TestCase):
         #gp_algorithm = GeneticProgramming(operators)
         #gp_algorithm.run(environment, parameters)
 
+    def test_offspring_are_not_duplicated(self):
+
+        random.seed(0)
+        parameters = GeneticParameters()
+        parameters.min_length = 1
+        parameters.n_offspring_mutation = 2
+        gp_algorithm = GeneticProgramming(BinaryOperators(), '')
+
+        population = gp_algorithm._create_random_population(6, 4)
+        self.assertEqual(len({tuple(individual) for individual in population}), 6)
+
+        parents = list(range(len(population)))
+        for offspring in [gp_algorithm._mutation(population, parents, parameters),
+                          gp_algorithm._crossover(population, parents, parameters)]:
+            individuals = population + offspring
+            self.assertGreater(len(offspring), 0)
+            self.assertEqual(len({tuple(individual) for individual in individuals}), len(individuals))
+
+        parameters.allow_identical = True
+        offspring = gp_algorithm._mutation(population, parents, parameters)
+        self.assertEqual(len(offspring), 2 * len(population))
+
+    def test_racing_reruns_undecided_individuals(self):
+
+        gp_algorithm = GeneticProgramming(BinaryOperators(), '')
+        hash_table = HashTable()
+        runs = {('a',): [10.0, 10.5], ('b',): [9.8, 10.3], ('c',): [0.0, 0.5], ('d',): [5.0]}
+        for key, values in runs.items():
+            for value in values:
+                hash_table.insert(key, value)
+
+        steps = RecordingSteps()
+        individuals = [list(key) for key in runs]
+        gp_algorithm._calculate_fitness(individuals, hash_table, SerialEvaluator(steps), rerun=3)
+
+        # Only the two contenders for the best place are rerun
+        self.assertEqual(steps.runs, [['a'], ['b']])
+        self.assertEqual(gp_algorithm._num_reruns_saved, 2)
+
+        # Without noise places are decided once known
+        hash_table = HashTable()
+        for key, value in [(('a',), 3.0), (('a',), 3.0), (('b',), 2.0), (('b',), 2.0), (('c',), 1.0)]:
+            hash_table.insert(key, value)
+
+        steps = RecordingSteps()
+        gp_algorithm._calculate_fitness([['a'], ['b'], ['c']], hash_table, SerialEvaluator(steps), rerun=3)
+        self.assertEqual(steps.runs, [])
+
+    def test_racing_offspring_against_population(self):
+
+        gp_algorithm = GeneticProgramming(BinaryOperators(), '')
+        hash_table = HashTable()
+        for key, values in [(('a',), [10.0, 10.5]), (('c',), [0.0, 0.5]), (('e',), [10.2])]:
+            for value in values:
+                hash_table.insert(key, value)
+
+        # An offspring alone in its batch has no one to race against
+        steps = RecordingSteps()
+        gp_algorithm._calculate_fitness([['e']], hash_table, SerialEvaluator(steps), rerun=3)
+        self.assertEqual(steps.runs, [])
+
+        gp_algorithm._calculate_fitness([['e']], hash_table, SerialEvaluator(steps), rerun=3, rivals=[['a'], ['c']])
+        self.assertEqual(steps.runs, [['e']])
+
+    def test_hash_table_size_is_deprecated(self):
+
+        parameters = GeneticParameters()
+        parameters.n_generations = 1
+        parameters.hash_table_size = 100000
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            gp_algorithm = GeneticProgramming(BinaryOperators(), output_directory)
+            with self.assertWarns(DeprecationWarning):
+                gp_algorithm.run(RecordingSteps(), parameters, seed=1)
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_racing_settles_ties(self):
+
+        gp_algorithm = GeneticProgramming(BinaryOperators(), '')
+        hash_table = HashTable()
+        for key in [('a',), ('b',)]:
+            for _ in range(5):
+                hash_table.insert(key, -1.0)
+
+        self.assertEqual(gp_algorithm._racing_keys([['a'], ['b']], hash_table), set())
+
+        steps = RecordingSteps()
+        gp_algorithm._calculate_fitness([['a'], ['b']], hash_table, SerialEvaluator(steps), rerun=3)
+        self.assertEqual(steps.runs, [])
+
 
 if __name__ == '__main__':
     unittest.main()
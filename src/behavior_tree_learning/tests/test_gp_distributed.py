@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import os
+import time
+import random
+import threading
+import unittest
+import multiprocessing
+from interface import implements
+from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.evaluation import ProcessPoolEvaluator
+from behavior_tree_learning.core.gp.distributed import DistributedEvaluator, run_evaluation_worker, _BrokerManager
+
+_AUTHKEY = b'test'
+
+
+class NoisySteps(implements(AlgorithmSteps)):
+
+    def calculate_fitness(self, individual, verbose):
+        return -sum(int(gene) for gene in individual) + random.random()
+
+
+class FlakySteps(NoisySteps):
+    """
+    The first evaluation of each individual in a worker fails
+    """
+
+    def __init__(self):
+        self._seen = set()
+
+    def calculate_fitness(self, individual, verbose):
+
+        if tuple(individual) not in self._seen:
+            self._seen.add(tuple(individual))
+            raise RuntimeError("Simulator not ready")
+        return super().calculate_fitness(individual, verbose)
+
+
+class SlowSteps(NoisySteps):
+
+    def calculate_fitness(self, individual, verbose):
+
+        time.sleep(0.6)
+        return super().calculate_fitness(individual, verbose)
+
+
+class RendezvousSteps(NoisySteps):
+    """
+    Evaluations fail unless another one is in flight at the same time
+    """
+
+    def __init__(self, barrier):
+        self._barrier = barrier
+
+    def calculate_fitness(self, individual, verbose):
+
+        self._barrier.wait(timeout=5)
+        return super().calculate_fitness(individual, verbose)
+
+
+class CrashingSteps(NoisySteps):
+
+    def calculate_fitness(self, individual, verbose):
+        os._exit(1)
+
+
+def _start_worker(steps, address, max_tasks=None):
+
+    worker = multiprocessing.Process(target=run_evaluation_worker, args=(steps, address, _AUTHKEY, max_tasks, 0.1))
+    worker.start()
+    return worker
+
+
+def _take_task_and_leave(address):
+
+    # Like a worker dying right after taking a task, before reporting it started
+    manager = _BrokerManager(address=address, authkey=_AUTHKEY)
+    manager.connect()
+    manager.get_tasks().get()
+
+
+class TestDistributedEvaluator(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self._evaluator = None
+        self._workers = []
+
+    def tearDown(self) -> None:
+
+        if self._evaluator is not None:
+            self._evaluator.shutdown()
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+
+    def test_same_results_as_process_pool(self):
+
+        individuals = [[str(i), str(i + 1)] for i in range(10)]
+
+        random.seed(7)
+        evaluator = ProcessPoolEvaluator(NoisySteps(), 2)
+        expected = evaluator.evaluate(individuals, verbose=False)
+        evaluator.shutdown()
+
+        random.seed(7)
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY)
+        self._workers = [_start_worker(NoisySteps(), self._evaluator.address) for _ in range(3)]
+        self.assertEqual(self._evaluator.evaluate(individuals, verbose=False), expected)
+        self.assertEqual(self._evaluator.evaluate_bounded(individuals[:2], 0.0, verbose=False)[0][1], True)
+
+    def test_submitted_individuals_are_evaluated_together(self):
+
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, max_retries=0)
+        barrier = multiprocessing.Barrier(2)
+        self._workers = [_start_worker(RendezvousSteps(barrier), self._evaluator.address, max_tasks=1)
+                         for _ in range(2)]
+
+        futures = [self._evaluator.submit([str(i)], verbose=False) for i in range(2)]
+        self.assertGreater(len(self._evaluator.wait(futures)), 0)
+        for i, future in enumerate(futures):
+            self.assertLessEqual(-i, future.result())
+            self.assertLess(future.result(), -i + 1)
+
+    def test_workers_joining_and_leaving(self):
+
+        individuals = [[str(i)] for i in range(10)]
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, max_retries=2, task_timeout=0.5)
+        address = self._evaluator.address
+
+        # One worker leaves after a few evaluations and another one crashes, while a last one joins later
+        self._workers = [_start_worker(FlakySteps(), address, max_tasks=3), _start_worker(CrashingSteps(), address)]
+        late_start = threading.Timer(0.3, lambda: self._workers.append(_start_worker(FlakySteps(), address)))
+        late_start.start()
+
+        fitness = self._evaluator.evaluate(individuals, verbose=False)
+        late_start.join()
+        for i, value in enumerate(fitness):
+            self.assertLessEqual(-i, value)
+            self.assertLess(value, -i + 1)
+
+    def test_tasks_never_started_are_handed_out_again(self):
+
+        individuals = [[str(i)] for i in range(4)]
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, task_timeout=0.5)
+        address = self._evaluator.address
+
+        thief = multiprocessing.Process(target=_take_task_and_leave, args=(address,))
+        thief.start()
+        self._workers = [thief]
+        late_start = threading.Timer(0.3, lambda: self._workers.append(_start_worker(FlakySteps(), address)))
+        late_start.start()
+
+        fitness = self._evaluator.evaluate(individuals, verbose=False)
+        late_start.join()
+        for i, value in enumerate(fitness):
+            self.assertLessEqual(-i, value)
+            self.assertLess(value, -i + 1)
+
+    def test_tasks_handed_out_again_are_dropped_after_batch(self):
+
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, task_timeout=0.2)
+        self._workers = [_start_worker(SlowSteps(), self._evaluator.address, max_tasks=1)]
+
+        # The slow evaluation is handed out again before it completes
+        fitness = self._evaluator.evaluate([['1']], verbose=False)
+        self.assertLessEqual(-1, fitness[0])
+        self.assertEqual(self._evaluator._tasks.qsize(), 0)
+
+    def test_no_worker_times_out(self):
+
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, worker_timeout=0.5)
+        with self.assertRaises(RuntimeError):
+            self._evaluator.evaluate([['0'], ['1']], verbose=False)
+
+    def test_failed_evaluations_are_retried_up_to_limit(self):
+
+        self._evaluator = DistributedEvaluator(('localhost', 0), _AUTHKEY, max_retries=0)
+        self._workers = [_start_worker(FlakySteps(), self._evaluator.address)]
+        with self.assertRaises(RuntimeError):
+            self._evaluator.evaluate([['1']], verbose=False)
+
+    def test_authkey_is_needed(self):
+
+        with self.assertRaises(ValueError):
+            DistributedEvaluator(('localhost', 0), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
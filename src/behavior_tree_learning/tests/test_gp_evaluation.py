@@ -0,0 +1,427 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import asyncio
+import shutil
+import tempfile
+import unittest
+from interface import implements
+from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.operators import GeneticOperators
+from behavior_tree_learning.core.gp.environment import GeneticEnvironment, make_steps
+from behavior_tree_learning.core.gp.parameters import GeneticParameters
+from behavior_tree_learning.core.gp.evaluation import EvaluationMethods, SerialEvaluator, ProcessPoolEvaluator, \
+    AsyncioEvaluator, make_evaluator
+from behavior_tree_learning.core.gp.hash_table import HashTable
+from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
+
+
+class NoisySteps(implements(AlgorithmSteps)):
+
+    def calculate_fitness(self, individual, verbose):
+        return -sum(int(gene) for gene in individual) + random.random()
+
+
+class DigitSteps(implements(AlgorithmSteps)):
+
+    def calculate_fitness(self, individual, verbose):
+        return -float(sum(int(gene) for gene in individual))
+
+
+class HookedDigitSteps(implements(AlgorithmSteps)):
+
+    def __init__(self):
+        self.hooks = []
+
+    def crossover_population(self, population):
+        self.hooks.append(('crossover', len(population)))
+
+    def mutated_population(self, population):
+        self.hooks.append(('mutation', len(population)))
+
+    def survided_population(self, population):
+        self.hooks.append(('survivors', len(population)))
+
+    def calculate_fitness(self, individual, verbose):
+        return -float(sum(int(gene) for gene in individual))
+
+
+class ScalarEnvironment(implements(GeneticEnvironment)):
+
+    def run_and_compute(self, individual, verbose):
+        return float(len(individual))
+
+    def plot_individual(self, path, plot_name, individual):
+        pass
+
+
+class BatchEnvironment(implements(GeneticEnvironment)):
+
+    def __init__(self):
+        self.batches = []
+
+    def run_and_compute(self, individual, verbose):
+        raise RuntimeError("Individuals must be run in batches")
+
+    def run_and_compute_batch(self, individuals, verbose):
+        self.batches.append(list(individuals))
+        return [float(len(individual)) for individual in individuals]
+
+    def plot_individual(self, path, plot_name, individual):
+        pass
+
+
+class AsyncEnvironment(implements(GeneticEnvironment)):
+    """
+    Episodes wait on I/O before returning the length of the individual
+    """
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    def run_and_compute(self, individual, verbose):
+        raise RuntimeError("Individuals must be run as coroutines")
+
+    async def run_and_compute_async(self, individual, verbose):
+
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01 * (len(individual) % 3))
+        self.running -= 1
+        return float(len(individual))
+
+    def plot_individual(self, path, plot_name, individual):
+        pass
+
+
+class BoundedEnvironment(implements(GeneticEnvironment)):
+    """
+    Fitness is minus the length of the individual, and that is also known before running it
+    """
+
+    def __init__(self):
+        self.exact_runs = []
+        self.bounded_runs = []
+
+    def run_and_compute(self, individual, verbose):
+        self.exact_runs.append(list(individual))
+        return -float(len(individual))
+
+    def run_and_compute_bounded(self, individual, cutoff, verbose):
+        self.bounded_runs.append(list(individual))
+        bound = -float(len(individual))
+        if bound < cutoff:
+            return bound, False
+        return self.run_and_compute(individual, verbose), True
+
+    def plot_individual(self, path, plot_name, individual):
+        pass
+
+
+class EstimatedEnvironment(BoundedEnvironment):
+    """
+    Individuals starting with '0' are scored without running them, and the others bounded
+    """
+
+    def estimate_fitness(self, individual):
+        return -float(len(individual)), individual[0] == '0'
+
+
+class ListOperators(implements(GeneticOperators)):
+
+    def random_genome(self, length):
+        return [str(random.randint(0, 9)) for _ in range(length)]
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        mutated = list(genome)
+        mutated[random.randint(0, len(mutated) - 1)] = str(random.randint(0, 9))
+        return mutated
+
+    def crossover_genome(self, genome1, genome2, replace):
+        point = random.randint(1, min(len(genome1), len(genome2)) - 1)
+        return genome1[:point] + genome2[point:], genome2[:point] + genome1[point:]
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_make_evaluator(self):
+
+        parameters = GeneticParameters()
+        evaluator = make_evaluator(NoisySteps(), parameters)
+        self.assertIsInstance(evaluator, SerialEvaluator)
+        evaluator.shutdown()
+
+        parameters.evaluation = EvaluationMethods.PROCESS_POOL
+        evaluator = make_evaluator(NoisySteps(), parameters)
+        self.assertIsInstance(evaluator, ProcessPoolEvaluator)
+        evaluator.shutdown()
+
+        parameters.evaluation = EvaluationMethods.ASYNCIO
+        evaluator = make_evaluator(NoisySteps(), parameters)
+        self.assertIsInstance(evaluator, AsyncioEvaluator)
+        evaluator.shutdown()
+
+        parameters.evaluation = None
+        with self.assertRaises(Exception):
+            make_evaluator(NoisySteps(), parameters)
+
+    def test_serial_evaluator_keeps_order(self):
+
+        evaluator = SerialEvaluator(NoisySteps())
+        fitness = evaluator.evaluate([['1'], ['2'], ['3']], verbose=False)
+        self.assertEqual(len(fitness), 3)
+        for i, value in enumerate(fitness):
+            self.assertLessEqual(-(i + 1), value)
+            self.assertLess(value, -i)
+
+    def test_steps_fall_back_to_scalar_fitness(self):
+
+        steps = make_steps(ScalarEnvironment())
+        self.assertEqual(steps.calculate_fitness_batch([['a'], ['a', 'b']], False), [1.0, 2.0])
+
+    def test_serial_evaluator_dispatches_one_batch(self):
+
+        environment = BatchEnvironment()
+        evaluator = SerialEvaluator(make_steps(environment))
+
+        self.assertEqual(evaluator.evaluate([['a'], ['a', 'b']], verbose=False), [1.0, 2.0])
+        self.assertEqual(evaluator.evaluate([], verbose=False), [])
+        self.assertEqual(environment.batches, [[['a'], ['a', 'b']]])
+
+    def test_steps_fall_back_to_exact_fitness(self):
+
+        steps = make_steps(ScalarEnvironment())
+        self.assertEqual(steps.calculate_fitness_batch_bounded([['a'], ['a', 'b']], 5.0, False),
+                         [(1.0, True), (2.0, True)])
+
+    def test_dominated_individuals_are_bounded(self):
+
+        environment = BoundedEnvironment()
+        evaluator = SerialEvaluator(make_steps(environment))
+        hash_table = HashTable()
+        gp = GeneticProgramming(ListOperators(), '')
+
+        individuals = [['1'], ['1', '2', '3'], ['4', '5']]
+        fitness = gp._calculate_fitness(individuals, hash_table, evaluator, cutoff=-2.5)
+        self.assertEqual(fitness, [-1.0, -3.0, -2.0])
+        self.assertEqual(environment.exact_runs, [['1'], ['4', '5']])
+        self.assertEqual(hash_table.find(['1', '2', '3']), None)
+        self.assertEqual(hash_table.find_bound(['1', '2', '3']), -3.0)
+
+        # Bound is reused while it is below the cutoff, otherwise the exact fitness is needed
+        gp._calculate_fitness([['1', '2', '3']], hash_table, evaluator, cutoff=-2.5)
+        self.assertEqual(len(environment.bounded_runs), 3)
+        fitness = gp._calculate_fitness([['1', '2', '3']], hash_table, evaluator)
+        self.assertEqual(fitness, [-3.0])
+        self.assertEqual(environment.exact_runs[-1], ['1', '2', '3'])
+
+        # Reruns of individuals with exact fitness are never stopped early
+        gp._calculate_fitness([['1', '2', '3']], hash_table, evaluator, rerun=2, cutoff=-2.5)
+        self.assertEqual(len(environment.bounded_runs), 3)
+        self.assertEqual(hash_table.find(['1', '2', '3']), [-3.0, -3.0])
+
+    def test_estimates_replace_simulations(self):
+
+        environment = EstimatedEnvironment()
+        evaluator = SerialEvaluator(make_steps(environment))
+        hash_table = HashTable()
+        gp = GeneticProgramming(ListOperators(), '')
+        gp._screening_steps = make_steps(environment)
+
+        individuals = [['0', '1', '2'], ['1'], ['1', '2', '3'], ['0', '1', '2']]
+        fitness = gp._calculate_fitness(individuals, hash_table, evaluator, cutoff=-2.5)
+        self.assertEqual(fitness, [-3.0, -1.0, -3.0, -3.0])
+        self.assertEqual(environment.exact_runs, [['1']])
+        self.assertEqual(environment.bounded_runs, [['1']])
+        self.assertEqual(gp.simulations_avoided(), (1, 1))
+        self.assertEqual(hash_table.num_values(), 1)
+
+        # Without cutoff, bounds cannot replace simulations
+        fitness = gp._calculate_fitness([['1', '2', '3']], hash_table, evaluator)
+        self.assertEqual(fitness, [-3.0])
+        self.assertEqual(environment.exact_runs[-1], ['1', '2', '3'])
+
+    def test_asyncio_evaluator_awaits_batch(self):
+
+        environment = AsyncEnvironment()
+        evaluator = AsyncioEvaluator(make_steps(environment), max_episodes=3)
+        individuals = [['a'] * length for length in range(1, 9)]
+
+        self.assertEqual(evaluator.evaluate(individuals, verbose=False), [float(i) for i in range(1, 9)])
+        self.assertEqual(environment.max_running, 3)
+        self.assertEqual(evaluator.evaluate_bounded(individuals[:2], -1.0, verbose=False), [(1.0, True), (2.0, True)])
+        evaluator.shutdown()
+
+        # Steps without coroutines are evaluated one at a time
+        evaluator = AsyncioEvaluator(make_steps(ScalarEnvironment()), max_episodes=3)
+        self.assertEqual(evaluator.evaluate([['a'], ['a', 'b']], verbose=False), [1.0, 2.0])
+        evaluator.shutdown()
+
+    def test_process_pool_does_not_depend_on_workers(self):
+
+        individuals = [[str(i), str(i + 1)] for i in range(10)]
+
+        results = []
+        for num_workers in [1, 3]:
+            random.seed(7)
+            evaluator = ProcessPoolEvaluator(NoisySteps(), num_workers)
+            results.append(evaluator.evaluate(individuals, verbose=False))
+            evaluator.shutdown()
+
+        self.assertEqual(results[0], results[1])
+
+    def test_seeded_runs_do_not_depend_on_workers(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_generations = 4
+            parameters.fitness_threshold = float('inf')
+            parameters.evaluation = EvaluationMethods.PROCESS_POOL
+
+            results = []
+            for num_workers in [1, 4]:
+                parameters.n_workers = num_workers
+                gp = GeneticProgramming(ListOperators(), output_directory)
+                population, fitness, best_fitness, _ = gp.run(NoisySteps(), parameters, seed=1)
+                results.append((population, fitness, best_fitness))
+
+            self.assertEqual(results[0], results[1])
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_evaluators_submit_individuals(self):
+
+        future = SerialEvaluator(DigitSteps()).submit(['1', '2'], verbose=False)
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), -3.0)
+
+        evaluator = ProcessPoolEvaluator(DigitSteps(), 2)
+        futures = [evaluator.submit([str(i)], verbose=False) for i in range(4)]
+        self.assertEqual([future.result() for future in futures], [0.0, -1.0, -2.0, -3.0])
+        evaluator.shutdown()
+
+        # Episodes submitted run together while waiting for any of them
+        environment = AsyncEnvironment()
+        evaluator = AsyncioEvaluator(make_steps(environment), max_episodes=2)
+        futures = [evaluator.submit(['a'] * length, verbose=False) for length in range(1, 4)]
+        done = evaluator.wait(futures)
+        self.assertIn(futures[0], done)
+        self.assertNotIn(futures[1], done)
+        self.assertEqual(environment.max_running, 2)
+        self.assertEqual(futures[0].result(), 1.0)
+        evaluator.shutdown()
+
+    def test_steady_state_replaces_worst_individuals(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_generations = 6
+            parameters.fitness_threshold = float('inf')
+            parameters.steady_state = True
+
+            for evaluation, num_workers in [(EvaluationMethods.SERIAL, 1), (EvaluationMethods.PROCESS_POOL, 3),
+                                            (EvaluationMethods.ASYNCIO, 3)]:
+                parameters.evaluation = evaluation
+                parameters.n_workers = num_workers
+                gp = GeneticProgramming(ListOperators(), output_directory)
+                population, fitness, best_fitness, best_individual = gp.run(DigitSteps(), parameters, seed=1)
+
+                self.assertEqual(len(population), parameters.n_population)
+                self.assertEqual(fitness, [DigitSteps().calculate_fitness(individual, False)
+                                           for individual in population])
+                self.assertEqual(len(best_fitness), parameters.n_generations)
+                self.assertEqual(best_fitness, sorted(best_fitness))
+                self.assertEqual(best_fitness[-1], max(fitness))
+                self.assertGreater(best_fitness[-1], best_fitness[0])
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_seeded_steady_state_runs_repeat(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_generations = 4
+            parameters.fitness_threshold = float('inf')
+            parameters.steady_state = True
+            parameters.n_workers = 4
+
+            # Serial evaluations complete when submitted, so several complete together
+            results = []
+            for _ in range(2):
+                gp = GeneticProgramming(ListOperators(), output_directory)
+                results.append(gp.run(NoisySteps(), parameters, seed=1)[:3])
+
+            self.assertEqual(results[0], results[1])
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_steady_state_keeps_baseline_and_calls_steps(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_generations = 4
+            parameters.fitness_threshold = float('inf')
+            parameters.steady_state = True
+            base_line = ['9', '9', '9', '9', '9']
+
+            steps = HookedDigitSteps()
+            gp = GeneticProgramming(ListOperators(), output_directory)
+            population, _, _, _ = gp.run(steps, parameters, seed=1, base_line=base_line)
+
+            self.assertIn(base_line, population)
+            self.assertEqual(len({tuple(individual) for individual in population}), len(population))
+            kinds = {kind for kind, _ in steps.hooks}
+            self.assertEqual(kinds, {'crossover', 'mutation', 'survivors'})
+            self.assertEqual(len([kind for kind in steps.hooks if kind[0] == 'survivors']),
+                             parameters.n_generations - 1)
+
+            for name, value in [('rerun_fitness', 1), ('early_termination', True), ('boost_baseline', True)]:
+                unsupported = GeneticParameters(steady_state=True, **{name: value})
+                with self.assertRaises(ValueError):
+                    gp.run(steps, unsupported, seed=1, base_line=base_line)
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_steady_state_rejects_duplicates(self):
+
+        parameters = GeneticParameters()
+        population = [['1'], ['2']]
+        fitness = [-1.0, -2.0]
+
+        self.assertFalse(GeneticProgramming._replace_worst(population, fitness, ['1'], -1.0, parameters, None))
+        self.assertTrue(GeneticProgramming._replace_worst(population, fitness, ['0'], 0.0, parameters, None))
+        self.assertEqual(population, [['1'], ['0']])
+
+        parameters.allow_identical = True
+        self.assertTrue(GeneticProgramming._replace_worst(population, fitness, ['0'], 0.0, parameters, None))
+        self.assertEqual(population, [['0'], ['0']])
+
+    def test_bounded_cache_keeps_population(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_generations = 6
+            parameters.fitness_threshold = float('inf')
+            parameters.cache_capacity = parameters.n_population
+
+            gp = GeneticProgramming(ListOperators(), output_directory)
+            population, fitness, _, _ = gp.run(DigitSteps(), parameters, seed=1)
+
+            self.assertEqual(fitness, [DigitSteps().calculate_fitness(individual, False)
+                                       for individual in population])
+            self.assertGreater(gp._num_evictions, 0)
+        finally:
+            shutil.rmtree(output_directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from interface import implements
+from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.operators import GeneticOperators
+from behavior_tree_learning.core.gp.parameters import GeneticParameters
+from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
+from behavior_tree_learning.core.gp.evaluation import SerialEvaluator
+from behavior_tree_learning.core.gp.hash_table import HashTable
+from behavior_tree_learning.core.gp.fitness_store import SqliteFitnessStore, scenario_fingerprint
+
+
+class SumSteps(implements(AlgorithmSteps)):
+
+    def __init__(self):
+        self.evaluated = []
+
+    def calculate_fitness(self, individual, verbose):
+        self.evaluated.append(list(individual))
+        return -float(sum(int(gene) for gene in individual))
+
+
+class ListOperators(implements(GeneticOperators)):
+
+    def random_genome(self, length):
+        return [str(random.randint(0, 9)) for _ in range(length)]
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        mutated = list(genome)
+        mutated[random.randint(0, len(mutated) - 1)] = str(random.randint(0, 9))
+        return mutated
+
+    def crossover_genome(self, genome1, genome2, replace):
+        point = random.randint(1, min(len(genome1), len(genome2)) - 1)
+        return genome1[:point] + genome2[point:], genome2[:point] + genome1[point:]
+
+
+def _append_values(fitness_store, worker):
+
+    for value in range(20):
+        fitness_store.insert(['a'], float(worker * 100 + value))
+    fitness_store.close()
+
+
+class TestFitnessStore(unittest.TestCase):
+
+    def setUp(self):
+
+        self._directory_path = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory_path, 'store', 'fitness.sqlite')
+
+    def tearDown(self):
+
+        shutil.rmtree(self._directory_path, ignore_errors=True)
+
+    def test_values_are_kept_by_scenario(self):
+
+        scenario = scenario_fingerprint('tower', [(0.0, 0.1, 0.0)])
+        self.assertEqual(scenario, scenario_fingerprint('tower', [(0.0, 0.1, 0.0)]))
+        self.assertNotEqual(scenario, scenario_fingerprint('tower', [(0.0, 0.2, 0.0)]))
+
+        fitness_store1 = SqliteFitnessStore(self._path, scenario)
+        fitness_store1.insert(['s(', 'a0', ')'], -1.0)
+        fitness_store1.insert(['s(', 'a0', ')'], -2.0)
+        self.assertEqual(fitness_store1.find(('s(', 'a0', ')')), [-1.0, -2.0])
+        self.assertIsNone(fitness_store1.find(['a0']))
+
+        fitness_store2 = pickle.loads(pickle.dumps(fitness_store1))
+        self.assertEqual(fitness_store2.find(['s(', 'a0', ')']), [-1.0, -2.0])
+        self.assertIsNone(SqliteFitnessStore(self._path, 'other').find(['s(', 'a0', ')']))
+
+        fitness_store1.close()
+        fitness_store2.close()
+
+    def test_concurrent_values_are_appended(self):
+
+        fitness_store = SqliteFitnessStore(self._path, 'scenario')
+        fitness_store.find(['a'])
+
+        workers = [multiprocessing.Process(target=_append_values, args=(fitness_store, worker))
+                   for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(sorted(fitness_store.find(['a'])),
+                         [float(worker * 100 + value) for worker in range(4) for value in range(20)])
+        fitness_store.close()
+
+    def test_runs_share_fitness(self):
+
+        parameters = GeneticParameters()
+        parameters.n_generations = 4
+        parameters.fitness_threshold = float('inf')
+
+        evaluated = []
+        for _ in range(2):
+            steps = SumSteps()
+            fitness_store = SqliteFitnessStore(self._path, 'scenario')
+            gp = GeneticProgramming(ListOperators(), self._directory_path)
+            gp.run(steps, parameters, seed=1, fitness_store=fitness_store)
+            fitness_store.close()
+            evaluated.append(steps.evaluated)
+
+        # The second run is the same as the first one, so nothing is simulated again
+        self.assertGreater(len(evaluated[0]), 0)
+        self.assertEqual(evaluated[1], [])
+
+    def test_stored_values_seed_hash_table(self):
+
+        fitness_store = SqliteFitnessStore(self._path, 'scenario')
+        for value in [-1.0, -2.0]:
+            fitness_store.insert(['1', '2'], value)
+
+        steps = SumSteps()
+        hash_table = HashTable()
+        gp = GeneticProgramming(ListOperators(), self._directory_path)
+        gp._fitness_store = fitness_store
+
+        self.assertEqual(gp._calculate_fitness([['1', '2']], hash_table, SerialEvaluator(steps)), [-1.5])
+        self.assertEqual(hash_table.find_statistics(['1', '2']).count, 2)
+        self.assertEqual(steps.evaluated, [])
+
+        # Reruns go through the hash table, and only new values are stored
+        gp._calculate_fitness([['1', '2']], hash_table, SerialEvaluator(steps), rerun=2)
+        self.assertEqual(steps.evaluated, [['1', '2']])
+        self.assertEqual(hash_table.find_statistics(['1', '2']).count, 3)
+        self.assertEqual(fitness_store.find(['1', '2']), [-1.0, -2.0, -3.0])
+        fitness_store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,16 +4,38 @@ import paths
 paths.add_modules_to_path()
 
 import os
+import pickle
+import shutil
+import statistics
 import unittest
-from behavior_tree_learning.core.gp.hash_table import HashTable, _Node
+from behavior_tree_learning.core.gp.hash_table import HashTable, EvictionPolicies
 
 
 class TestHastTable(unittest.TestCase):
-  
+
+    def setUp(self):
+
+        self._directory_path = os.path.join('logs', 'test_1')
+        shutil.rmtree(self._directory_path, ignore_errors=True)
+
+    def tearDown(self):
+
+        shutil.rmtree(self._directory_path, ignore_errors=True)
+
+    def test_size_is_deprecated(self):
+
+        with self.assertWarns(DeprecationWarning):
+            hash_table = HashTable(100000, self._directory_path)
+        hash_table.insert(['1'], 1)
+        hash_table.write()
+        self.assertTrue(os.path.isdir(self._directory_path))
+
+        with self.assertRaises(TypeError):
+            HashTable(None, self._directory_path, 3)
+
     def test_save_table_and_load(self):
 
-        directory_path = os.path.join('logs', 'test_1')
-        hash_table1 = HashTable(size=10, path=directory_path)
+        hash_table1 = HashTable(path=self._directory_path)
         hash_table1.insert(['1'], 1)
         hash_table1.insert(['2'], 2)
         hash_table1.insert(['3'], 3)
@@ -21,15 +43,87 @@ class TestHastTable(unittest.TestCase):
         hash_table1.insert(['4'], 5)
         hash_table1.write()
 
-        hash_table2 = HashTable(size=10, path=directory_path)
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
+
+        self.assertEqual(hash_table1, hash_table2)
+        self.assertEqual(hash_table2.num_values(), 5)
+
+    def test_bounds_are_kept_apart(self):
+
+        hash_table1 = HashTable(path=self._directory_path)
+        hash_table1.insert(['1'], -3, exact=False)
+        hash_table1.insert(['1'], -5, exact=False)
+        hash_table1.insert(['2'], -1)
+        hash_table1.write()
+
+        self.assertEqual(hash_table1.find(['1']), None)
+        self.assertEqual(hash_table1.find_bound(['1']), -5)
+        self.assertEqual(hash_table1.find_bound(['2']), None)
+
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
+
+        self.assertEqual(hash_table1, hash_table2)
+        self.assertEqual(hash_table2.num_values(), 3)
+
+    def test_write_appends_new_values(self):
+
+        hash_table1 = HashTable(path=self._directory_path)
+        hash_table1.insert(['1'], 1)
+        hash_table1.write()
+        hash_table1.insert(['1'], 2)
+        hash_table1.insert(['2'], 3)
+        hash_table1.write()
+
+        hash_table2 = HashTable(path=self._directory_path)
         hash_table2.load()
+        hash_table2.insert(['3'], 4)
+        hash_table2.write()
+        hash_table1.insert(['3'], 4)
+
+        hash_table3 = HashTable(path=self._directory_path)
+        hash_table3.load()
+
+        self.assertEqual(hash_table3.find(['1']), [1, 2])
+        self.assertEqual(hash_table1, hash_table3)
+
+    def test_new_table_overwrites_log(self):
+
+        hash_table1 = HashTable(path=self._directory_path)
+        hash_table1.insert(['1'], 1)
+        hash_table1.write()
+
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.insert(['2'], 2)
+        hash_table2.write()
+
+        hash_table3 = HashTable(path=self._directory_path)
+        hash_table3.load()
+
+        self.assertEqual(hash_table2, hash_table3)
+
+    def test_load_legacy_table(self):
 
+        os.makedirs(self._directory_path)
+        with open(os.path.join(self._directory_path, 'hash_log.txt'), 'w') as f:
+            f.write("key: ['s(', 'a0', ')'], value: [1.0, 2.0], count: 2\n")
+            f.write("key: ['a1'], value: [3.0], count: 1\n")
+
+        hash_table1 = HashTable(path=self._directory_path)
+        hash_table1.load()
+        self.assertEqual(hash_table1.find(['s(', 'a0', ')']), [1.0, 2.0])
+        self.assertEqual(hash_table1.find(['a1']), [3.0])
+        hash_table1.write()
+
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
         self.assertEqual(hash_table1, hash_table2)
 
     def test_tables_are_equal(self):
 
-        hash_table1 = HashTable(size=10)
-        hash_table2 = HashTable(size=10)
+        hash_table1 = HashTable()
+        hash_table2 = HashTable()
         hash_table1.insert(['1'], 1)
         hash_table1.insert(['2'], 2)
         hash_table2.insert(['3'], 3)
@@ -39,25 +133,9 @@ class TestHastTable(unittest.TestCase):
         self.assertNotEqual(hash_table1, hash_table2)
         self.assertNotEqual(hash_table1, 1)
 
-    def test_nodes_are_equal(self):
-
-        node1 = _Node(['a'], 1)
-        node2 = _Node(['a'], 1)
-        node3 = _Node(['b'], 2)
-        self.assertEqual(node1, node2)
-        self.assertNotEqual(node1, node3)
-        self.assertNotEqual(node1, ['a'])
-        self.assertNotEqual(node1, 1)
-
-        node1.next = node3
-        self.assertNotEqual(node1, node2)
-
-        node2.next = node3
-        self.assertEqual(node1, node2)
-
     def test_multiple_entries_in_one_table(self):
 
-        hash_table1 = HashTable(size=10)
+        hash_table1 = HashTable()
         hash_table1.insert(['a'], 1)
         hash_table1.insert(['a'], 2)
         hash_table1.insert(['a'], 3)
@@ -66,7 +144,140 @@ class TestHastTable(unittest.TestCase):
         hash_table1.insert(['b'], 6)
 
         self.assertEqual(hash_table1.find(['a']), [1, 2, 3])
-        self.assertEqual(hash_table1.find(['b']), [4, 5, 6])
+        self.assertEqual(hash_table1.find(('b',)), [4, 5, 6])
+        self.assertIsNone(hash_table1.find(['c']))
+        self.assertEqual(hash_table1.num_values(), 6)
+
+    def test_statistics_of_values(self):
+
+        values = [3.0, -1.5, 4.0, 10.25, 0.5]
+        hash_table1 = HashTable(path=self._directory_path, max_samples=0)
+        for value in values:
+            hash_table1.insert(['a'], value)
+
+        key_statistics = hash_table1.find_statistics(['a'])
+        self.assertEqual(key_statistics.count, 5)
+        self.assertAlmostEqual(key_statistics.mean, statistics.mean(values))
+        self.assertAlmostEqual(key_statistics.variance(), statistics.variance(values))
+        self.assertEqual((key_statistics.min, key_statistics.max), (-1.5, 10.25))
+        self.assertEqual(hash_table1.find_samples(['a']), [])
+        self.assertIsNone(hash_table1.find_statistics(['b']))
+        with self.assertRaises(ValueError):
+            hash_table1.find(['a'])
+
+        hash_table1.insert(['b'], 1.0)
+        self.assertIsNone(hash_table1.find_statistics(['b']).variance())
+
+        hash_table1.write()
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
+
+        self.assertEqual(hash_table1, hash_table2)
+        self.assertEqual(hash_table2.num_values(), 6)
+
+    def test_samples_are_capped(self):
+
+        hash_table1 = HashTable(path=self._directory_path, max_samples=3)
+        for value in range(100):
+            hash_table1.insert(['a'], value)
+        hash_table1.write()
+        hash_table1.insert(['a'], 100)
+        hash_table1.write()
+
+        samples = hash_table1.find_samples(['a'])
+        self.assertEqual(len(samples), 3)
+        self.assertTrue(set(samples) <= set(range(101)))
+        self.assertEqual(hash_table1.find_statistics(['a']).count, 101)
+
+        # Only the last statistics of each genome are loaded
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
+        self.assertEqual(hash_table1, hash_table2)
+        self.assertEqual(hash_table2.num_values(), 101)
+
+    def test_load_table_of_single_values(self):
+
+        os.makedirs(self._directory_path)
+        with open(os.path.join(self._directory_path, 'hash_log.pickle'), 'wb') as f:
+            pickle.dump([(('1',), 1.0), (('1',), 2.0), (('2',), -3.0, False)], f)
+
+        hash_table1 = HashTable(path=self._directory_path)
+        hash_table1.load()
+        self.assertEqual(hash_table1.find(['1']), [1.0, 2.0])
+        self.assertEqual(hash_table1.find_bound(['2']), -3.0)
+        self.assertEqual(hash_table1.num_values(), 3)
+
+    def test_least_recently_used_are_evicted(self):
+
+        hash_table1 = HashTable(path=self._directory_path, capacity=3)
+        hash_table1.protect([['1']])
+        for key in ['1', '2', '3']:
+            hash_table1.insert([key], float(key))
+        hash_table1.find(['2'])
+        hash_table1.insert(['4'], 4.0)
+        hash_table1.insert(['5'], -5.0, exact=False)
+
+        # '1' is protected, '3' and then '2' were used least recently
+        self.assertEqual(hash_table1.find(['1']), [1.0])
+        self.assertIsNone(hash_table1.find(['2']))
+        self.assertIsNone(hash_table1.find(['3']))
+        self.assertEqual(hash_table1.find(['4']), [4.0])
+        self.assertEqual(hash_table1.find_bound(['5']), -5.0)
+        self.assertEqual(hash_table1.num_evictions(), 2)
+
+        # Evicted values are still written, counted once and merged with the values inserted again
+        hash_table1.protect([])
+        hash_table1.insert(['3'], 3.5)
+        hash_table1.write()
+
+        hash_table2 = HashTable(path=self._directory_path)
+        hash_table2.load()
+        self.assertEqual(hash_table2.find(['2']), [2.0])
+        self.assertEqual(hash_table2.find(['3']), [3.0, 3.5])
+        self.assertEqual(hash_table2.num_values(), 6)
+
+    def test_incarnations_are_merged(self):
+
+        hash_table1 = HashTable(path=self._directory_path, capacity=1)
+        for value in [1.0, 2.0, 3.0]:
+            hash_table1.insert(['1'], value)
+        hash_table1.insert(['1'], 0.5, exact=False)
+        hash_table1.write()
+
+        # A hot start evicts '1' and inserts it again, twice
+        hash_table2 = HashTable(path=self._directory_path, capacity=1)
+        hash_table2.load()
+        for value in [4.0, 5.0]:
+            hash_table2.insert(['2'], 0.0)
+            hash_table2.insert(['1'], value)
+            hash_table2.insert(['1'], value - 3.0, exact=False)
+            hash_table2.write()
+
+        hash_table3 = HashTable(path=self._directory_path)
+        hash_table3.load()
+        key_statistics = hash_table3.find_statistics(['1'])
+        self.assertEqual(key_statistics.count, 5)
+        self.assertAlmostEqual(key_statistics.mean, 3.0)
+        self.assertAlmostEqual(key_statistics.variance(), statistics.variance([1.0, 2.0, 3.0, 4.0, 5.0]))
+        self.assertEqual((key_statistics.min, key_statistics.max), (1.0, 5.0))
+        self.assertEqual(hash_table3.find(['1']), [1.0, 2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(hash_table3.find_bound(['1']), 0.5)
+        self.assertEqual(hash_table3.num_values(), 10)
+
+    def test_lowest_fitness_are_evicted(self):
+
+        hash_table1 = HashTable(capacity=2, eviction=EvictionPolicies.LOWEST_FITNESS)
+        hash_table1.insert(['a'], 1.0)
+        hash_table1.insert(['b'], 2.0)
+        hash_table1.insert(['a'], 5.0)
+        hash_table1.insert(['c'], 0.0)
+        self.assertIsNone(hash_table1.find(['b']))
+
+        hash_table1.protect([['c']])
+        hash_table1.insert(['d'], 4.0)
+        self.assertEqual(hash_table1.find(['c']), [0.0])
+        self.assertEqual(hash_table1.find(['d']), [4.0])
+        self.assertIsNone(hash_table1.find(['a']))
 
 
 if __name__ == '__main__':
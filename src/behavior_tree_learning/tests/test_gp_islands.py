@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import os
+import queue
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+from interface import implements
+from behavior_tree_learning.core.gp.steps import AlgorithmSteps
+from behavior_tree_learning.core.gp.operators import GeneticOperators
+from behavior_tree_learning.core.gp.parameters import GeneticParameters
+from behavior_tree_learning.core.gp.evaluation import SerialEvaluator
+from behavior_tree_learning.core.gp.hash_table import HashTable
+from behavior_tree_learning.core.gp.algorithm import GeneticProgramming
+from behavior_tree_learning.core.gp.fitness_store import SharedFitnessStore
+from behavior_tree_learning.core.gp.migration import MigrationTopology, QueueMigration, neighbours
+from behavior_tree_learning.core.gp.islands import IslandModel
+
+
+class SumSteps(implements(AlgorithmSteps)):
+
+    def __init__(self):
+        self.evaluated = []
+
+    def calculate_fitness(self, individual, verbose):
+        self.evaluated.append(list(individual))
+        return -float(sum(int(gene) for gene in individual))
+
+
+class CrashingSteps(SumSteps):
+
+    def calculate_fitness(self, individual, verbose):
+        os._exit(1)
+
+
+class ListOperators(implements(GeneticOperators)):
+
+    def random_genome(self, length):
+        return [str(random.randint(0, 9)) for _ in range(length)]
+
+    def mutate_gene(self, genome, p_add, p_delete):
+        mutated = list(genome)
+        mutated[random.randint(0, len(mutated) - 1)] = str(random.randint(0, 9))
+        return mutated
+
+    def crossover_genome(self, genome1, genome2, replace):
+        point = random.randint(1, min(len(genome1), len(genome2)) - 1)
+        return genome1[:point] + genome2[point:], genome2[:point] + genome1[point:]
+
+
+class TestMigration(unittest.TestCase):
+
+    def test_topologies(self):
+
+        self.assertEqual(neighbours(MigrationTopology.RING, 2, 3), [0])
+        self.assertEqual(neighbours(MigrationTopology.FULLY_CONNECTED, 1, 3), [0, 2])
+        self.assertEqual(neighbours(MigrationTopology.RING, 0, 1), [])
+
+    def test_migrants_replace_worst_individuals(self):
+
+        inbox = queue.Queue()
+        neighbour_inbox = queue.Queue()
+        migration = QueueMigration(inbox, [neighbour_inbox], interval=2, num_migrants=2)
+
+        population = [['1'], ['2'], ['3'], ['4']]
+        fitness = [-1.0, -2.0, -3.0, -4.0]
+        self.assertEqual(migration.migrate(1, population, fitness), (population, fitness))
+        self.assertTrue(neighbour_inbox.empty())
+
+        inbox.put([(['0'], 0.0), (['1'], -1.0)])
+        inbox.put([(['9'], -9.0)])
+        population, fitness = migration.migrate(2, population, fitness)
+        self.assertEqual(neighbour_inbox.get_nowait(), [(['1'], -1.0), (['2'], -2.0)])
+        self.assertEqual(population, [['1'], ['2'], ['3'], ['0']])
+        self.assertEqual(fitness, [-1.0, -2.0, -3.0, 0.0])
+        self.assertTrue(inbox.empty())
+
+
+class TestIslands(unittest.TestCase):
+
+    def test_stored_fitness_is_not_simulated(self):
+
+        steps = SumSteps()
+        fitness_store = SharedFitnessStore({('1', '2'): [-5.0]}, threading.Lock())
+        gp = GeneticProgramming(ListOperators(), '')
+        gp._fitness_store = fitness_store
+
+        fitness = gp._calculate_fitness([['1', '2'], ['3']], HashTable(), SerialEvaluator(steps))
+        self.assertEqual(fitness, [-5.0, -3.0])
+        self.assertEqual(steps.evaluated, [['3']])
+        self.assertEqual(fitness_store.find(['3']), [-3.0])
+
+    def test_island_model(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = []
+            for index in range(3):
+                island_parameters = GeneticParameters()
+                island_parameters.n_population = 8
+                island_parameters.f_crossover = 0.5
+                island_parameters.n_generations = 4
+                island_parameters.fitness_threshold = float('inf')
+                island_parameters.log_name = 'island_%d' % index
+                parameters.append(island_parameters)
+
+            islands = IslandModel(ListOperators(), output_directory, MigrationTopology.FULLY_CONNECTED,
+                                  migration_interval=1, num_migrants=1)
+            results = islands.run(SumSteps(), parameters, seeds=[1, 2, 3])
+
+            self.assertEqual(len(results), 3)
+            for population, fitness, best_fitness, best_individual in results:
+                self.assertEqual(len(population), 8)
+                self.assertEqual(len(best_fitness), 4)
+                self.assertEqual(max(fitness), best_fitness[-1])
+
+            parameters[1].log_name = parameters[0].log_name
+            with self.assertRaises(ValueError):
+                islands.run(SumSteps(), parameters)
+        finally:
+            shutil.rmtree(output_directory)
+
+    def test_dead_island_is_reported(self):
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            parameters = GeneticParameters()
+            parameters.n_population = 8
+            parameters.f_crossover = 0.5
+            parameters.n_generations = 2
+
+            islands = IslandModel(ListOperators(), output_directory, poll_time=0.1)
+            with self.assertRaisesRegex(RuntimeError, "Island 0 died with exit code 1"):
+                islands.run(CrashingSteps(), [parameters])
+        finally:
+            shutil.rmtree(output_directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import unittest
+
+import py_trees as pt
+from interface import implements
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, ExecutionBackend
+from behavior_tree_learning.core.gp_sbt import WorldFactory
+from behavior_tree_learning.core.gp_sbt.environment import EnvironmentWithFitnessFunction
+from behavior_tree_learning.core.gp_sbt.fitness_function import FitnessFunction
+from tests.fwk.scripted import ScriptedWorld, get_scripted_behaviors
+
+SUCCESS = pt.common.Status.SUCCESS
+FAILURE = pt.common.Status.FAILURE
+RUNNING = pt.common.Status.RUNNING
+
+
+class ScriptedWorldFactory(implements(WorldFactory)):
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+
+    def make(self):
+        return ScriptedWorld(self.scripts)
+
+
+class TicksAndUpdates(implements(FitnessFunction)):
+
+    def compute_cost(self, world, behavior_tree, ticks, verbose):
+        return -float(ticks) - sum(world.updates.values())
+
+
+class TestEnvironmentWithFitnessFunction(unittest.TestCase):
+
+    def test_run_trees_from_cache(self):
+
+        scripts = {'c0': [FAILURE], 'c1': [SUCCESS], 'a0': [RUNNING, SUCCESS], 'a1': [SUCCESS], 'a2': [FAILURE]}
+        sbt = ['f(', 'c0', 's(', 'c1', 'a0', ')', ')']
+
+        for backend in [ExecutionBackend.PY_TREES, ExecutionBackend.NATIVE]:
+            environment = EnvironmentWithFitnessFunction(BehaviorNodeFactory(get_scripted_behaviors()),
+                                                         ScriptedWorldFactory(scripts), TicksAndUpdates(),
+                                                         tree_cache_size=4, execution_backend=backend)
+
+            fitness = [environment.run_and_compute(sbt, verbose=False) for _ in range(3)]
+            self.assertEqual(fitness, [-8.0, -8.0, -8.0])
+            self.assertEqual(len(environment._tree_cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
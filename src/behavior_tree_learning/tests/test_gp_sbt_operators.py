@@ -6,12 +6,24 @@ paths.add_modules_to_path()
 import unittest
 
 import random
+import shutil
+import tempfile
+from interface import implements
+from behavior_tree_learning.core.gp import AlgorithmSteps, GeneticParameters, GeneticProgramming
+from behavior_tree_learning.core.logger import logplot
 from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation
 from behavior_tree_learning.core.sbt import BehaviorNodeFactory
-from behavior_tree_learning.core.gp_sbt import Operators
+from behavior_tree_learning.core.sbt.behavior_tree import encode, decode
+from behavior_tree_learning.core.gp_sbt import Operators, EncodedOperators
 from tests.fwk.behavior_nodes import get_behaviors
 
 
+class ShortestTreeSteps(implements(AlgorithmSteps)):
+
+    def calculate_fitness(self, individual, verbose):
+        return -float(len(individual))
+
+
 class TestGpForSbtOperations(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -108,6 +120,82 @@ class TestGpForSbtOperations(unittest.TestCase):
         for gene in genome2:
             self.assertTrue(gene in offspring2)
 
+    def test_canonical_genome(self):
+
+        gp_operators = Operators()
+
+        self.assertEqual(gp_operators.canonical_genome(['s(', 'c1', 'c0', 'a0', ')']),
+                         gp_operators.canonical_genome(['s(', 'c0', 'c1', 'a0', ')']))
+        self.assertNotEqual(gp_operators.canonical_genome(['s(', 'a1', 'a0', ')']),
+                            gp_operators.canonical_genome(['s(', 'a0', 'a1', ')']))
+
+    def test_encoded_operators(self):
+
+        gp_operators = EncodedOperators()
+        genome1 = encode(['s(', 'c0', 'f(', 'c0', 'a0', ')', 'a0', ')'])
+        genome2 = encode(['f(', 'c1', 's(', 'c1', 'a1', ')', 'a1', ')'])
+
+        random.seed(0)
+        for _ in range(10):
+            genome = gp_operators.random_genome(5)
+            self.assertEqual(genome.typecode, 'H')
+            self.assertTrue(BehaviorTreeStringRepresentation(decode(genome)).is_valid())
+
+            mutated_genome = gp_operators.mutate_gene(genome1, p_add=0.3, p_delete=0.3)
+            self.assertNotEqual(mutated_genome, genome1)
+            self.assertTrue(BehaviorTreeStringRepresentation(decode(mutated_genome)).is_valid())
+
+            offspring1, offspring2 = gp_operators.crossover_genome(genome1, genome2, replace=True)
+            self.assertTrue(BehaviorTreeStringRepresentation(decode(offspring1)).is_valid())
+            self.assertTrue(BehaviorTreeStringRepresentation(decode(offspring2)).is_valid())
+
+        self.assertEqual(gp_operators.canonical_genome(encode(['s(', 'c1', 'c0', 'a0', ')'])),
+                         encode(['s(', 'c0', 'c1', 'a0', ')']))
+        self.assertEqual(gp_operators.decoded_genome(genome1), ['s(', 'c0', 'f(', 'c0', 'a0', ')', 'a0', ')'])
+
+    def test_encoded_operators_edit_as_string_operators(self):
+
+        string_operators = Operators()
+        encoded_operators = EncodedOperators()
+        genome1 = ['s(', 'c0', 'f(', 'c0', 'a0', ')', 'a0', ')']
+        genome2 = ['f(', 'c1', 's(', 'c1', 'a1', ')', 'a1', ')']
+
+        for seed in range(20):
+            results = []
+            for gp_operators, encoding, decoding in [(string_operators, list, list),
+                                                     (encoded_operators, encode, decode)]:
+                random.seed(seed)
+                offspring1, offspring2 = gp_operators.crossover_genome(encoding(genome1), encoding(genome2),
+                                                                       replace=seed % 2 == 0)
+                results.append([decoding(gp_operators.random_genome(6)),
+                                decoding(gp_operators.mutate_gene(encoding(genome1), p_add=0.3, p_delete=0.3)),
+                                decoding(offspring1), decoding(offspring2)])
+            self.assertEqual(results[0], results[1])
+
+    def test_encoded_genomes_are_logged_decoded(self):
+
+        parameters = GeneticParameters()
+        parameters.n_generations = 2
+        parameters.fitness_threshold = float('inf')
+
+        output_directory = tempfile.mkdtemp()
+        try:
+            gp = GeneticProgramming(EncodedOperators(), output_directory)
+            population, _, _, best_individual = gp.run(ShortestTreeSteps(), parameters, seed=1)
+
+            self.assertEqual(best_individual.typecode, 'H')
+            self.assertEqual(logplot.get_best_individual(parameters.log_name), decode(best_individual))
+
+            parameters.steady_state = True
+            gp = GeneticProgramming(EncodedOperators(), output_directory)
+            with self.assertLogs('gp', level='DEBUG') as logs:
+                gp.run(ShortestTreeSteps(), parameters, seed=1)
+            offspring = [line for line in logs.output if 'Offspring: ' in line]
+            self.assertGreater(len(offspring), 0)
+            self.assertFalse(any('array(' in line for line in offspring))
+        finally:
+            shutil.rmtree(output_directory)
+
 
 if __name__ == '__main__':
     unittest.main()
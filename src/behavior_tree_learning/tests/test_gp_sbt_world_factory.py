@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import unittest
+
+from interface import implements
+from behavior_tree_learning.core.sbt import World
+from behavior_tree_learning.core.gp_sbt import WorldFactory, PrototypeWorldFactory
+from tests.fwk.scripted import ScriptedWorld
+
+
+class CounterWorld(implements(World)):
+
+    def __init__(self):
+        self.counters = [0, 0]
+
+    def startup(self, verbose):
+        return True
+
+    def is_alive(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def snapshot(self):
+        return tuple(self.counters)
+
+    def restore(self, snapshot):
+        self.counters = list(snapshot)
+
+
+class CountingWorldFactory(implements(WorldFactory)):
+
+    def __init__(self, world_class=CounterWorld):
+        self.world_class = world_class
+        self.num_made = 0
+
+    def make(self):
+        self.num_made += 1
+        return self.world_class()
+
+
+class TestPrototypeWorldFactory(unittest.TestCase):
+
+    def test_restore_prototype(self):
+
+        world_factory = CountingWorldFactory()
+        prototype_factory = PrototypeWorldFactory(world_factory)
+
+        world = prototype_factory.make()
+        world.counters[0] += 1
+        world.counters[1] += 2
+
+        next_world = prototype_factory.make()
+        self.assertIs(next_world, world)
+        self.assertEqual(next_world.counters, [0, 0])
+        self.assertEqual(world_factory.num_made, 1)
+
+        next_world.counters[1] += 1
+        self.assertEqual(prototype_factory.make().counters, [0, 0])
+
+    def test_world_without_snapshot(self):
+
+        prototype_factory = PrototypeWorldFactory(CountingWorldFactory(lambda: ScriptedWorld({})))
+        with self.assertRaises(ValueError):
+            prototype_factory.make()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import unittest
+import numpy as np
+
+from behavior_tree_learning.core.sbt import StringBehaviorTree, ExecutionParameters
+from behavior_tree_learning.core.sbt import BatchBehaviorTrees, BehaviorNodeFactory
+from tests.fwk.scripted import ScriptedWorld, ScriptedWorlds, VectorizedScripted, get_scripted_behaviors, \
+    random_scripts, random_tree, py_trees_statuses, to_batch_status
+
+
+def _without_terminate(log):
+    return [entry for entry in log if entry[1] != 'terminate']
+
+
+class TestBatchBehaviorTrees(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self._node_factory = BehaviorNodeFactory(get_scripted_behaviors())
+        self._batch_node_factory = BehaviorNodeFactory(get_scripted_behaviors(VectorizedScripted))
+
+    def test_same_trace_as_py_trees(self):
+
+        random.seed(0)
+        for _ in range(20):
+            sbts = [random_tree() for _ in range(15)]
+            scripts = [random_scripts() for _ in sbts]
+
+            worlds = [ScriptedWorld(lane_scripts) for lane_scripts in scripts]
+            trees = [StringBehaviorTree(sbt, behaviors=self._node_factory, world=world)
+                     for sbt, world in zip(sbts, worlds)]
+            batch_world = ScriptedWorlds(scripts)
+            batch = BatchBehaviorTrees(sbts, behaviors=self._batch_node_factory, world=batch_world)
+
+            for tick in range(12):
+                # Trees are also ticked on their own, not always all of them together
+                lanes = [lane for lane in range(len(sbts)) if (lane + tick) % 4 != 0]
+                for lane in lanes:
+                    trees[lane].root.tick_once()
+                batch.tick_once(lanes)
+
+                for lane, tree in enumerate(trees):
+                    self.assertEqual(batch.statuses(lane),
+                                     [to_batch_status(status) for status in py_trees_statuses(tree.root)], sbts[lane])
+                    self.assertEqual(batch_world.worlds[lane].log, _without_terminate(worlds[lane].log), sbts[lane])
+
+    def test_same_run_as_py_trees(self):
+
+        random.seed(1)
+        for _ in range(10):
+            sbts = [random_tree() for _ in range(20)]
+            scripts = [random_scripts() for _ in sbts]
+            parameters = ExecutionParameters(max_ticks=20, max_straight_fails=random.randint(1, 3),
+                                             successes_required=random.randint(1, 3))
+
+            batch = BatchBehaviorTrees(sbts, behaviors=self._batch_node_factory, world=ScriptedWorlds(scripts))
+            status_ok, ticks = batch.run_bt(parameters)
+
+            for lane, sbt in enumerate(sbts):
+                tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=ScriptedWorld(scripts[lane]))
+                self.assertEqual((status_ok[lane], ticks[lane]), tree.run_bt(parameters), sbt)
+                self.assertEqual((batch.failed[lane], batch.timeout[lane]), (tree.failed, tree.timeout), sbt)
+                self.assertEqual((batch.depth[lane], batch.length[lane]), (tree.depth, tree.length), sbt)
+
+    def test_abort_lanes(self):
+
+        random.seed(2)
+        sbts = [random_tree() for _ in range(10)]
+        scripts = [random_scripts() for _ in sbts]
+        parameters = ExecutionParameters(max_ticks=20)
+
+        batch = BatchBehaviorTrees(sbts, behaviors=self._batch_node_factory, world=ScriptedWorlds(scripts))
+        _, ticks = batch.run_bt(parameters, abort=lambda ticks_: (np.arange(len(sbts)) % 2 == 0) & (ticks_ >= 1))
+
+        for lane, sbt in enumerate(sbts):
+            tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=ScriptedWorld(scripts[lane]))
+            tree_ticks = tree.run_bt(parameters, abort=(lambda ticks_: ticks_ >= 1) if lane % 2 == 0 else None)[1]
+            self.assertEqual(ticks[lane], tree_ticks, sbt)
+            self.assertEqual(batch.aborted[lane], tree.aborted, sbt)
+
+    def test_strings_and_lanes(self):
+
+        scripts = [random_scripts() for _ in range(2)]
+        with self.assertRaises(ValueError):
+            BatchBehaviorTrees([['a0']], behaviors=self._batch_node_factory, world=ScriptedWorlds(scripts))
+
+        with self.assertRaises(Exception):
+            BatchBehaviorTrees([['a0'], ['f(', 'nonbehavior', ')']], behaviors=self._batch_node_factory,
+                               world=ScriptedWorlds(scripts))
+
+        batch = BatchBehaviorTrees([['a0'], ['s(', 'c0', ')', 'a1']], behaviors=self._batch_node_factory,
+                                   world=ScriptedWorlds(scripts))
+        batch.tick_once()
+        self.assertEqual(len(batch.statuses(0)), 1)
+        self.assertEqual(len(batch.statuses(1)), 2)
+        np.testing.assert_array_equal(batch.status, [batch.statuses(0)[0], batch.statuses(1)[0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,72 @@ paths.add_modules_to_path()
 import unittest
 import os
 import random
+import shutil
+import tempfile
 from behavior_tree_learning.core.sbt import behavior_tree
 from behavior_tree_learning.core.sbt import BehaviorTreeStringRepresentation, StringBehaviorTree
 
 
+def _reference_is_valid(bt):
+    # Recursive implementation used before the single pass one, kept to compare verdicts
+
+    if len(bt) <= 0:
+        return False
+    if bt[0] not in behavior_tree.CONTROL_NODES and len(bt) != 1:
+        return False
+
+    for i in range(len(bt) - 1):
+        if bt[i] in behavior_tree.CONTROL_NODES and bt[i + 1] in behavior_tree.UP_NODE:
+            return False
+        if bt[i] in behavior_tree.CONDITION_NODES and bt[i] == bt[i + 1]:
+            return False
+        if bt[i] not in behavior_tree.ALL_NODES:
+            return False
+
+    depth = 0
+    max_depth = 0
+    for i in range(len(bt)):
+        if bt[i] in behavior_tree.CONTROL_NODES:
+            depth += 1
+            max_depth = max(depth, max_depth)
+        elif bt[i] in behavior_tree.UP_NODE:
+            depth -= 1
+            if depth < 0 or (depth == 0 and i != len(bt) - 1):
+                return False
+    if depth != 0 or (max_depth == 0 and len(bt) > 1):
+        return False
+
+    if bt[0] in behavior_tree.CONTROL_NODES:
+        return _reference_is_subtree_valid(bt[1:], bt[0] not in behavior_tree.FALLBACK_NODES,
+                                           bt[0] in behavior_tree.FALLBACK_NODES
+                                           or bt[0] not in behavior_tree.SEQUENCE_NODES)
+    return True
+
+
+def _reference_is_subtree_valid(string, fallback_allowed, sequence_allowed):
+
+    while len(string) > 0:
+        node = string.pop(0)
+        if node in behavior_tree.UP_NODE:
+            return True
+        if node in behavior_tree.ATOMIC_FALLBACK_NODES:
+            if not fallback_allowed:
+                return False
+        elif node in behavior_tree.ATOMIC_SEQUENCE_NODES:
+            if not sequence_allowed:
+                return False
+        elif node in behavior_tree.FALLBACK_NODES:
+            if not fallback_allowed or not _reference_is_subtree_valid(string, False, True):
+                return False
+        elif node in behavior_tree.SEQUENCE_NODES:
+            if not sequence_allowed or not _reference_is_subtree_valid(string, True, False):
+                return False
+        elif node in behavior_tree.CONTROL_NODES:
+            if not _reference_is_subtree_valid(string, True, True):
+                return False
+    return False
+
+
 class TestBehaviorTreeStringRepresentation(unittest.TestCase):
 
     def setUp(self):
@@ -21,6 +83,39 @@ class TestBehaviorTreeStringRepresentation(unittest.TestCase):
 
         _ = BehaviorTreeStringRepresentation([])
 
+    def test_node_types(self):
+
+        self.assertEqual(behavior_tree.get_node_type('f('), behavior_tree.NODE_TYPE_FALLBACK)
+        self.assertEqual(behavior_tree.get_node_type('s('), behavior_tree.NODE_TYPE_SEQUENCE)
+        self.assertEqual(behavior_tree.get_node_type('c0'), behavior_tree.NODE_TYPE_CONDITION)
+        self.assertEqual(behavior_tree.get_node_type('a0'), behavior_tree.NODE_TYPE_ACTION)
+        self.assertEqual(behavior_tree.get_node_type(')'), behavior_tree.NODE_TYPE_UP)
+        self.assertIsNone(behavior_tree.get_node_type('new?'))
+
+        btsr = BehaviorTreeStringRepresentation(['s(', 'new?', 'a0', ')'])
+        self.assertFalse(btsr.is_valid())
+        behavior_tree.add_node('condition', 'new?')
+        self.assertEqual(behavior_tree.get_node_type('new?'), behavior_tree.NODE_TYPE_CONDITION)
+        self.assertTrue(btsr.is_valid())
+
+        behavior_tree.initialize_settings()
+        self.assertIsNone(behavior_tree.get_node_type('s('))
+        self.assertFalse(btsr.is_valid())
+
+    def test_encode_and_decode(self):
+
+        bt = ['s(', 'c0', 'f(', 'c1', 'a0', ')', 'a1', ')']
+        encoded_bt = behavior_tree.encode(bt)
+
+        self.assertEqual(len(encoded_bt), len(bt))
+        self.assertEqual(encoded_bt[5], encoded_bt[7])
+        self.assertNotEqual(encoded_bt[1], encoded_bt[3])
+        self.assertEqual(behavior_tree.decode(encoded_bt), bt)
+        self.assertEqual(behavior_tree.decode(behavior_tree.encode([])), [])
+
+        with self.assertRaises(Exception):
+            behavior_tree.encode(['s(', 'unknown', ')'])
+
     def test_random(self):
 
         btsr = BehaviorTreeStringRepresentation([])
@@ -84,6 +179,47 @@ class TestBehaviorTreeStringRepresentation(unittest.TestCase):
         btsr.set(['s(', 'c0', 'x', 'y', 'z', ')'])
         self.assertFalse(btsr.is_valid())
 
+    def test_is_valid_matches_reference(self):
+
+        directory_path = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(directory_path, 'BT_SETTINGS.yaml')
+            with open(file_path, 'w') as f:
+                f.write("fallback_nodes: ['f(']\nsequence_nodes: ['s(']\ncondition_nodes: ['c0', 'c1']\n"
+                        "action_nodes: ['a0', 'a1']\natomic_fallback_nodes: ['af']\n"
+                        "atomic_sequence_nodes: ['as']\nup_node: [')']\n")
+            behavior_tree.load_settings_from_file(file_path)
+        finally:
+            shutil.rmtree(directory_path)
+
+        nodes = ['f(', 's(', ')', ')', 'c0', 'c1', 'a0', 'a1', 'af', 'as', 'unknown']
+        btsr = BehaviorTreeStringRepresentation([])
+        random.seed(0)
+        for _ in range(20000):
+            bt = [random.choice(nodes) for _ in range(random.randint(0, 12))]
+            self.assertEqual(btsr.set(bt).is_valid(), _reference_is_valid(bt), bt)
+
+            fallback_allowed = random.random() < 0.5
+            sequence_allowed = random.random() < 0.5
+            self.assertEqual(btsr.is_subtree_valid(bt, fallback_allowed, sequence_allowed),
+                             _reference_is_subtree_valid(bt[:], fallback_allowed, sequence_allowed), bt)
+
+        def random_tree(depth):
+            if depth > 3 or random.random() < 0.3:
+                return [random.choice(nodes[4:])]
+            tree = [random.choice(nodes[:2])]
+            for _ in range(random.randint(0, 3)):
+                tree += random_tree(depth + 1)
+            return tree + [')']
+
+        num_valid = 0
+        for _ in range(5000):
+            bt = random_tree(0)
+            valid = btsr.set(bt).is_valid()
+            self.assertEqual(valid, _reference_is_valid(bt), bt)
+            num_valid += valid
+        self.assertGreater(num_valid, 500)
+
     def test_subtree_is_valid(self):
 
         btsr = BehaviorTreeStringRepresentation([])
@@ -130,6 +266,37 @@ class TestBehaviorTreeStringRepresentation(unittest.TestCase):
         btsr.set(['s(', 's(', 'a0', ')', ')', ')', 'a1', ')']).close()
         self.assertEqual(btsr.bt, ['s(', 's(', 'a0', ')', 'a1', ')'])
 
+    def test_canonical(self):
+        """ Tests canonical function """
+
+        btsr = BehaviorTreeStringRepresentation([])
+
+        # Adjacent conditions are sorted
+        btsr.set(['s(', 'c1', 'c0', 'a0', ')'])
+        self.assertEqual(btsr.canonical(), ['s(', 'c0', 'c1', 'a0', ')'])
+        self.assertEqual(btsr.bt, ['s(', 'c1', 'c0', 'a0', ')'])
+
+        # Conditions are not moved across other nodes
+        btsr.set(['f(', 'c1', 'a0', 'c0', 'a1', ')'])
+        self.assertEqual(btsr.canonical(), ['f(', 'c1', 'a0', 'c0', 'a1', ')'])
+
+        # Subtrees are handled recursively
+        btsr.set(['s(', 'c1', 'c0', 'f(', 'c1', 'c0', 'a0', ')', 'c1', 'c0', ')'])
+        self.assertEqual(btsr.canonical(), ['s(', 'c0', 'c1', 'f(', 'c0', 'c1', 'a0', ')', 'c0', 'c1', ')'])
+
+        # Equivalent trees share the canonical form
+        self.assertEqual(BehaviorTreeStringRepresentation(['f(', 'c0', 'c1', 'a0', ')']).canonical(),
+                         BehaviorTreeStringRepresentation(['f(', 'c1', 'c0', 'a0', ')']).canonical())
+
+        # Order of actions is kept
+        btsr.set(['s(', 'a1', 'a0', ')'])
+        self.assertEqual(btsr.canonical(), ['s(', 'a1', 'a0', ')'])
+
+        # Not a closed tree, unchanged
+        for bt in [[], ['a0'], ['s(', 'c1', 'c0'], ['s(', 'c1', 'c0', ')', ')'], ['s(', 'c1', ')', 's(', 'c0', ')']]:
+            btsr.set(bt)
+            self.assertEqual(btsr.canonical(), bt)
+
     def test_trim(self):
         """ Tests trim function """
         
@@ -345,6 +512,40 @@ class TestBehaviorTreeStringRepresentation(unittest.TestCase):
         with self.assertRaises(Exception):
             _ = btsr.find_up_node(1)
 
+    def test_queries_follow_changes(self):
+        """ Tests that structural queries are not answered from an outdated bt """
+
+        btsr = BehaviorTreeStringRepresentation(['s(', 'a0', 'f(', 'a0', ')', 'a0', ')'])
+        self.assertEqual(btsr.find_children(0), [1, 2, 5])
+
+        btsr.add_node(1, 'f(')
+        self.assertEqual(btsr.find_children(0), [1, 5, 6, 9])
+        self.assertEqual(btsr.find_parent(3), 1)
+
+        btsr.delete_node(1)
+        self.assertEqual(btsr.find_children(0), [1, 2, 5])
+
+        btsr.change_node(2, 'a1')
+        self.assertEqual(btsr.find_children(0), [1, 2, 3])
+
+        btsr2 = BehaviorTreeStringRepresentation(['f(', 'a0', 'a1', ')'])
+        self.assertEqual(btsr2.find_children(0), [1, 2])
+        btsr.swap_subtrees(btsr2, 2, 0)
+        self.assertEqual(btsr.find_children(0), [1, 2, 6])
+        self.assertEqual(btsr2.find_children(0), [])
+
+        btsr.set(['s(', 'a0', 'f(', 'a0', 'a1', ')', ')'])
+        self.assertEqual(btsr.find_up_node(2), 5)
+        btsr.bt.insert(2, 'a2')
+        self.assertEqual(btsr.find_up_node(3), 6)
+        self.assertEqual(btsr.find_children(0), [1, 2, 3])
+
+        # Changes in place keeping the length are seen too
+        btsr.bt[3] = 'a1'
+        self.assertEqual(btsr.find_children(0), [1, 2, 3, 4, 5])
+        btsr.bt[2] = 'f('
+        self.assertEqual(btsr.find_up_node(2), 6)
+
     def test_get_subtree(self):
         """ Tests get_subtree function """
 
@@ -4,13 +4,81 @@ import paths
 paths.add_modules_to_path()
 
 import unittest
+import py_trees as pt
+from interface import implements
 
-from behavior_tree_learning.core.sbt import StringBehaviorTree
-from behavior_tree_learning.core.sbt import BehaviorNodeFactory
+from behavior_tree_learning.core.sbt import StringBehaviorTree, BehaviorTreeCache, ExecutionParameters
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, BehaviorRegister, BehaviorNode, World
 from behavior_tree_learning.core.plotter import print_ascii_tree
 from tests.fwk.behavior_nodes import get_behaviors
 
 
+class CountingWorld(implements(World)):
+
+    def __init__(self):
+        self.count = 0
+
+    def startup(self, verbose):
+        return True
+
+    def is_alive(self):
+        return True
+
+    def shutdown(self):
+        pass
+
+
+class Count(BehaviorNode):
+    """
+    Action taking two ticks to increase the count of the world
+    """
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return Count(text, world)
+
+    def __init__(self, name, world):
+        self._world = world
+        self._state = None
+        super(Count, self).__init__(str(name))
+
+    def rebind(self, world):
+        super(Count, self).rebind(world)
+        self._state = None
+
+    def update(self):
+        if self._state is None:
+            self._state = pt.common.Status.RUNNING
+        elif self._state is pt.common.Status.RUNNING:
+            self._world.count += 1
+            self._state = pt.common.Status.SUCCESS
+        return self._state
+
+
+class Counted(BehaviorNode):
+
+    @staticmethod
+    def make(text, world, verbose=False):
+        return Counted(text, world)
+
+    def __init__(self, name, world):
+        self._world = world
+        super(Counted, self).__init__(str(name))
+
+    def update(self):
+        if self._world.count > 0:
+            return pt.common.Status.SUCCESS
+        return pt.common.Status.FAILURE
+
+
+def get_counting_behaviors():
+
+    behavior_register = BehaviorRegister()
+    behavior_register.add_condition('counted?', Counted)
+    behavior_register.add_action('count!', Count)
+    return behavior_register
+
+
 class TestStringBehaviorTree(unittest.TestCase):
 
     def setUp(self) -> None:
@@ -21,37 +89,37 @@ class TestStringBehaviorTree(unittest.TestCase):
 
         sbt = ['f(', 'c0', 'c0', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, [])
+        self.assertEqual(sbt, ['f(', 'c0', 'c0', ')'])
         self.assertEqual(len(bt.root.children), 2)
         print_ascii_tree(bt)
 
         sbt = ['f(', 'f(', 'c0', 'c0', ')', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, [])
+        self.assertEqual(sbt, ['f(', 'f(', 'c0', 'c0', ')', ')'])
         self.assertEqual(len(bt.root.children), 1)
         print_ascii_tree(bt)
 
         sbt = ['f(', 'f(', 'c0', 'c0', ')', 's(', 'c0', 'c0', ')', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, [])
+        self.assertEqual(sbt, ['f(', 'f(', 'c0', 'c0', ')', 's(', 'c0', 'c0', ')', ')'])
         self.assertEqual(len(bt.root.children), 2)
         print_ascii_tree(bt)
 
         sbt = ['f(', 'f(', 'c0', 'c0', ')', 'f(', 's(', 'c0', ')', ')', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, [])
+        self.assertEqual(sbt, ['f(', 'f(', 'c0', 'c0', ')', 'f(', 's(', 'c0', ')', ')', ')'])
         self.assertEqual(len(bt.root.children), 2)
         print_ascii_tree(bt)
         
         sbt = ['f(', 'f(', 'c0', 'c0', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, [])
+        self.assertEqual(sbt, ['f(', 'f(', 'c0', 'c0', ')'])
         self.assertEqual(len(bt.root.children), 1)
         print_ascii_tree(bt)
 
         sbt = ['f(', 'f(', 'c0', ')', ')', 'c0', ')']
         bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
-        self.assertEqual(sbt, ['c0', ')'])
+        self.assertEqual(sbt, ['f(', 'f(', 'c0', ')', ')', 'c0', ')'])
         self.assertEqual(len(bt.root.children), 1)
         print_ascii_tree(bt)
        
@@ -64,13 +132,57 @@ class TestStringBehaviorTree(unittest.TestCase):
     def test_str_from_bt(self):
 
         sbt = ['f(', 'f(', 'c0', 'c0', ')', 'f(', 's(', 'c0', ')', ')', ')']
-        bt = StringBehaviorTree(sbt[:], behaviors=self._node_factory)
+        bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
         self.assertEqual(bt.to_string(), sbt)
 
         sbt = ['f(', 'f(', 'c0', ')', 'c0', ')']
-        bt = StringBehaviorTree(sbt[:], behaviors=self._node_factory)
+        bt = StringBehaviorTree(sbt, behaviors=self._node_factory)
         self.assertEqual(bt.to_string(), sbt)
 
+    def test_rebind(self):
+
+        node_factory = BehaviorNodeFactory(get_counting_behaviors())
+        sbt = ['s(', 'f(', 'counted?', 'count!', ')', 'count!', ')']
+        parameters = ExecutionParameters(successes_required=1)
+
+        world1 = CountingWorld()
+        bt = StringBehaviorTree(sbt, behaviors=node_factory, world=world1)
+        result1 = bt.run_bt(parameters)
+        self.assertEqual(world1.count, 2)
+
+        world2 = CountingWorld()
+        bt.rebind(world2)
+        for node in bt.root.iterate():
+            self.assertEqual(node.status, pt.common.Status.INVALID)
+        self.assertEqual(bt.run_bt(parameters), result1)
+        self.assertEqual(world1.count, 2)
+        self.assertEqual(world2.count, 2)
+
+    def test_tree_cache(self):
+
+        node_factory = BehaviorNodeFactory(get_counting_behaviors())
+        sbt1 = ['s(', 'f(', 'counted?', 'count!', ')', 'count!', ')']
+        sbt2 = ['s(', 'count!', 'counted?', ')']
+        parameters = ExecutionParameters(successes_required=1)
+
+        tree_cache = BehaviorTreeCache(node_factory, capacity=1)
+        bt1 = tree_cache.get(sbt1, CountingWorld())
+        result1 = bt1.run_bt(parameters)
+
+        world = CountingWorld()
+        self.assertIs(tree_cache.get(sbt1, world), bt1)
+        self.assertEqual(bt1.run_bt(parameters), result1)
+        self.assertEqual(world.count, 2)
+
+        bt2 = tree_cache.get(sbt2, CountingWorld())
+        self.assertEqual(len(tree_cache), 1)
+        self.assertIs(tree_cache.get(sbt2, CountingWorld()), bt2)
+        self.assertIsNot(tree_cache.get(sbt1, CountingWorld()), bt1)
+
+        tree_cache = BehaviorTreeCache(node_factory, capacity=0)
+        self.assertIsNot(tree_cache.get(sbt1, CountingWorld()), tree_cache.get(sbt1, CountingWorld()))
+        self.assertEqual(len(tree_cache), 0)
+
 
 if __name__ == '__main__':
     unittest.main()
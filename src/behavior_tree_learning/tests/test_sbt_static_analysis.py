@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import unittest
+import py_trees as pt
+
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, NativeBehaviorTree
+from behavior_tree_learning.core.sbt import StaticAnalysis, Outcome
+from tests.fwk.scripted import ScriptedWorld, get_scripted_behaviors, random_scripts, random_tree, STATUSES
+
+_OUTCOMES = {pt.common.Status.SUCCESS: Outcome.SUCCESS, pt.common.Status.FAILURE: Outcome.FAILURE,
+             pt.common.Status.RUNNING: Outcome.RUNNING}
+
+
+class TestStaticAnalysis(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self._node_factory = BehaviorNodeFactory(get_scripted_behaviors())
+
+    def test_default_outcomes(self):
+
+        analysis = StaticAnalysis(['f(', 'c0', 's(', 'a0', 'c1', ')', ')'])
+        self.assertEqual(analysis.outcomes, Outcome.SUCCESS | Outcome.FAILURE | Outcome.RUNNING)
+        self.assertEqual(analysis.num_unreachable, 0)
+        self.assertEqual((analysis.length, analysis.depth), (5, 2))
+        self.assertTrue(analysis.acts())
+
+        analysis = StaticAnalysis(['s(', 'c0', 'c1', ')'])
+        self.assertEqual(analysis.outcomes, Outcome.SUCCESS | Outcome.FAILURE)
+        self.assertFalse(analysis.acts())
+
+    def test_unreachable_nodes(self):
+
+        # A fallback never gets past a condition that cannot fail
+        analysis = StaticAnalysis(['f(', 'c0', 'a0', ')'], {'c0': Outcome.SUCCESS})
+        self.assertEqual(analysis.reachable, [True, True, False, True])
+        self.assertEqual(analysis.num_unreachable, 1)
+        self.assertEqual(analysis.outcomes, Outcome.SUCCESS)
+        self.assertFalse(analysis.acts())
+
+        # Nor a sequence past an action that cannot succeed
+        analysis = StaticAnalysis(['s(', 'a0', 'f(', 'c0', 'a1', ')', ')'], {'a0': Outcome.FAILURE | Outcome.RUNNING})
+        self.assertEqual(analysis.num_unreachable, 3)
+        self.assertEqual(analysis.outcomes, Outcome.FAILURE | Outcome.RUNNING)
+        self.assertEqual(analysis.num_reachable_behaviors, 1)
+
+        analysis = StaticAnalysis(['p(', 'a0', 'c0', ')'], {'a0': Outcome.RUNNING})
+        self.assertEqual(analysis.outcomes, Outcome.FAILURE | Outcome.RUNNING)
+        self.assertEqual(analysis.num_unreachable, 0)
+
+    def test_runs_within_analysis(self):
+
+        random.seed(0)
+        for _ in range(300):
+            sbt = random_tree()
+            scripts = random_scripts()
+            for name in scripts:
+                if name.startswith('c'):
+                    scripts[name] = [random.choice(STATUSES[1:]) for _ in scripts[name]]
+            leaf_outcomes = {name: Outcome(0) for name in scripts}
+            for name, script in scripts.items():
+                for status in script:
+                    leaf_outcomes[name] |= _OUTCOMES[status]
+
+            analysis = StaticAnalysis(sbt, leaf_outcomes)
+            nodes = [index for index, node in enumerate(sbt) if node != ')']
+            tree = NativeBehaviorTree(sbt, behaviors=self._node_factory, world=ScriptedWorld(scripts))
+            for _ in range(12):
+                tree.tick_once()
+                for index, status in zip(nodes, tree.statuses()):
+                    if status != pt.common.Status.INVALID:
+                        self.assertTrue(analysis.reachable[index], sbt)
+                        self.assertIn(_OUTCOMES[status], analysis.node_outcomes[index], sbt)
+
+
+if __name__ == '__main__':
+    unittest.main()
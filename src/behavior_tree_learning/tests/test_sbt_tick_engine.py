@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import asyncio
+import unittest
+
+from behavior_tree_learning.core.sbt import StringBehaviorTree, ExecutionParameters, ExecutionBackend
+from behavior_tree_learning.core.sbt import NativeBehaviorTree, make_behavior_tree
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory
+from tests.fwk.behavior_nodes import get_behaviors
+from tests.fwk.scripted import ScriptedWorld, AsyncScriptedWorld, get_scripted_behaviors, random_scripts, random_tree, \
+    py_trees_statuses, STATUSES
+
+
+class TestNativeBehaviorTree(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self._node_factory = BehaviorNodeFactory(get_scripted_behaviors())
+
+    def _assert_same_trace(self, sbt, scripts, ticks=12):
+
+        py_trees_world = ScriptedWorld(scripts)
+        py_trees_tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=py_trees_world)
+        native_world = ScriptedWorld(scripts)
+        native_tree = NativeBehaviorTree(sbt, behaviors=self._node_factory, world=native_world)
+
+        for _ in range(ticks):
+            py_trees_tree.root.tick_once()
+            native_tree.tick_once()
+            self.assertEqual(native_tree.statuses(), py_trees_statuses(py_trees_tree.root), sbt)
+            self.assertEqual(native_world.log, py_trees_world.log, sbt)
+
+        return py_trees_tree, native_tree
+
+    def test_same_trace_as_py_trees(self):
+
+        random.seed(0)
+        for _ in range(300):
+            self._assert_same_trace(random_tree(), random_scripts())
+
+    def test_same_trace_after_rebind(self):
+
+        random.seed(1)
+        for _ in range(50):
+            sbt = random_tree()
+            py_trees_tree, native_tree = self._assert_same_trace(sbt, random_scripts())
+
+            scripts = random_scripts()
+            py_trees_world = ScriptedWorld(scripts)
+            native_world = ScriptedWorld(scripts)
+            py_trees_tree.rebind(py_trees_world)
+            native_tree.rebind(native_world)
+            for _ in range(12):
+                py_trees_tree.root.tick_once()
+                native_tree.tick_once()
+                self.assertEqual(native_tree.statuses(), py_trees_statuses(py_trees_tree.root), sbt)
+                self.assertEqual(native_world.log, py_trees_world.log, sbt)
+
+    def test_same_run_as_py_trees(self):
+
+        random.seed(2)
+        for _ in range(100):
+            sbt = random_tree()
+            scripts = random_scripts()
+            parameters = ExecutionParameters(max_ticks=20, max_straight_fails=random.randint(1, 3),
+                                             successes_required=random.randint(1, 3))
+
+            py_trees_tree = StringBehaviorTree(sbt, behaviors=self._node_factory, world=ScriptedWorld(scripts))
+            native_tree = NativeBehaviorTree(sbt, behaviors=self._node_factory, world=ScriptedWorld(scripts))
+            self.assertEqual(native_tree.run_bt(parameters), py_trees_tree.run_bt(parameters))
+            self.assertEqual((native_tree.failed, native_tree.timeout), (py_trees_tree.failed, py_trees_tree.timeout))
+            self.assertEqual((native_tree.depth, native_tree.length), (py_trees_tree.depth, py_trees_tree.length))
+
+    def test_abort_run(self):
+
+        sbt = ['s(', 'c0', 'a0', ')']
+        scripts = {'c0': [STATUSES[1]], 'a0': [STATUSES[0]]}
+        parameters = ExecutionParameters(max_ticks=20)
+
+        for backend in [ExecutionBackend.PY_TREES, ExecutionBackend.NATIVE]:
+            tree = make_behavior_tree(sbt, self._node_factory, ScriptedWorld(scripts), backend=backend)
+            self.assertEqual(tree.run_bt(parameters, abort=lambda ticks: ticks >= 3), (True, 3))
+            self.assertEqual((tree.aborted, tree.timeout, tree.failed), (True, False, False))
+
+            tree.rebind(ScriptedWorld(scripts))
+            self.assertFalse(tree.aborted)
+            self.assertEqual(tree.run_bt(parameters, abort=lambda ticks: False), (True, 20))
+            self.assertEqual((tree.aborted, tree.timeout), (False, True))
+
+    def test_async_runs(self):
+
+        random.seed(4)
+        runs = [(random_tree(), random_scripts()) for _ in range(20)]
+        parameters = ExecutionParameters(max_ticks=20)
+
+        async def run_concurrently(trees):
+            return await asyncio.gather(*[tree.run_bt_async(parameters) for tree in trees])
+
+        for backend in [ExecutionBackend.PY_TREES, ExecutionBackend.NATIVE]:
+            worlds = [ScriptedWorld(scripts) for _, scripts in runs]
+            results = [make_behavior_tree(sbt, self._node_factory, world, backend=backend).run_bt(parameters)
+                       for (sbt, _), world in zip(runs, worlds)]
+
+            async_worlds = [AsyncScriptedWorld(scripts) for _, scripts in runs]
+            trees = [make_behavior_tree(sbt, self._node_factory, world, backend=backend)
+                     for (sbt, _), world in zip(runs, async_worlds)]
+            self.assertEqual(asyncio.run(run_concurrently(trees)), results)
+            self.assertEqual([world.log for world in async_worlds], [world.log for world in worlds])
+
+    def test_fwk_behaviors(self):
+
+        node_factory = BehaviorNodeFactory(get_behaviors())
+        world = ScriptedWorld({})
+        for sbt in [['a0'], ['f(', 'c0', 'a0', ')'], ['s(', 'c0', 'f(', 'c1', 'a1', ')', 'a2', ')'],
+                    ['p(', 'a0', 's(', 'c2', 'a5', ')', ')'], ['f(', 'f(', 'c0', ')']]:
+            py_trees_tree = StringBehaviorTree(sbt, behaviors=node_factory, world=world)
+            native_tree = NativeBehaviorTree(sbt, behaviors=node_factory, world=world)
+            for _ in range(3):
+                py_trees_tree.root.tick_once()
+                native_tree.tick_once()
+                self.assertEqual(native_tree.statuses(), py_trees_statuses(py_trees_tree.root))
+
+        with self.assertRaises(Exception):
+            NativeBehaviorTree(['nonbehavior'], behaviors=node_factory)
+
+        with self.assertRaises(Exception):
+            NativeBehaviorTree(['f(', 'nonpytreesbehavior', ')'], behaviors=node_factory)
+
+    def test_make_behavior_tree(self):
+
+        sbt = ['f(', 'c0', 'a0', ')']
+        self.assertIsInstance(make_behavior_tree(sbt, self._node_factory), StringBehaviorTree)
+        self.assertIsInstance(make_behavior_tree(sbt, self._node_factory, backend=ExecutionBackend.NATIVE),
+                              NativeBehaviorTree)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import paths
+paths.add_modules_to_path()
+
+import random
+import unittest
+import py_trees as pt
+
+from behavior_tree_learning.core.sbt import NativeBehaviorTree, make_behavior_tree, ExecutionBackend
+from behavior_tree_learning.core.sbt import BehaviorNodeFactory, SubtreeTraceCache
+from tests.fwk.scripted import ScriptedWorld, get_scripted_behaviors, random_scripts, random_tree
+
+
+class DeterministicWorld(ScriptedWorld):
+    """
+    Scripted world whose state is how many times each behavior has been updated
+    """
+
+    def state_digest(self):
+        return self.snapshot()
+
+    def snapshot(self):
+        return tuple(sorted(self.updates.items()))
+
+    def restore(self, snapshot):
+        self.updates = dict(snapshot)
+
+
+class TestSubtreeTraceCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self._node_factory = BehaviorNodeFactory(get_scripted_behaviors())
+
+    def test_same_run_as_without_cache(self):
+
+        random.seed(0)
+        trace_cache = SubtreeTraceCache()
+        for _ in range(300):
+            sbt = random_tree()
+            scripts = random_scripts()
+
+            world = DeterministicWorld(scripts)
+            tree = NativeBehaviorTree(sbt, behaviors=self._node_factory, world=world)
+            traced_world = DeterministicWorld(scripts)
+            traced_tree = NativeBehaviorTree(sbt, behaviors=self._node_factory, world=traced_world,
+                                             trace_cache=trace_cache)
+
+            for _ in range(12):
+                tree.tick_once()
+                traced_tree.tick_once()
+                self.assertEqual(traced_tree.statuses(), tree.statuses(), sbt)
+                self.assertEqual(traced_world.updates, world.updates, sbt)
+
+            # The scripts are part of the state, the cache is only for trees ticking in the same world
+            trace_cache.clear()
+
+    def test_replay_across_trees(self):
+
+        scripts = {'c0': [pt.common.Status.FAILURE], 'c1': [pt.common.Status.SUCCESS],
+                   'a0': [pt.common.Status.SUCCESS], 'a1': [pt.common.Status.FAILURE],
+                   'a2': [pt.common.Status.SUCCESS]}
+        trace_cache = SubtreeTraceCache()
+
+        for sbt in [['s(', 'f(', 'c0', 'a0', ')', 'a1', ')'], ['s(', 'f(', 'c0', 'a0', ')', 'a2', ')']]:
+            world = DeterministicWorld(scripts)
+            tree = make_behavior_tree(sbt, behaviors=self._node_factory, world=world,
+                                      backend=ExecutionBackend.NATIVE, trace_cache=trace_cache)
+            tree.tick_once()
+
+        # The fallback was only simulated for the first tree, and replayed for the second one
+        self.assertEqual(trace_cache.hits, 1)
+        self.assertEqual(world.log, [('a2', 'initialise'), ('a2', 'update', pt.common.Status.SUCCESS),
+                                     ('a2', 'terminate', pt.common.Status.SUCCESS)])
+        self.assertEqual(world.updates, {'c0': 1, 'c1': 0, 'a0': 1, 'a1': 0, 'a2': 1})
+        self.assertEqual(tree.statuses(), [pt.common.Status.SUCCESS, pt.common.Status.SUCCESS, pt.common.Status.FAILURE,
+                                           pt.common.Status.SUCCESS, pt.common.Status.SUCCESS])
+
+    def test_worlds_without_digest(self):
+
+        random.seed(1)
+        trace_cache = SubtreeTraceCache()
+        for _ in range(20):
+            tree = NativeBehaviorTree(random_tree(), behaviors=self._node_factory,
+                                      world=ScriptedWorld(random_scripts()), trace_cache=trace_cache)
+            for _ in range(4):
+                tree.tick_once()
+
+        self.assertEqual(len(trace_cache), 0)
+        self.assertEqual(trace_cache.hits, 0)
+
+    def test_subtree_ids_are_bounded(self):
+
+        trace_cache = SubtreeTraceCache(capacity=2)
+        ids = [trace_cache.subtree_id(('a%d' % i, 0)) for i in range(3)]
+        self.assertEqual(ids, [0, 1, 2])
+        self.assertEqual(len(trace_cache._subtree_ids), 2)
+
+        # Known ids are kept, dropped ones are never given again
+        self.assertEqual(trace_cache.subtree_id(('a2', 0)), 2)
+        self.assertEqual(trace_cache.subtree_id(('a0', 0)), 3)
+        self.assertEqual(trace_cache.subtree_id(('a2', 0)), 2)
+
+    def test_native_backend_only(self):
+
+        with self.assertRaises(ValueError):
+            make_behavior_tree(['a0'], behaviors=self._node_factory, world=ScriptedWorld({'a0': []}),
+                               backend=ExecutionBackend.PY_TREES, trace_cache=SubtreeTraceCache())
+
+
+if __name__ == '__main__':
+    unittest.main()